@@ -2,6 +2,7 @@ from logging.config import fileConfig
 
 from sqlalchemy import engine_from_config
 from sqlalchemy import pool
+from sqlalchemy.engine import make_url
 
 from alembic import context
 
@@ -25,6 +26,20 @@ if config.config_file_name is not None:
 target_metadata = Base.metadata
 
 
+def include_object_for(dialect_name):
+    """
+    Skip model objects declared for another dialect with ``.ddl_if(dialect=...)``
+    (e.g. the SQLite and Postgres variants of the same index), so autogenerate
+    compares each database against its own variant only.
+    """
+
+    def include_object(obj, name, type_, reflected, compare_to):
+        ddl_if = getattr(obj, "_ddl_if", None)
+        return reflected or ddl_if is None or ddl_if.dialect in (None, dialect_name)
+
+    return include_object
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -50,6 +65,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         version_table="shortener__alembic_version",
+        include_object=include_object_for(make_url(url).get_backend_name()),
     )
 
     with context.begin_transaction():
@@ -78,6 +94,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             version_table="shortener__alembic_version",
+            include_object=include_object_for(connection.dialect.name),
         )
 
         with context.begin_transaction():
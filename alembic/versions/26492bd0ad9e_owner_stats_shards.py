@@ -0,0 +1,65 @@
+"""owner stats shards
+
+Revision ID: 26492bd0ad9e
+Revises: 3ae91367ded5
+Create Date: 2026-10-19 09:15:08.922925
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '26492bd0ad9e'
+down_revision: Union[str, Sequence[str], None] = '3ae91367ded5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _create_owner_stats(sharded: bool) -> None:
+    key = ['owner_kind', 'owner_id', 'shard'] if sharded else ['owner_kind', 'owner_id']
+    op.create_table('shortener__owner_stats',
+    sa.Column('owner_kind', sqlmodel.sql.sqltypes.AutoString(length=8), nullable=False),
+    sa.Column('owner_id', sqlmodel.sql.sqltypes.AutoString(length=128), nullable=False),
+    *([sa.Column('shard', sa.Integer(), autoincrement=False, nullable=False)] if sharded else []),
+    sa.Column('links', sa.Integer(), nullable=False),
+    sa.Column('active_links', sa.Integer(), nullable=False),
+    sa.Column('clicks', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint(*key)
+    )
+
+
+def _backfill(sharded: bool) -> None:
+    # same as `python -m app.owner_stats reconcile`
+    for kind, column in (("user", "created_by_user_id"), ("client", "owner_client_id")):
+        op.execute(
+            f"""
+            INSERT INTO shortener__owner_stats
+                (owner_kind, owner_id, {'shard, ' if sharded else ''}links, active_links, clicks)
+            SELECT '{kind}', {column}, {'0, ' if sharded else ''}COUNT(*),
+                   SUM(CASE WHEN is_active THEN 1 ELSE 0 END),
+                   COALESCE(SUM(clicks), 0)
+            FROM shortener__short_urls
+            WHERE {column} IS NOT NULL
+            GROUP BY {column}
+            """
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # the primary key gains a column; the table only holds derived totals,
+    # so rebuild it instead of altering the key in place
+    op.drop_table('shortener__owner_stats')
+    _create_owner_stats(sharded=True)
+    _backfill(sharded=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('shortener__owner_stats')
+    _create_owner_stats(sharded=False)
+    _backfill(sharded=False)
@@ -0,0 +1,43 @@
+"""client listing indexes
+
+Revision ID: 7b9e2c4d1a06
+Revises: e443bf1a5961
+Create Date: 2026-10-19 08:02:11.418306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7b9e2c4d1a06'
+down_revision: Union[str, Sequence[str], None] = 'e443bf1a5961'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Keep in sync with app.models.FILTERABLE_EXTRAS_KEYS at the time of this revision
+EXTRAS_KEYS = ('campaign', 'tag')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_shortener__short_urls_owner_client_id_id', 'shortener__short_urls', ['owner_client_id', 'id'], unique=False)
+
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_shortener__short_urls_extras_gin', 'shortener__short_urls', [sa.text('(extras::jsonb) jsonb_path_ops')], unique=False, postgresql_using='gin')
+    else:
+        for key in EXTRAS_KEYS:
+            op.create_index(f'ix_shortener__short_urls_extras_{key}', 'shortener__short_urls', ['owner_client_id', sa.text(f"json_extract(extras, '$.{key}')")], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_shortener__short_urls_extras_gin', table_name='shortener__short_urls')
+    else:
+        for key in EXTRAS_KEYS:
+            op.drop_index(f'ix_shortener__short_urls_extras_{key}', table_name='shortener__short_urls')
+
+    op.drop_index('ix_shortener__short_urls_owner_client_id_id', table_name='shortener__short_urls')
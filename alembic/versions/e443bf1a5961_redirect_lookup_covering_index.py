@@ -0,0 +1,33 @@
+"""redirect lookup covering index
+
+Revision ID: e443bf1a5961
+Revises: 3edd6319c1d1
+Create Date: 2026-10-19 07:52:37.092669
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e443bf1a5961'
+down_revision: Union[str, Sequence[str], None] = '3edd6319c1d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.create_index('ix_shortener__short_urls_redirect_lookup', 'shortener__short_urls', ['code'], unique=False, postgresql_include=['id', 'original_url', 'is_active', 'expires_at'])
+    else:
+        # No INCLUDE outside Postgres: a composite index covers the same lookup
+        # (the integer primary key is the rowid, so it is always covered on SQLite).
+        op.create_index('ix_shortener__short_urls_redirect_lookup', 'shortener__short_urls', ['code', 'is_active', 'expires_at', 'original_url'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shortener__short_urls_redirect_lookup', table_name='shortener__short_urls')
@@ -0,0 +1,77 @@
+"""destination host
+
+Revision ID: ed05e624706c
+Revises: a0bea1f41a24
+Create Date: 2026-10-19 08:21:38.606337
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+from urllib.parse import urlsplit
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ed05e624706c'
+down_revision: Union[str, Sequence[str], None] = 'a0bea1f41a24'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH = 10_000
+
+
+# Keep in sync with app.api.helpers.destination_host at the time of this revision
+def _destination_host(url):
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    host = (host or '').strip().rstrip('.').lower()
+    if not host:
+        return None
+    try:
+        return host.encode('idna').decode('ascii')
+    except UnicodeError:
+        return host
+
+
+def _backfill(table_name: str) -> None:
+    bind = op.get_bind()
+    table = sa.table(table_name, sa.column('id'), sa.column('original_url'), sa.column('destination_host'))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(table.c.id, table.c.original_url)
+            .where(table.c.id > last_id)
+            .order_by(table.c.id)
+            .limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            table.update().where(table.c.id == sa.bindparam('b_id')).values(destination_host=sa.bindparam('b_host')),
+            [{'b_id': row.id, 'b_host': _destination_host(row.original_url)} for row in rows],
+        )
+        last_id = rows[-1].id
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('shortener__short_urls', sa.Column('destination_host', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True))
+    op.add_column('shortener__short_urls_archive', sa.Column('destination_host', sqlmodel.sql.sqltypes.AutoString(length=255), nullable=True))
+
+    _backfill('shortener__short_urls')
+    _backfill('shortener__short_urls_archive')
+
+    # built after the backfill, not maintained row by row during it
+    op.create_index('ix_shortener__short_urls_destination_host_id', 'shortener__short_urls', ['destination_host', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_shortener__short_urls_destination_host_id', table_name='shortener__short_urls')
+    op.drop_column('shortener__short_urls_archive', 'destination_host')
+    op.drop_column('shortener__short_urls', 'destination_host')
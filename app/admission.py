@@ -0,0 +1,184 @@
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from app import metrics
+from app.core.config import settings
+
+# ---------------------------
+# Admission control / load shedding
+# ---------------------------
+#
+# Every endpoint is a sync `def`, so requests end up on anyio's threadpool.
+# Instead of letting bursts queue there without limit, each request class gets
+# its own pool (concurrency + bounded queue + max wait). Redirects never wait
+# behind listings, and anything that cannot start in time gets a fast 503.
+
+_EXEMPT_PATHS = {"/", "/health", "/metrics"}
+_LISTING_SUFFIXES = ("/me/urls", "/clients/me/urls")
+
+
+def classify(path: str) -> Optional[str]:
+    """
+    Map a request path to its pool: redirect > shorten > api > listing.
+    """
+    if path in _EXEMPT_PATHS:
+        return None
+    if path.startswith("/api/") or path == "/api":
+        if path.endswith("/shorten"):
+            return "shorten"
+        if path.endswith(_LISTING_SUFFIXES):
+            return "listing"
+        return "api"
+    if path.startswith(("/docs", "/redoc", "/openapi")):
+        return None
+    return "redirect"
+
+
+class AdmissionPool:
+    """
+    Async semaphore with a bounded FIFO queue and a max wait. Lives on the
+    event loop, so no locking is needed.
+    """
+
+    def __init__(self, name: str, concurrency: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            self._report()
+            return True
+
+        if len(self._waiters) >= self.max_queue:
+            metrics.incr(f"admission.{self.name}.rejected")
+            return False
+
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._report()
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(fut, self.max_wait)
+        except asyncio.TimeoutError:
+            self._discard(fut)
+            if fut.done() and not fut.cancelled():
+                # release() handed us the slot as the wait timed out: use it
+                return True
+            metrics.incr(f"admission.{self.name}.rejected")
+            return False
+        except asyncio.CancelledError:
+            # client went away; hand the slot on if we had just been given it
+            if fut.done() and not fut.cancelled():
+                self.release()
+            self._discard(fut)
+            raise
+        finally:
+            metrics.observe(
+                f"admission.{self.name}.wait_seconds", time.monotonic() - started
+            )
+
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                # hand the slot straight to the next waiter
+                fut.set_result(None)
+                self._report()
+                return
+        self.active -= 1
+        self._report()
+
+    def _discard(self, fut: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(fut)
+        except ValueError:
+            pass
+        self._report()
+
+    def _report(self) -> None:
+        metrics.set_gauge(f"admission.{self.name}.active", self.active)
+        metrics.set_gauge(f"admission.{self.name}.queue_depth", len(self._waiters))
+
+
+def parse_pools(spec: str) -> Dict[str, AdmissionPool]:
+    """
+    "redirect=64:256:0.5,shorten=16:64:1" -> name=concurrency:max_queue:max_wait_seconds
+    """
+    pools = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, _, values = item.partition("=")
+        concurrency, max_queue, max_wait = values.split(":")
+        pools[name.strip()] = AdmissionPool(
+            name.strip(), int(concurrency), int(max_queue), float(max_wait)
+        )
+    return pools
+
+
+class AdmissionMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware overhead on the hot path).
+    Requests whose class has no configured pool pass straight through.
+    """
+
+    def __init__(self, app, pools: Optional[str] = None):
+        self.app = app
+        self.pools = parse_pools(pools or settings.ADMISSION_POOLS)
+        self.retry_after = str(settings.ADMISSION_RETRY_AFTER_SECONDS)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        pool = self.pools.get(classify(scope["path"]) or "")
+        if pool is None:
+            return await self.app(scope, receive, send)
+
+        if not await pool.acquire():
+            await self._reject(send)
+            return
+
+        metrics.incr(f"admission.{pool.name}.admitted")
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            pool.release()
+
+    async def _reject(self, send) -> None:
+        body = b'{"detail":"Server busy, retry later"}'
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", self.retry_after.encode()),
+                ],
+            }
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+def threadpool_size() -> int:
+    """
+    Enough worker threads for every pool to run at full concurrency at once.
+    """
+    return sum(
+        pool.concurrency for pool in parse_pools(settings.ADMISSION_POOLS).values()
+    )
@@ -0,0 +1,160 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import case, func, select, update
+from sqlalchemy.orm import Session
+
+from app.api.helpers import normalize_host
+from app.core.config import settings
+from app.database import get_db
+from app.hot_links import top_hot_links
+from app.invalidation import evict_local, publish_invalidation
+from app.models import ShortUrl
+from app.owner_stats import record_active_changes
+from app.schemas import (
+    HostDeactivateResponse,
+    HostLinkCount,
+    HostLinksResponse,
+    HotLinksResponse,
+)
+from app.security import get_admin_token_payload
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(
+    prefix="/admin",
+    tags=["admin"],
+    dependencies=[Depends(get_admin_token_payload)],
+)
+
+
+@router.get("/hot", response_model=HotLinksResponse)
+def get_hot_links(
+    limit: int = Query(50, ge=1, le=1000),
+    db: Session = Depends(get_db),
+):
+    """
+    Current top codes by estimated request rate, merged across workers.
+    """
+    if not settings.HOT_LINKS_ENABLED:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Hot link tracking is disabled",
+        )
+
+    return {"items": top_hot_links(db, limit)}
+
+
+def _normalized_host(host: str) -> str:
+    normalized = normalize_host(host)
+    if not normalized:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid host",
+        )
+    return normalized
+
+
+@router.get("/hosts/{host}/count", response_model=HostLinkCount)
+def count_host_links(host: str, db: Session = Depends(get_db)):
+    """
+    How many links point at `host` (exact, normalized host; subdomains are
+    separate hosts).
+    """
+    host = _normalized_host(host)
+    links, active_links = db.execute(
+        select(
+            func.count(),
+            func.coalesce(
+                func.sum(case((ShortUrl.is_active.is_(True), 1), else_=0)), 0
+            ),
+        ).where(ShortUrl.destination_host == host)
+    ).one()
+    return {"host": host, "links": links, "active_links": active_links}
+
+
+@router.get("/hosts/{host}/links", response_model=HostLinksResponse)
+def list_host_links(
+    host: str,
+    cursor: Optional[int] = Query(None, ge=1),
+    limit: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db),
+):
+    """
+    Links pointing at `host`, newest first. Keyset pagination: pass the
+    returned next_cursor back as ?cursor=
+    """
+    host = _normalized_host(host)
+    stmt = select(ShortUrl).where(ShortUrl.destination_host == host)
+    if cursor is not None:
+        stmt = stmt.where(ShortUrl.id < cursor)
+
+    urls = (
+        db.execute(stmt.order_by(ShortUrl.id.desc()).limit(limit + 1)).scalars().all()
+    )
+    next_cursor = urls[limit - 1].id if len(urls) > limit else None
+
+    items = [
+        {
+            "code": short.code,
+            "original_url": short.original_url,
+            "is_active": short.is_active,
+            "owner_client_id": short.owner_client_id,
+            "created_by_user_id": short.created_by_user_id,
+            "created_at": short.created_at,
+        }
+        for short in urls[:limit]
+    ]
+    return {"host": host, "items": items, "limit": limit, "next_cursor": next_cursor}
+
+
+@router.post("/hosts/{host}/deactivate", response_model=HostDeactivateResponse)
+def deactivate_host_links(host: str, db: Session = Depends(get_db)):
+    """
+    Deactivate every active link pointing at `host` (takedown), with
+    set-based UPDATEs in chunks of LINK_BATCH_CHUNK_SIZE. Each chunk commits
+    and invalidates redirect caches on every node before the next one.
+    """
+    host = _normalized_host(host)
+    chunk_size = settings.LINK_BATCH_CHUNK_SIZE
+    deactivated = 0
+    last_id = 0
+
+    while True:
+        ids = (
+            db.execute(
+                select(ShortUrl.id)
+                .where(
+                    ShortUrl.destination_host == host,
+                    ShortUrl.is_active.is_(True),
+                    ShortUrl.id > last_id,
+                )
+                .order_by(ShortUrl.id)
+                .limit(chunk_size)
+            )
+            .scalars()
+            .all()
+        )
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        rows = db.execute(
+            update(ShortUrl)
+            .where(ShortUrl.id.in_(ids), ShortUrl.is_active.is_(True))
+            .values(is_active=False)
+            .returning(
+                ShortUrl.code, ShortUrl.created_by_user_id, ShortUrl.owner_client_id
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_active_changes(db, rows, -1)
+        codes = [row.code for row in rows]
+        publish_invalidation(db, codes)
+        db.commit()
+        evict_local(codes)
+        deactivated += len(rows)
+
+    logger.warning("Deactivated %d links to host %s", deactivated, host)
+    return {"host": host, "deactivated": deactivated}
@@ -1,42 +1,147 @@
 import secrets
 import string
 from datetime import datetime, timezone
+from typing import Optional
+from urllib.parse import urlsplit
 
-from sqlalchemy import select
+from fastapi import Request
+from sqlalchemy import cast, exists, func, or_, select
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import Session
 
-from app.models import ShortUrl
+from app.code_space import CodeSpace
+from app.core.config import settings
+from app.models import ArchivedShortUrl, ShortUrl, extras_path
 
-CODE_LENGTH = 6
 CODE_ALPHABET = string.ascii_letters + string.digits
+# path pattern for redirect codes, shared with the edge app (app/edge.py)
+CODE_REGEX = r"^[A-Za-z0-9]{6,16}$"
+
+code_space = CodeSpace(len(CODE_ALPHABET))
 
 
 def generate_code(db: Session) -> str:
     """
     Generate a unique short code.
-    Uses a simple random approach with collision check.
-    For very high volume you'd want something more robust.
+    Uses a simple random approach with collision check, at the shortest
+    length whose keyspace is still sparse enough (see app/code_space.py).
+    Repeated collisions move this call to a longer code even if the
+    occupancy counts are behind.
     """
+    length = code_space.length()
+    attempts = 0
     while True:
-        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(CODE_LENGTH))
+        code = "".join(secrets.choice(CODE_ALPHABET) for _ in range(length))
 
-        stmt = select(ShortUrl).where(ShortUrl.code == code)
-        exists = db.execute(stmt).scalars().first()
-        if not exists:
+        if not _code_taken(db, code):
+            code_space.issued(length)
             return code
 
+        code_space.collided(length)
+        attempts += 1
+        if (
+            attempts >= settings.CODE_MAX_ATTEMPTS_PER_LENGTH
+            and length < settings.CODE_MAX_LENGTH
+        ):
+            length += 1
+            attempts = 0
+
+
+def _code_taken(db: Session, code: str) -> bool:
+    # Archived codes stay reserved, so check both tiers in one round trip
+    stmt = select(
+        or_(
+            exists().where(ShortUrl.code == code),
+            exists().where(ArchivedShortUrl.code == code),
+        )
+    )
+    return bool(db.execute(stmt).scalar())
+
+
+class RedirectTarget:
+    """
+    Just the columns a redirect needs, loaded without hydrating a ShortUrl
+    (no Pydantic validation, no extras JSON).
+    """
+
+    __slots__ = ("id", "original_url", "is_active", "expires_at")
+
+    def __init__(
+        self,
+        id: int,
+        original_url: str,
+        is_active: bool,
+        expires_at: Optional[datetime],
+    ):
+        self.id = id
+        self.original_url = original_url
+        self.is_active = is_active
+        self.expires_at = expires_at
+
+
+def load_redirect_target(db: Session, code: str) -> Optional[RedirectTarget]:
+    # Served by ix_shortener__short_urls_redirect_lookup (covering index)
+    stmt = select(
+        ShortUrl.id, ShortUrl.original_url, ShortUrl.is_active, ShortUrl.expires_at
+    ).where(ShortUrl.code == code)
+    row = db.execute(stmt).first()
+    return RedirectTarget(*row) if row else None
+
+
+def is_expired(short: ShortUrl | RedirectTarget) -> bool:
+    return has_passed(short.expires_at)
 
-def is_expired(short: ShortUrl) -> bool:
-    if short.expires_at is None:
+
+def has_passed(expires_at: Optional[datetime]) -> bool:
+    if expires_at is None:
         return False
     # Convert now to timezone-aware
     now = datetime.now(timezone.utc)
-    expires_at = short.expires_at
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
     return expires_at <= now
 
 
+def extras_filter(db: Session, key: str, value: str):
+    """
+    WHERE clause for extras[key] == value, written so each dialect can use its
+    index (GIN containment on Postgres, json_extract expression index on SQLite).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return cast(ShortUrl.extras, JSONB).contains({key: value})
+    return func.json_extract(ShortUrl.extras, extras_path(key)) == value
+
+
+def normalize_host(host: str) -> Optional[str]:
+    """
+    Canonical form of a hostname: lowercase, IDNA (punycode) encoded, no
+    trailing dot. Both stored hosts and admin lookups go through this.
+    """
+    host = host.strip().rstrip(".").lower()
+    if not host:
+        return None
+    try:
+        return host.encode("idna").decode("ascii")
+    except UnicodeError:
+        return host
+
+
+def destination_host(url: str) -> Optional[str]:
+    """Normalized host of `url` (no scheme, userinfo or port)."""
+    try:
+        host = urlsplit(url).hostname
+    except ValueError:
+        return None
+    return normalize_host(host) if host else None
+
+
+def client_ip(request: Request) -> str:
+    forwarded_for = request.headers.get("x-forwarded-for")
+    if forwarded_for:
+        return forwarded_for.split(",")[0].strip()
+    return request.client.host if request.client else "unknown"
+
+
 def api_version_prefix() -> str:
     from app.core.config import settings
 
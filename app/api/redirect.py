@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, Path, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Path, Request, status
 from fastapi.responses import RedirectResponse
-from sqlalchemy import select
+from sqlalchemy import update
 from sqlalchemy.orm import Session
 
-from app.api.helpers import is_expired
+from app import click_counter
+from app.api.helpers import (
+    CODE_REGEX,
+    RedirectTarget,
+    client_ip,
+    has_passed,
+    is_expired,
+    load_redirect_target,
+)
+from app.core.config import settings
 from app.database import get_db
+from app.events import LINK_CLICKED, emit_event
+from app.expiry import track_expiry
+from app.hot_links import record_hit
 from app.models import ShortUrl
+from app.redirect_cache import SharedRedirectCache, get_redirect_cache
+from app.singleflight import redirect_lookups
+from app.visitors import record_visit
 
 router = APIRouter(tags=["redirect"])
 
@@ -13,8 +30,6 @@ router = APIRouter(tags=["redirect"])
 # Public redirect endpoint
 # ---------------------------
 
-CODE_REGEX = r"^[A-Za-z0-9]{6,16}$"
-
 
 @router.get(
     "/{code}",
@@ -22,28 +37,86 @@ CODE_REGEX = r"^[A-Za-z0-9]{6,16}$"
     responses={307: {"description": "Temporary redirect to the original URL"}},
 )
 def redirect_to_url(
-    code: str = Path(..., pattern=CODE_REGEX), db: Session = Depends(get_db)
+    request: Request,
+    code: str = Path(..., pattern=CODE_REGEX),
+    db: Session = Depends(get_db),
 ):
     """
     Public redirect:
       - No auth ever required
       - Checks is_active and expires_at
-      - Increments click count
+      - Increments click count (and the unique-visitor sketch when enabled)
+      - Queues a link.clicked event when EVENTS_ENABLED
     """
-    stmt = select(ShortUrl).where(ShortUrl.code == code)
-    short = db.execute(stmt).scalars().first()
+    if settings.HOT_LINKS_ENABLED:
+        record_hit(code)
+
+    cache = get_redirect_cache()
+    cached = cache.get(code) if cache else None
+
+    if cached is not None:
+        original_url, expires_at = cached
+        if has_passed(expires_at):
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Short URL not found",
+            )
 
-    if not short or not short.is_active or is_expired(short):
+        _count_click(db, code, ShortUrl.code == code)
+        _record_visit(code, request)
+        _emit_click(code)
+
+        return RedirectResponse(
+            url=original_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        )
+
+    # one lookup in flight per code; dead codes are remembered briefly
+    target = redirect_lookups.do(code, lambda: _load_and_cache(db, code, cache))
+
+    if not target or not target.is_active or is_expired(target):
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Short URL not found",
         )
 
-    # Increment clicks
-    short.clicks += 1
-    db.add(short)
-    db.commit()
+    _count_click(db, code, ShortUrl.id == target.id)
+    _record_visit(code, request)
+    _emit_click(code)
 
     return RedirectResponse(
-        url=short.original_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        url=target.original_url, status_code=status.HTTP_307_TEMPORARY_REDIRECT
     )
+
+
+def _load_and_cache(
+    db: Session, code: str, cache: Optional[SharedRedirectCache]
+) -> Optional[RedirectTarget]:
+    # the token is taken before the read, so a change committed meanwhile
+    # keeps the (possibly stale) row out of the cache
+    token = cache.fill_token(code) if cache else None
+    target = load_redirect_target(db, code)
+    if cache and target and target.is_active and not is_expired(target):
+        cache.put(code, target.original_url, target.expires_at, token)
+        if settings.EXPIRY_WHEEL_ENABLED:
+            track_expiry(code, target.expires_at)
+    return target
+
+
+def _count_click(db: Session, code: str, where) -> None:
+    if settings.CLICK_SHARDS_ENABLED:
+        # no shared row lock on the link itself (see app/click_counter.py)
+        click_counter.increment(db, code)
+    else:
+        db.execute(update(ShortUrl).where(where).values(clicks=ShortUrl.clicks + 1))
+    db.commit()
+
+
+def _record_visit(code: str, request: Request) -> None:
+    if settings.UNIQUE_VISITORS_ENABLED:
+        user_agent = request.headers.get("user-agent", "")
+        record_visit(code, f"{client_ip(request)}|{user_agent}")
+
+
+def _emit_click(code: str) -> None:
+    if settings.EVENTS_ENABLED:
+        emit_event(LINK_CLICKED, {"code": code})
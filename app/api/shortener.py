@@ -1,25 +1,47 @@
+from datetime import date, datetime, timedelta, timezone
 from typing import Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, defer
 
-from app.api.helpers import generate_code, is_expired
+from app.api.helpers import (
+    client_ip,
+    destination_host,
+    extras_filter,
+    generate_code,
+    is_expired,
+)
+from app.archive import find_archived, restore_link
+from app.click_counter import pending_clicks
 from app.core.config import settings
 from app.database import get_db
 from app.enums import SourceType
-from app.models import ShortUrl
+from app.group_commit import GroupCommitTimeout, add_links, get_writer
+from app.invalidation import evict_local, publish_invalidation
+from app.models import FILTERABLE_EXTRAS_KEYS, ShortUrl
+from app.owner_stats import CLIENT, USER, get_owner_stats, record_active_changes
+from app.quotas import enforce_tenant_quota
 from app.rate_limit import enforce_rate_limit
+from app.responses import FastJSONResponse
 from app.schemas import (
+    BatchStatsRequest,
+    BatchStatsResponse,
+    ClientUrlItem,
+    ClientUrlsResponse,
+    LinkBatchUpdateRequest,
+    LinkBatchUpdateResponse,
     LinkUpdateRequest,
-    MyUrlItem,
     MyUrlsResponse,
+    OwnerSummaryResponse,
     PrivateURLStats,
     PublicURLStats,
     ShortenRequest,
     ShortenResponse,
 )
 from app.security import get_optional_token_payload, get_required_token_payload
+from app.singleflight import redirect_lookups
+from app.visitors import unique_visitors
 
 router = APIRouter(tags=["shortener"])
 
@@ -28,6 +50,7 @@ router = APIRouter(tags=["shortener"])
 def create_short_url(
     data: ShortenRequest,
     request: Request,
+    response: Response,
     db: Session = Depends(get_db),
     token_payload: dict = Depends(get_optional_token_payload),
 ):
@@ -41,13 +64,8 @@ def create_short_url(
     """
     url_str = str(data.url)
 
-    forwarded_for = request.headers.get("x-forwarded-for")
-    client_ip = (
-        forwarded_for.split(",")[0].strip()
-        if forwarded_for
-        else (request.client.host if request.client else "unknown")
-    )
-    enforce_rate_limit(f"{client_ip}:shorten")
+    enforce_rate_limit(f"{client_ip(request)}:shorten")
+    enforce_tenant_quota(token_payload, response)
 
     user_id = token_payload.get("sub") if token_payload else None
     client_id = token_payload.get("client_id") if token_payload else None
@@ -66,19 +84,36 @@ def create_short_url(
         SourceType.ANONYMOUS if not token_payload else SourceType.UNKNOWN
     )
 
-    short = ShortUrl(
-        code=code,
-        original_url=url_str,
-        owner_client_id=owner_client_id,
-        created_by_user_id=user_id,
-        source_type=source_type,
-        expires_at=data.expires_at,
-        extras=data.extras,
-    )
+    values = {
+        "code": code,
+        "original_url": url_str,
+        "destination_host": destination_host(url_str),
+        "owner_client_id": owner_client_id,
+        "created_by_user_id": user_id,
+        "source_type": source_type,
+        "expires_at": data.expires_at,
+        "extras": data.extras,
+    }
 
-    db.add(short)
-    db.commit()
-    db.refresh(short)
+    if settings.GROUP_COMMIT_ENABLED:
+        # committed together with other concurrent creates; hand our pooled
+        # connection back first, the writer needs one (see app/group_commit.py)
+        db.commit()
+        try:
+            short = get_writer().submit(values)
+        except GroupCommitTimeout:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server busy, retry later",
+                headers={"Retry-After": "1"},
+            )
+    else:
+        short = ShortUrl(**values)
+        add_links(db, [short])
+        db.commit()
+        db.refresh(short)
+    # the code may have been probed (and remembered as missing) before it existed
+    redirect_lookups.forget([code])
 
     return ShortenResponse(
         code=short.code,
@@ -90,6 +125,8 @@ def create_short_url(
 @router.get("/stats/{code}", response_model=PublicURLStats | PrivateURLStats)
 def get_stats(
     code: str,
+    visitors_from: Optional[date] = None,
+    visitors_to: Optional[date] = None,
     db: Session = Depends(get_db),
     token_payload: Optional[dict[str, Any]] = Depends(get_optional_token_payload),
 ):
@@ -98,8 +135,13 @@ def get_stats(
     - Anonymous: clicks only
     - Authenticated owner: full stats
     - Authenticated non-owner: public stats
+
+    With UNIQUE_VISITORS_ENABLED, full stats also carry approximate
+    unique_visitors between visitors_from and visitors_to (UTC days,
+    inclusive; default: the last 30 days).
     """
-    stmt = select(ShortUrl).where(ShortUrl.code == code)
+    # extras is only loaded (and JSON-decoded) if the private payload is returned
+    stmt = select(ShortUrl).options(defer(ShortUrl.extras)).where(ShortUrl.code == code)
     short = db.execute(stmt).scalars().first()
 
     if not short or not short.is_active or is_expired(short):
@@ -108,25 +150,65 @@ def get_stats(
             detail="Short URL not found",
         )
 
-    # AUTH DISABLED → full access (standalone mode)
-    if not settings.AUTH_ENABLED:
-        return _private_stats_payload(short)
+    if not _sees_private_stats(short, token_payload):
+        return FastJSONResponse(_public_stats_payload(short))
+
+    payload = _private_stats_payload(short)
+    if settings.CLICK_SHARDS_ENABLED:
+        payload["clicks"] += pending_clicks(db, [short.code]).get(short.code, 0)
+    if settings.UNIQUE_VISITORS_ENABLED:
+        visitors_to = visitors_to or datetime.now(timezone.utc).date()
+        visitors_from = visitors_from or visitors_to - timedelta(days=29)
+        span = (visitors_to - visitors_from).days + 1
+        if span < 1 or span > settings.UNIQUE_VISITORS_MAX_RANGE_DAYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid visitors date range",
+            )
+        payload["unique_visitors"] = unique_visitors(
+            db, short.code, visitors_from, visitors_to
+        )
 
-    # AUTH ENABLED → public vs private split
-    # (if token_payload is None, that is anonymous and, we show only public stats)
-    if token_payload is None:
-        return _public_stats_payload(short)
+    return FastJSONResponse(payload)
 
-    user_id = token_payload.get("sub")
 
-    if short.created_by_user_id:
-        # user-owned link → only owner sees private stats
-        if str(user_id) != str(short.created_by_user_id):
-            return _public_stats_payload(short)
-        return _private_stats_payload(short)
+@router.post("/stats/batch", response_model=BatchStatsResponse)
+def get_stats_batch(
+    payload: BatchStatsRequest,
+    db: Session = Depends(get_db),
+    token_payload: Optional[dict[str, Any]] = Depends(get_optional_token_payload),
+):
+    """
+    Stats for many codes in one query, keyed by code.
+    Same visibility rules as GET /stats/{code}; unknown, inactive or expired
+    codes come back as found=false instead of failing the whole request.
+    """
+    codes = list(dict.fromkeys(payload.codes))
+    if not codes or len(codes) > settings.STATS_BATCH_MAX_CODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {settings.STATS_BATCH_MAX_CODES} codes",
+        )
 
-    # anonymous / service-created links
-    return _public_stats_payload(short)
+    stmt = select(ShortUrl).where(ShortUrl.code.in_(codes))
+    if settings.AUTH_ENABLED and not (token_payload and token_payload.get("sub")):
+        # nothing can be private, so extras is never read
+        stmt = stmt.options(defer(ShortUrl.extras))
+    found = {short.code: short for short in db.execute(stmt).scalars()}
+    pending = pending_clicks(db, codes) if settings.CLICK_SHARDS_ENABLED else {}
+
+    results = {}
+    for code in codes:
+        short = found.get(code)
+        if not short or not short.is_active or is_expired(short):
+            results[code] = {"found": False, "stats": None}
+        else:
+            stats = _stats_payload(short, token_payload)
+            if "clicks" in stats:
+                stats["clicks"] += pending.get(code, 0)
+            results[code] = {"found": True, "stats": stats}
+
+    return FastJSONResponse({"results": results})
 
 
 @router.get("/me/urls", response_model=MyUrlsResponse)
@@ -153,7 +235,8 @@ def list_my_urls(
         )
 
     stmt = select(ShortUrl).where(ShortUrl.created_by_user_id == str(user_id))
-    total = db.execute(select(func.count()).select_from(stmt.subquery())).scalar_one()
+    # maintained aggregate instead of a count(*) over all the user's links
+    total = get_owner_stats(db, USER, str(user_id))["links"]
 
     urls = (
         db.execute(
@@ -165,8 +248,112 @@ def list_my_urls(
         .all()
     )
 
+    # Built straight from DB rows, serialized once (no MyUrlItem round trip)
+    items = [
+        {
+            "code": short.code,
+            "short_url": f"{settings.BASE_URL}/{short.code}",
+            "original_url": short.original_url,
+            "clicks": short.clicks,
+            "created_at": short.created_at,
+            "is_active": short.is_active,
+            "expires_at": short.expires_at,
+        }
+        for short in urls
+    ]
+
+    return FastJSONResponse(
+        {"items": items, "page": page, "page_size": page_size, "total": total}
+    )
+
+
+@router.get("/me/summary", response_model=OwnerSummaryResponse)
+def get_my_summary(
+    db: Session = Depends(get_db),
+    token_payload: dict = Depends(get_required_token_payload),
+):
+    """
+    Link count, active link count and click total of the caller: the user
+    (sub) for user tokens, the client (client_id) for service tokens.
+
+    Read from the per-owner aggregates; clicks include compacted sharded
+    clicks only and are otherwise as of the last reconcile.
+    """
+    user_id = token_payload.get("sub")
+    client_id = token_payload.get("client_id")
+    if user_id:
+        kind, owner_id = USER, str(user_id)
+    elif client_id:
+        kind, owner_id = CLIENT, str(client_id)
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload (missing sub)",
+        )
+
+    return FastJSONResponse(
+        {
+            "owner_kind": kind,
+            "owner_id": owner_id,
+            **get_owner_stats(db, kind, owner_id),
+        }
+    )
+
+
+@router.get("/clients/me/urls", response_model=ClientUrlsResponse)
+def list_client_urls(
+    cursor: Optional[int] = None,
+    limit: int = 20,
+    extra: list[str] = Query(default=[]),
+    db: Session = Depends(get_db),
+    token_payload: dict = Depends(get_required_token_payload),
+):
+    """
+    List URLs owned by the calling service client (JWT 'client_id'), newest first.
+
+    - Keyset pagination: pass the returned next_cursor back as ?cursor=
+    - Filter on indexed extras keys with repeated ?extra=key:value
+    """
+    if limit < 1 or limit > 100 or (cursor is not None and cursor < 1):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid pagination params",
+        )
+
+    client_id = token_payload.get("client_id")
+    if not client_id:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid token payload (missing client_id)",
+        )
+    if token_payload.get("sub"):
+        # user tokens carry a client_id too, but must not see the whole client
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Only service tokens can list client URLs",
+        )
+
+    stmt = select(ShortUrl).where(ShortUrl.owner_client_id == str(client_id))
+
+    for raw in extra:
+        key, sep, value = raw.partition(":")
+        if not sep or key not in FILTERABLE_EXTRAS_KEYS:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unsupported extras filter: {key}",
+            )
+        stmt = stmt.where(extras_filter(db, key, value))
+
+    if cursor is not None:
+        stmt = stmt.where(ShortUrl.id < cursor)
+
+    urls = (
+        db.execute(stmt.order_by(ShortUrl.id.desc()).limit(limit + 1)).scalars().all()
+    )
+    next_cursor = urls[limit - 1].id if len(urls) > limit else None
+
     items = [
-        MyUrlItem(
+        ClientUrlItem(
             code=short.code,
             short_url=f"{settings.BASE_URL}/{short.code}",
             original_url=short.original_url,
@@ -174,11 +361,132 @@ def list_my_urls(
             created_at=short.created_at,
             is_active=short.is_active,
             expires_at=short.expires_at,
+            created_by_user_id=short.created_by_user_id,
+            extras=short.extras,
         )
-        for short in urls
+        for short in urls[:limit]
     ]
 
-    return MyUrlsResponse(items=items, page=page, page_size=page_size, total=total)
+    return ClientUrlsResponse(items=items, limit=limit, next_cursor=next_cursor)
+
+
+# Registered before /links/{code} so "batch" is not taken for a code.
+@router.patch("/links/batch", response_model=LinkBatchUpdateResponse)
+def update_links_batch(
+    payload: LinkBatchUpdateRequest,
+    db: Session = Depends(get_db),
+    token_payload: dict = Depends(get_required_token_payload),
+):
+    """
+    Apply is_active / expires_at to many links with set-based UPDATEs, in
+    chunks of LINK_BATCH_CHUNK_SIZE (one transaction per chunk).
+
+    Select links by explicit `codes` or by `filter`; either way only links
+    created by the caller are touched (same rule as PATCH /links/{code}).
+    """
+    if payload.is_active is None and payload.expires_at is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="No updates provided",
+        )
+    if (payload.codes is None) == (payload.filter is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Provide either codes or filter",
+        )
+    if payload.codes is not None and not (
+        0 < len(payload.codes) <= settings.LINK_BATCH_MAX_CODES
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Provide between 1 and {settings.LINK_BATCH_MAX_CODES} codes",
+        )
+
+    user_id = token_payload.get("sub")
+    if not user_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to modify this link",
+        )
+    user_id = str(user_id)
+
+    chunk_size = settings.LINK_BATCH_CHUNK_SIZE
+    results: dict[str, str] = {}
+
+    def apply(rows) -> None:
+        ids = [row.id for row in rows]
+        if payload.expires_at is not None:
+            db.execute(
+                update(ShortUrl)
+                .where(ShortUrl.id.in_(ids))
+                .values(expires_at=payload.expires_at)
+                .execution_options(synchronize_session=False)
+            )
+        if payload.is_active is not None:
+            # only rows that actually flip move the owners' active counts
+            flipped = db.execute(
+                update(ShortUrl)
+                .where(
+                    ShortUrl.id.in_(ids),
+                    ShortUrl.is_active.is_(not payload.is_active),
+                )
+                .values(is_active=payload.is_active)
+                .returning(ShortUrl.created_by_user_id, ShortUrl.owner_client_id)
+                .execution_options(synchronize_session=False)
+            ).all()
+            record_active_changes(db, flipped, 1 if payload.is_active else -1)
+        codes = [row.code for row in rows]
+        publish_invalidation(db, codes)
+        db.commit()
+        evict_local(codes)
+        for code in codes:
+            results[code] = "updated"
+
+    if payload.codes is not None:
+        codes = list(dict.fromkeys(payload.codes))
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start : start + chunk_size]
+            rows = db.execute(
+                select(ShortUrl.id, ShortUrl.code, ShortUrl.created_by_user_id).where(
+                    ShortUrl.code.in_(chunk)
+                )
+            ).all()
+            owned = [row for row in rows if row.created_by_user_id == user_id]
+            for row in rows:
+                if row.created_by_user_id != user_id:
+                    results[row.code] = "forbidden"
+            if owned:
+                apply(owned)
+            for code in chunk:
+                results.setdefault(code, "not_found")
+    else:
+        flt = payload.filter
+        stmt = select(ShortUrl.id, ShortUrl.code).where(
+            ShortUrl.created_by_user_id == user_id
+        )
+        if flt.owner_client_id is not None:
+            stmt = stmt.where(ShortUrl.owner_client_id == flt.owner_client_id)
+        if flt.created_from is not None:
+            stmt = stmt.where(ShortUrl.created_at >= flt.created_from)
+        if flt.created_to is not None:
+            stmt = stmt.where(ShortUrl.created_at < flt.created_to)
+        if flt.tag is not None:
+            stmt = stmt.where(extras_filter(db, "tag", flt.tag))
+
+        last_id = 0
+        while True:
+            rows = db.execute(
+                stmt.where(ShortUrl.id > last_id)
+                .order_by(ShortUrl.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                break
+            apply(rows)
+            last_id = rows[-1].id
+
+    updated = sum(1 for outcome in results.values() if outcome == "updated")
+    return LinkBatchUpdateResponse(results=results, updated=updated)
 
 
 @router.patch("/links/{code}", response_model=PrivateURLStats)
@@ -197,29 +505,35 @@ def update_link(
     stmt = select(ShortUrl).where(ShortUrl.code == code)
     short = db.execute(stmt).scalars().first()
 
+    if not short and settings.ARCHIVE_LOOKUP_ENABLED:
+        archived = find_archived(db, code)
+        if archived:
+            _require_owner(archived, token_payload)
+            short = restore_link(db, code)
+
     if not short:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Short URL not found",
         )
 
-    user_id = token_payload.get("sub")
-    if not short.created_by_user_id or str(user_id) != str(short.created_by_user_id):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Not allowed to modify this link",
-        )
+    _require_owner(short, token_payload)
 
+    if payload.is_active is not None and payload.is_active != short.is_active:
+        record_active_changes(db, [short], 1 if payload.is_active else -1)
     if payload.is_active is not None:
         short.is_active = payload.is_active
     if payload.expires_at is not None:
         short.expires_at = payload.expires_at
 
     db.add(short)
+    publish_invalidation(db, [code])
     db.commit()
     db.refresh(short)
 
-    return _private_stats_payload(short)
+    evict_local([code])
+
+    return FastJSONResponse(_private_stats_payload(short))
 
 
 @router.delete("/links/{code}", status_code=status.HTTP_204_NO_CONTENT)
@@ -228,8 +542,18 @@ def delete_link(
     db: Session = Depends(get_db),
     token_payload: dict = Depends(get_required_token_payload),
 ):
-    stmt = select(ShortUrl).where(ShortUrl.code == code)
-    short = db.execute(stmt).scalars().first()
+    stmt = select(ShortUrl.id, ShortUrl.created_by_user_id).where(ShortUrl.code == code)
+    short = db.execute(stmt).first()
+
+    if not short and settings.ARCHIVE_LOOKUP_ENABLED:
+        archived = find_archived(db, code)
+        if archived:
+            # already out of the hot table; just make sure it stays inactive
+            _require_owner(archived, token_payload)
+            archived.is_active = False
+            db.add(archived)
+            db.commit()
+            return
 
     if not short:
         raise HTTPException(
@@ -237,6 +561,22 @@ def delete_link(
             detail="Short URL not found",
         )
 
+    _require_owner(short, token_payload)
+
+    deactivated = db.execute(
+        update(ShortUrl)
+        .where(ShortUrl.id == short.id, ShortUrl.is_active.is_(True))
+        .values(is_active=False)
+        .returning(ShortUrl.created_by_user_id, ShortUrl.owner_client_id)
+    ).all()
+    record_active_changes(db, deactivated, -1)
+    publish_invalidation(db, [code])
+    db.commit()
+
+    evict_local([code])
+
+
+def _require_owner(short: Any, token_payload: dict[str, Any]) -> None:
     user_id = token_payload.get("sub")
     if not short.created_by_user_id or str(user_id) != str(short.created_by_user_id):
         raise HTTPException(
@@ -244,9 +584,35 @@ def delete_link(
             detail="Not allowed to modify this link",
         )
 
-    short.is_active = False
-    db.add(short)
-    db.commit()
+
+def _stats_payload(
+    short: ShortUrl, token_payload: Optional[dict[str, Any]]
+) -> dict[str, Any]:
+    if _sees_private_stats(short, token_payload):
+        return _private_stats_payload(short)
+    return _public_stats_payload(short)
+
+
+def _sees_private_stats(
+    short: ShortUrl, token_payload: Optional[dict[str, Any]]
+) -> bool:
+    # AUTH DISABLED → full access (standalone mode)
+    if not settings.AUTH_ENABLED:
+        return True
+
+    # AUTH ENABLED → public vs private split
+    # (if token_payload is None, that is anonymous and, we show only public stats)
+    if token_payload is None:
+        return False
+
+    user_id = token_payload.get("sub")
+
+    if short.created_by_user_id:
+        # user-owned link → only owner sees private stats
+        return str(user_id) == str(short.created_by_user_id)
+
+    # anonymous / service-created links
+    return False
 
 
 def _public_stats_payload(short: ShortUrl) -> dict[str, Any]:
@@ -269,4 +635,5 @@ def _private_stats_payload(short: ShortUrl) -> dict[str, Any]:
         "expires_at": short.expires_at,
         "is_active": short.is_active,
         "extras": short.extras,
+        "unique_visitors": None,
     }
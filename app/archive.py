@@ -0,0 +1,213 @@
+import argparse
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from sqlalchemy import bindparam, delete, insert, or_, select, update
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.core.config import settings
+from app.invalidation import evict_local, publish_invalidation
+from app.models import ArchivedShortUrl, ClickShard, LinkVisitors, ShortUrl
+from app.owner_stats import OwnerDeltas
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Hot/cold tiering
+# ---------------------------
+#
+# Inactive and long-expired links are moved, in batches, from
+# shortener__short_urls to shortener__short_urls_archive (same columns, same
+# ids). Archived links never redirect, so the redirect path never looks there;
+# owner endpoints fall back to the archive when ARCHIVE_LOOKUP_ENABLED is set,
+# and codes stay reserved across both tables (see generate_code). Owner
+# aggregates only cover the hot table, so moves carry their deltas along.
+# Clicks still sitting in click shards are folded into the archived row, and
+# the link's unique-visitor sketches are dropped with it.
+
+_COLUMNS = [
+    "id",
+    "code",
+    "original_url",
+    "destination_host",
+    "owner_client_id",
+    "created_by_user_id",
+    "created_at",
+    "expires_at",
+    "is_active",
+    "source_type",
+    "clicks",
+    "extras",
+]
+
+_OWNER_COLUMNS = ["created_by_user_id", "owner_client_id", "is_active", "clicks"]
+
+_hot = ShortUrl.__table__
+_cold = ArchivedShortUrl.__table__
+_shards = ClickShard.__table__
+
+
+def archive_links(
+    db: Session,
+    expired_before: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+) -> int:
+    """
+    Move inactive links, and links that expired before `expired_before`, to
+    the archive table. One transaction per batch. Returns rows moved.
+    """
+    if expired_before is None:
+        expired_before = datetime.now(timezone.utc) - timedelta(
+            days=settings.ARCHIVE_EXPIRED_AFTER_DAYS
+        )
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+
+    archivable = or_(_hot.c.is_active.is_(False), _hot.c.expires_at < expired_before)
+    candidates = (
+        select(_hot.c.id).where(archivable).order_by(_hot.c.id).limit(batch_size)
+    )
+
+    moved = 0
+    # keyset cursor: each batch resumes the primary-key walk where the last
+    # one stopped instead of rescanning the non-candidates before it
+    last_id = 0
+    while True:
+        ids = db.execute(candidates.where(_hot.c.id > last_id)).scalars().all()
+        if not ids:
+            break
+        last_id = ids[-1]
+
+        # the predicate is checked again at delete time: a link reactivated
+        # since the candidate read stays hot, and only what the delete
+        # actually removed is copied to the archive
+        removed = db.execute(
+            delete(_hot)
+            .where(_hot.c.id.in_(ids), archivable)
+            .returning(*[_hot.c[name] for name in _COLUMNS])
+        ).all()
+        codes = [row.code for row in removed]
+        if removed:
+            now = datetime.now(timezone.utc)
+            db.execute(
+                insert(_cold),
+                [{**row._asdict(), "archived_at": now} for row in removed],
+            )
+            _owner_deltas(removed, -1).apply(db)
+            _fold_per_code_rows(db, codes)
+            publish_invalidation(db, codes)
+        db.commit()
+        evict_local(codes)
+
+        moved += len(removed)
+        metrics.incr("archive.moved", len(removed))
+        if len(ids) < batch_size:
+            break
+
+    return moved
+
+
+def _fold_per_code_rows(db: Session, codes: List[str]) -> None:
+    """
+    Move pending click shards into the archived rows' clicks and drop the
+    visitor sketches of `codes`. Shard clicks were never added to the owner
+    aggregates, so they don't change the owner deltas.
+    """
+    shards = db.execute(
+        delete(_shards)
+        .where(_shards.c.code.in_(codes))
+        .returning(_shards.c.code, _shards.c.clicks)
+    ).all()
+    totals: Dict[str, int] = defaultdict(int)
+    for code, clicks in shards:
+        totals[code] += clicks
+    if totals:
+        db.connection().execute(
+            update(_cold)
+            .where(_cold.c.code == bindparam("b_code"))
+            .values(clicks=_cold.c.clicks + bindparam("b_clicks")),
+            [{"b_code": code, "b_clicks": n} for code, n in totals.items()],
+        )
+    db.execute(delete(LinkVisitors).where(LinkVisitors.code.in_(codes)))
+
+
+def _owner_deltas(rows, sign: int) -> OwnerDeltas:
+    deltas = OwnerDeltas()
+    for row in rows:
+        deltas.add(
+            row.created_by_user_id,
+            row.owner_client_id,
+            links=sign,
+            active=sign * int(row.is_active),
+            clicks=sign * row.clicks,
+        )
+    return deltas
+
+
+def find_archived(db: Session, code: str) -> Optional[ArchivedShortUrl]:
+    stmt = select(ArchivedShortUrl).where(ArchivedShortUrl.code == code)
+    return db.execute(stmt).scalars().first()
+
+
+def restore_link(db: Session, code: str) -> Optional[ShortUrl]:
+    """
+    Move one link back to the hot table (same id, same state). The caller
+    decides whether to reactivate it.
+    """
+    archived_id = db.execute(
+        select(_cold.c.id).where(_cold.c.code == code)
+    ).scalar_one_or_none()
+    if archived_id is None:
+        return None
+
+    db.execute(
+        insert(_hot).from_select(
+            _COLUMNS,
+            select(*[_cold.c[name] for name in _COLUMNS]).where(
+                _cold.c.id == archived_id
+            ),
+        )
+    )
+    restored = db.execute(
+        delete(_cold)
+        .where(_cold.c.id == archived_id)
+        .returning(*[_cold.c[name] for name in _OWNER_COLUMNS])
+    ).all()
+    _owner_deltas(restored, 1).apply(db)
+    db.commit()
+    metrics.incr("archive.restored")
+
+    return db.execute(select(ShortUrl).where(ShortUrl.code == code)).scalars().first()
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive or restore short URLs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="archive inactive and long-expired links")
+    run.add_argument(
+        "--expired-days", type=int, default=settings.ARCHIVE_EXPIRED_AFTER_DAYS
+    )
+    run.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+
+    restore = sub.add_parser("restore", help="move one link back to the hot table")
+    restore.add_argument("code")
+
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        if args.command == "run":
+            cutoff = datetime.now(timezone.utc) - timedelta(days=args.expired_days)
+            moved = archive_links(db, cutoff, args.batch_size)
+            print(f"Archived {moved} links")
+        else:
+            short = restore_link(db, args.code)
+            print(f"Restored {args.code}" if short else f"{args.code} not archived")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import logging
+import threading
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PeriodicTask:
+    """
+    Run `fn` every `interval` seconds on a daemon thread until stopped.
+    Exceptions are logged and the loop keeps going. With `run_on_stop`, `fn`
+    runs one last time on shutdown (e.g. to flush buffers); with `run_on_start`,
+    once on the thread before the first wait (e.g. to load initial state).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: float,
+        fn: Callable[[], None],
+        run_on_stop: bool = False,
+        run_on_start: bool = False,
+    ):
+        self.name = name
+        self.interval = interval
+        self.fn = fn
+        self.run_on_stop = run_on_stop
+        self.run_on_start = run_on_start
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self._thread = None
+        if self.run_on_stop:
+            self._run_once()
+
+    def _run(self) -> None:
+        if self.run_on_start:
+            self._run_once()
+        while not self._stop.wait(self.interval):
+            self._run_once()
+
+    def _run_once(self) -> None:
+        try:
+            self.fn()
+        except Exception:
+            logger.exception("Background task %s failed", self.name)
+
+
+# Started/stopped by the app lifespan (see app/main.py)
+_services: List = []
+
+
+def register_service(service) -> None:
+    """
+    Register anything with start()/stop() to run for the app's lifetime.
+    """
+    _services.append(service)
+
+
+def start_services() -> None:
+    for service in _services:
+        service.start()
+
+
+def stop_services() -> None:
+    for service in reversed(_services):
+        service.stop()
+    _services.clear()
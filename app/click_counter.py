@@ -0,0 +1,99 @@
+import random
+from collections import defaultdict
+from typing import Dict, List
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.core.config import settings
+from app.models import ClickShard, ShortUrl
+from app.owner_stats import OwnerDeltas
+
+# ---------------------------
+# Sharded click counters
+# ---------------------------
+#
+# `clicks = clicks + 1` on shortener__short_urls makes every redirect of a
+# viral code wait on the same row lock. In sharded mode a redirect upserts
+# one of CLICK_SHARD_COUNT rows for its code in shortener__click_shards
+# instead (picked at random), so concurrent redirects rarely touch the same
+# row. A background compactor moves the shard totals into ShortUrl.clicks
+# with DELETE ... RETURNING, in the same transaction as the UPDATE, so an
+# increment is either still in a shard or already in clicks, never both.
+# The same transaction adds the clicks to the owners' aggregates.
+
+_OWNER_LOOKUP_CHUNK = 500
+
+_shards = ClickShard.__table__
+
+
+def increment(db: Session, code: str) -> None:
+    """Add one click to a random shard of `code` (caller commits)."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    stmt = insert(_shards).values(
+        code=code, shard=random.randrange(settings.CLICK_SHARD_COUNT), clicks=1
+    )
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[_shards.c.code, _shards.c.shard],
+            set_={"clicks": _shards.c.clicks + 1},
+        )
+    )
+
+
+def pending_clicks(db: Session, codes: List[str]) -> Dict[str, int]:
+    """Clicks still sitting in shards (not yet folded into ShortUrl.clicks)."""
+    stmt = (
+        select(_shards.c.code, func.sum(_shards.c.clicks))
+        .where(_shards.c.code.in_(codes))
+        .group_by(_shards.c.code)
+    )
+    return {code: int(total) for code, total in db.execute(stmt)}
+
+
+def compact_clicks(session_factory) -> int:
+    """
+    Fold every shard into ShortUrl.clicks in one transaction. Returns the
+    number of clicks moved.
+    """
+    with session_factory() as db:
+        rows = db.execute(
+            delete(_shards).returning(_shards.c.code, _shards.c.clicks)
+        ).all()
+        if not rows:
+            return 0
+
+        totals: Dict[str, int] = defaultdict(int)
+        for code, clicks in rows:
+            totals[code] += clicks
+
+        db.connection().execute(
+            update(ShortUrl.__table__)
+            .where(ShortUrl.__table__.c.code == bindparam("b_code"))
+            .values(clicks=ShortUrl.__table__.c.clicks + bindparam("b_clicks")),
+            [{"b_code": code, "b_clicks": n} for code, n in totals.items()],
+        )
+        _add_owner_clicks(db, totals)
+        db.commit()
+
+    moved = sum(totals.values())
+    metrics.incr("clicks.compacted", moved)
+    metrics.observe("clicks.compacted_codes", len(totals))
+    return moved
+
+
+def _add_owner_clicks(db: Session, totals: Dict[str, int]) -> None:
+    deltas = OwnerDeltas()
+    codes = list(totals)
+    for start in range(0, len(codes), _OWNER_LOOKUP_CHUNK):
+        stmt = select(
+            ShortUrl.code, ShortUrl.created_by_user_id, ShortUrl.owner_client_id
+        ).where(ShortUrl.code.in_(codes[start : start + _OWNER_LOOKUP_CHUNK]))
+        for row in db.execute(stmt):
+            deltas.add(
+                row.created_by_user_id, row.owner_client_id, clicks=totals[row.code]
+            )
+    deltas.apply(db)
@@ -0,0 +1,139 @@
+import argparse
+import random
+import threading
+from collections import Counter
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import metrics
+from app.core.config import settings
+from app.models import ArchivedShortUrl, CodeLengthCount, ShortUrl
+
+# ---------------------------
+# Code length vs keyspace occupancy
+# ---------------------------
+#
+# A random code of length L collides with probability occupied(L) / 62^L.
+# generate_code uses the shortest length whose collision probability is
+# below CODE_COLLISION_THRESHOLD. Occupancy per length comes from
+# shortener__code_length_counts, which new links bump in their own
+# transaction (codes stay reserved after archiving, so nothing ever
+# decrements it). Workers read it when they start and every
+# CODE_OCCUPANCY_REFRESH_SECONDS in the background, and count the codes they
+# issue locally in between; the request path never queries it.
+# `python -m app.code_space reconcile` rebuilds it from both tiers.
+
+_SHARDS = 16
+
+_table = CodeLengthCount.__table__
+
+
+def record_codes(db: Session, codes: Iterable[str]) -> None:
+    """Count new codes per length (caller commits)."""
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    for length, count in sorted(Counter(len(code) for code in codes).items()):
+        stmt = insert(_table).values(
+            length=length, shard=random.randrange(_SHARDS), codes=count
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[_table.c.length, _table.c.shard],
+                set_={"codes": _table.c.codes + stmt.excluded.codes},
+            )
+        )
+
+
+def read_counts(db: Session) -> Dict[int, int]:
+    rows = db.execute(
+        select(_table.c.length, func.sum(_table.c.codes)).group_by(_table.c.length)
+    )
+    return {length: int(codes) for length, codes in rows}
+
+
+def reconcile(db: Session) -> Dict[int, int]:
+    """
+    Recount codes per length from both tiers (a full scan of each; run it
+    offline). Writers are held off while it runs. Returns the new counts.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"LOCK TABLE {_table.name} IN EXCLUSIVE MODE"))
+    db.execute(delete(_table))
+
+    counts: Counter = Counter()
+    for model in (ShortUrl, ArchivedShortUrl):
+        length = func.length(model.code)
+        for size, count in db.execute(select(length, func.count()).group_by(length)):
+            counts[size] += count
+    if counts:
+        db.execute(
+            _table.insert(),
+            [
+                {"length": length, "shard": 0, "codes": codes}
+                for length, codes in counts.items()
+            ],
+        )
+    db.commit()
+    return dict(counts)
+
+
+class CodeSpace:
+    def __init__(self, alphabet_size: int):
+        self.alphabet_size = alphabet_size
+        self._lock = threading.Lock()
+        self._occupied: Dict[int, int] = {}
+
+    def seed(self, occupied: Dict[int, int]) -> None:
+        with self._lock:
+            self._occupied = dict(occupied)
+        for length in occupied:
+            metrics.set_gauge(f"codes.occupancy.{length}", self.occupancy(length))
+
+    def refresh(self, session_factory: sessionmaker) -> None:
+        """Re-read the shared counts (background task, see app/main.py)."""
+        with session_factory() as db:
+            self.seed(read_counts(db))
+
+    def occupancy(self, length: int) -> float:
+        """Fraction of the codes of this length already taken."""
+        return self._occupied.get(length, 0) / self.alphabet_size**length
+
+    def length(self) -> int:
+        length = settings.CODE_MIN_LENGTH
+        while (
+            length < settings.CODE_MAX_LENGTH
+            and self.occupancy(length) >= settings.CODE_COLLISION_THRESHOLD
+        ):
+            length += 1
+        metrics.set_gauge("codes.length", length)
+        return length
+
+    def issued(self, length: int) -> None:
+        with self._lock:
+            self._occupied[length] = self._occupied.get(length, 0) + 1
+        metrics.incr("codes.generated")
+        metrics.set_gauge(f"codes.occupancy.{length}", self.occupancy(length))
+
+    def collided(self, length: int) -> None:
+        metrics.incr("codes.collisions")
+        metrics.incr(f"codes.collisions.{length}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Code occupancy maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("reconcile", help="recount codes per length from both tiers")
+    parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        counts = reconcile(db)
+    print(f"Reconciled code counts: {dict(sorted(counts.items()))}")
+
+
+if __name__ == "__main__":
+    main()
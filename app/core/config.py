@@ -5,6 +5,7 @@ from dotenv import load_dotenv
 from pydantic import BaseModel, model_validator
 
 from app import __version__
+from app.core.database_url import DEFAULT_DATABASE_URL
 
 load_dotenv(override=False)
 
@@ -21,10 +22,7 @@ def _split_csv(value: str) -> list[str]:
 
 
 class Settings(BaseModel):
-    DATABASE_URL: str = os.getenv(
-        "DATABASE_URL",
-        "sqlite:///./shortener.db",
-    )
+    DATABASE_URL: str = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
 
     BASE_URL: str = os.getenv("BASE_URL", "http://127.0.0.1:8000")
     FRONTEND_URL: str = os.getenv("FRONTEND_URL", "")
@@ -42,6 +40,23 @@ class Settings(BaseModel):
     JWT_ISSUER: str = os.getenv("JWT_ISSUER", "auth-service")
     JWT_AUDIENCE: list[str] = _split_csv(os.getenv("JWT_AUDIENCE", "shortener-service"))
 
+    # Asymmetric tokens: verify against a JWKS document (file path or URL)
+    # instead of JWT_SECRET_KEY
+    JWT_JWKS_SOURCE: str = os.getenv("JWT_JWKS_SOURCE", "")
+    JWT_JWKS_ALGORITHMS: list[str] = _split_csv(
+        os.getenv("JWT_JWKS_ALGORITHMS", "RS256,ES256")
+    )
+    JWT_JWKS_REFRESH_SECONDS: float = float(
+        os.getenv("JWT_JWKS_REFRESH_SECONDS", "300")
+    )
+    JWT_JWKS_MIN_REFRESH_SECONDS: float = float(
+        os.getenv("JWT_JWKS_MIN_REFRESH_SECONDS", "30")
+    )
+
+    # Who may call /admin endpoints: user tokens by sub, service tokens by client_id
+    ADMIN_USER_IDS: list[str] = _split_csv(os.getenv("ADMIN_USER_IDS", ""))
+    ADMIN_CLIENT_IDS: list[str] = _split_csv(os.getenv("ADMIN_CLIENT_IDS", ""))
+
     CORS_ORIGINS: list[str] = _split_csv(os.getenv("CORS_ORIGINS", ""))
 
     API_VERSION: int = int(os.getenv("API_VERSION", __version__.split(".")[0]))
@@ -51,19 +66,207 @@ class Settings(BaseModel):
     RATE_LIMIT_REQUESTS: int = int(os.getenv("RATE_LIMIT_REQUESTS", "30"))
     RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
 
+    # Per-tenant quotas for POST /shorten (app/quotas.py), comma separated
+    # "user:<sub>" / "client:<client_id>" (or "*" for any other) =
+    # requests/window_seconds:daily_links, 0 = unlimited
+    TENANT_QUOTAS_ENABLED: bool = _str_to_bool(
+        os.getenv("TENANT_QUOTAS_ENABLED", "false"), default=False
+    )
+    TENANT_QUOTAS: str = os.getenv(
+        "TENANT_QUOTAS", "user:*=60/60:1000,client:*=600/60:100000"
+    )
+    TENANT_QUOTA_SYNC_SECONDS: float = float(
+        os.getenv("TENANT_QUOTA_SYNC_SECONDS", "5.0")
+    )
+
+    # Admission control: per-class pools as name=concurrency:max_queue:max_wait_s
+    ADMISSION_ENABLED: bool = _str_to_bool(
+        os.getenv("ADMISSION_ENABLED", "false"), default=False
+    )
+    ADMISSION_POOLS: str = os.getenv(
+        "ADMISSION_POOLS",
+        "redirect=64:256:0.5,shorten=16:64:1.0,api=16:64:1.0,listing=4:16:2.0",
+    )
+    ADMISSION_RETRY_AFTER_SECONDS: int = int(
+        os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "1")
+    )
+
+    # Short code length: shortest length whose collision odds are below threshold
+    CODE_MIN_LENGTH: int = int(os.getenv("CODE_MIN_LENGTH", "6"))
+    CODE_MAX_LENGTH: int = int(os.getenv("CODE_MAX_LENGTH", "16"))
+    CODE_COLLISION_THRESHOLD: float = float(
+        os.getenv("CODE_COLLISION_THRESHOLD", "0.01")
+    )
+    CODE_OCCUPANCY_REFRESH_SECONDS: float = float(
+        os.getenv("CODE_OCCUPANCY_REFRESH_SECONDS", "3600")
+    )
+    CODE_MAX_ATTEMPTS_PER_LENGTH: int = int(
+        os.getenv("CODE_MAX_ATTEMPTS_PER_LENGTH", "3")
+    )
+
+    # Group commit for POST /shorten: one writer thread inserts concurrent
+    # requests' links together (up to N rows or max delay per transaction)
+    GROUP_COMMIT_ENABLED: bool = _str_to_bool(
+        os.getenv("GROUP_COMMIT_ENABLED", "false"), default=False
+    )
+    GROUP_COMMIT_MAX_BATCH: int = int(os.getenv("GROUP_COMMIT_MAX_BATCH", "100"))
+    GROUP_COMMIT_MAX_DELAY_MS: float = float(
+        os.getenv("GROUP_COMMIT_MAX_DELAY_MS", "2.0")
+    )
+    # a request waiting longer than this for its batch gets a 503
+    GROUP_COMMIT_SUBMIT_TIMEOUT_SECONDS: float = float(
+        os.getenv("GROUP_COMMIT_SUBMIT_TIMEOUT_SECONDS", "10.0")
+    )
+
+    # Max codes per POST /stats/batch
+    STATS_BATCH_MAX_CODES: int = int(os.getenv("STATS_BATCH_MAX_CODES", "500"))
+
+    # PATCH /links/batch: max explicit codes, and rows per UPDATE/commit
+    LINK_BATCH_MAX_CODES: int = int(os.getenv("LINK_BATCH_MAX_CODES", "50000"))
+    LINK_BATCH_CHUNK_SIZE: int = int(os.getenv("LINK_BATCH_CHUNK_SIZE", "500"))
+
+    # Hot/cold tiering (python -m app.archive run)
+    ARCHIVE_EXPIRED_AFTER_DAYS: int = int(os.getenv("ARCHIVE_EXPIRED_AFTER_DAYS", "90"))
+    ARCHIVE_BATCH_SIZE: int = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+    ARCHIVE_LOOKUP_ENABLED: bool = _str_to_bool(
+        os.getenv("ARCHIVE_LOOKUP_ENABLED", "false"), default=False
+    )
+
+    # Shared-memory redirect cache (one mmap file per host, shared by workers)
+    REDIRECT_CACHE_ENABLED: bool = _str_to_bool(
+        os.getenv("REDIRECT_CACHE_ENABLED", "false"), default=False
+    )
+    REDIRECT_CACHE_PATH: str = os.getenv("REDIRECT_CACHE_PATH", "")
+    REDIRECT_CACHE_SLOTS: int = int(os.getenv("REDIRECT_CACHE_SLOTS", "262144"))
+    REDIRECT_CACHE_HEAP_BYTES: int = int(
+        os.getenv("REDIRECT_CACHE_HEAP_BYTES", str(64 * 1024 * 1024))
+    )
+    # How long a not-found/inactive/expired lookup is remembered (0 disables)
+    REDIRECT_NEGATIVE_TTL_SECONDS: float = float(
+        os.getenv("REDIRECT_NEGATIVE_TTL_SECONDS", "5.0")
+    )
+
+    # Sharded click counters (folded into clicks by a background compactor)
+    CLICK_SHARDS_ENABLED: bool = _str_to_bool(
+        os.getenv("CLICK_SHARDS_ENABLED", "false"), default=False
+    )
+    CLICK_SHARD_COUNT: int = int(os.getenv("CLICK_SHARD_COUNT", "16"))
+    CLICK_COMPACT_SECONDS: float = float(os.getenv("CLICK_COMPACT_SECONDS", "30.0"))
+
+    # Approximate unique visitors (HyperLogLog sketches per code and day)
+    UNIQUE_VISITORS_ENABLED: bool = _str_to_bool(
+        os.getenv("UNIQUE_VISITORS_ENABLED", "false"), default=False
+    )
+    UNIQUE_VISITORS_FLUSH_SECONDS: float = float(
+        os.getenv("UNIQUE_VISITORS_FLUSH_SECONDS", "10.0")
+    )
+    UNIQUE_VISITORS_MAX_PENDING: int = int(
+        os.getenv("UNIQUE_VISITORS_MAX_PENDING", "10000")
+    )
+    UNIQUE_VISITORS_MAX_RANGE_DAYS: int = int(
+        os.getenv("UNIQUE_VISITORS_MAX_RANGE_DAYS", "366")
+    )
+
+    # Hottest links (Space-Saving per worker, merged for GET /admin/hot)
+    HOT_LINKS_ENABLED: bool = _str_to_bool(
+        os.getenv("HOT_LINKS_ENABLED", "false"), default=False
+    )
+    HOT_LINKS_CAPACITY: int = int(os.getenv("HOT_LINKS_CAPACITY", "1000"))
+    HOT_LINKS_REPORT_SECONDS: float = float(
+        os.getenv("HOT_LINKS_REPORT_SECONDS", "10.0")
+    )
+    # top links kept warm in the shared redirect cache (0 disables)
+    HOT_LINKS_WARM_COUNT: int = int(os.getenv("HOT_LINKS_WARM_COUNT", "100"))
+
+    # Cross-node cache invalidation ("auto" = LISTEN/NOTIFY on Postgres, else polling)
+    INVALIDATION_ENABLED: bool = _str_to_bool(
+        os.getenv("INVALIDATION_ENABLED", "false"), default=False
+    )
+    INVALIDATION_TRANSPORT: str = os.getenv("INVALIDATION_TRANSPORT", "auto")
+    INVALIDATION_CHANNEL: str = os.getenv(
+        "INVALIDATION_CHANNEL", "shortener_invalidations"
+    )
+    INVALIDATION_POLL_INTERVAL_SECONDS: float = float(
+        os.getenv("INVALIDATION_POLL_INTERVAL_SECONDS", "1.0")
+    )
+    INVALIDATION_RETENTION_HOURS: int = int(
+        os.getenv("INVALIDATION_RETENTION_HOURS", "24")
+    )
+    # how long a skipped change version is re-checked (uncommitted vs rolled back)
+    INVALIDATION_GAP_TIMEOUT_SECONDS: float = float(
+        os.getenv("INVALIDATION_GAP_TIMEOUT_SECONDS", "60")
+    )
+
+    # Compiled redirect snapshots for redirect-only edge nodes (app/edge.py)
+    SNAPSHOT_DIR: str = os.getenv("SNAPSHOT_DIR", "./snapshots")
+    SNAPSHOT_POLL_SECONDS: float = float(os.getenv("SNAPSHOT_POLL_SECONDS", "5.0"))
+    # ids re-read below a full build's marks (late commits of lower ids)
+    SNAPSHOT_ID_LOOKBACK: int = int(os.getenv("SNAPSHOT_ID_LOOKBACK", "10000"))
+
+    # Timing wheel evicting cached links when they expire (app/expiry.py);
+    # EXPIRY_DEACTIVATE also sets is_active=False on them in the database
+    EXPIRY_WHEEL_ENABLED: bool = _str_to_bool(
+        os.getenv("EXPIRY_WHEEL_ENABLED", "false"), default=False
+    )
+    EXPIRY_TICK_SECONDS: float = float(os.getenv("EXPIRY_TICK_SECONDS", "1.0"))
+    EXPIRY_DEACTIVATE: bool = _str_to_bool(
+        os.getenv("EXPIRY_DEACTIVATE", "false"), default=False
+    )
+
+    # Outbound link.created / link.clicked events (app/events.py), comma
+    # separated "name:event_type+event_type=url"
+    EVENTS_ENABLED: bool = _str_to_bool(
+        os.getenv("EVENTS_ENABLED", "false"), default=False
+    )
+    EVENT_DESTINATIONS: str = os.getenv("EVENT_DESTINATIONS", "")
+    EVENT_QUEUE_SIZE: int = int(os.getenv("EVENT_QUEUE_SIZE", "10000"))
+    # "drop_new" or "drop_oldest" when the queue is full
+    EVENT_OVERFLOW_POLICY: str = os.getenv("EVENT_OVERFLOW_POLICY", "drop_new")
+    EVENT_BATCH_SIZE: int = int(os.getenv("EVENT_BATCH_SIZE", "100"))
+    EVENT_FLUSH_SECONDS: float = float(os.getenv("EVENT_FLUSH_SECONDS", "1.0"))
+    EVENT_MAX_ATTEMPTS: int = int(os.getenv("EVENT_MAX_ATTEMPTS", "10"))
+    EVENT_RETRY_BASE_SECONDS: float = float(
+        os.getenv("EVENT_RETRY_BASE_SECONDS", "1.0")
+    )
+    EVENT_RETRY_MAX_SECONDS: float = float(os.getenv("EVENT_RETRY_MAX_SECONDS", "600"))
+    EVENT_TIMEOUT_SECONDS: float = float(os.getenv("EVENT_TIMEOUT_SECONDS", "5.0"))
+
     @model_validator(mode="after")
     def _validate_auth_fields(self) -> "Settings":
         """
         Enforce that when AUTH_ENABLED is True, the JWT settings are present.
         """
         if self.AUTH_ENABLED:
-            if not self.JWT_SECRET_KEY:
-                raise ValueError("JWT_SECRET_KEY must be set when AUTH_ENABLED=true")
+            if not self.JWT_SECRET_KEY and not self.JWT_JWKS_SOURCE:
+                raise ValueError(
+                    "JWT_SECRET_KEY or JWT_JWKS_SOURCE must be set when AUTH_ENABLED=true"
+                )
             if not self.JWT_ALGORITHM:
                 raise ValueError("JWT_ALGORITHM must be set when AUTH_ENABLED=true")
             # if not self.OAUTH2_TOKEN_URL:
             #     raise ValueError("OAUTH2_TOKEN_URL must be set when AUTH_ENABLED=true")
         return self
 
+    @model_validator(mode="after")
+    def _validate_code_lengths(self) -> "Settings":
+        """
+        Enforce that code lengths fit the 16-character code columns.
+        """
+        if not 1 <= self.CODE_MIN_LENGTH <= self.CODE_MAX_LENGTH <= 16:
+            raise ValueError(
+                "CODE_MIN_LENGTH and CODE_MAX_LENGTH must satisfy "
+                "1 <= CODE_MIN_LENGTH <= CODE_MAX_LENGTH <= 16"
+            )
+        return self
+
+    @model_validator(mode="after")
+    def _validate_event_overflow_policy(self) -> "Settings":
+        """
+        Reject overflow policies the event dispatcher doesn't know.
+        """
+        if self.EVENT_OVERFLOW_POLICY not in ("drop_new", "drop_oldest"):
+            raise ValueError("EVENT_OVERFLOW_POLICY must be drop_new or drop_oldest")
+        return self
+
 
 settings = Settings()
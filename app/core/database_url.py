@@ -0,0 +1,26 @@
+import os
+
+from dotenv import load_dotenv
+
+# Kept free of pydantic/SQLModel so boot-time tools (app.schema_version) can
+# find the database without importing the app's settings and models.
+
+DEFAULT_DATABASE_URL = "sqlite:///./shortener.db"
+
+
+def resolve_database_url() -> str:
+    """
+    Resolve the DB URL:
+
+    - DATABASE_URL from the environment (or .env), else the local SQLite file.
+    - Normalize postgres:// → postgresql+psycopg:// for SQLAlchemy.
+    """
+    load_dotenv(override=False)
+    db_url = os.getenv("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+    if db_url.startswith("postgres://"):
+        db_url = db_url.replace("postgres://", "postgresql+psycopg://", 1)
+    elif db_url.startswith("postgresql://") and "+psycopg" not in db_url:
+        db_url = db_url.replace("postgresql://", "postgresql+psycopg://", 1)
+
+    return db_url
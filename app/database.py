@@ -1,29 +1,13 @@
-import os
+from typing import Any, Generator, Optional
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import Session, sessionmaker
 from sqlmodel import SQLModel
 
-from app.core.config import settings
+from app import metrics
+from app.core.database_url import resolve_database_url
 
-
-def _get_database_url() -> str:
-    """
-    Resolve the DB URL:
-
-    - Normalize postgres:// → postgresql+psycopg:// for SQLAlchemy.
-    """
-    db_url = os.getenv("DATABASE_URL", settings.DATABASE_URL)
-
-    if db_url.startswith("postgres://"):
-        db_url = db_url.replace("postgres://", "postgresql+psycopg://", 1)
-    elif db_url.startswith("postgresql://") and "+psycopg" not in db_url:
-        db_url = db_url.replace("postgresql://", "postgresql+psycopg://", 1)
-
-    return db_url
-
-
-SQLALCHEMY_DATABASE_URI = _get_database_url()
+SQLALCHEMY_DATABASE_URI = resolve_database_url()
 
 connect_args: dict = {}
 if SQLALCHEMY_DATABASE_URI.startswith("sqlite"):
@@ -41,9 +25,56 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = SQLModel
 
 
-def get_db():
-    db = SessionLocal()
+@event.listens_for(engine, "checkout")
+def _on_pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    metrics.incr("db.pool_checkouts")
+
+
+@event.listens_for(Session, "after_begin")
+def _on_session_begin(session, transaction, connection):
+    # one per connection checkout (a new one after every commit/rollback)
+    session.info["checkouts"] = session.info.get("checkouts", 0) + 1
+
+
+class LazySession:
+    """
+    Stands in for a Session and only creates it on first use, so requests
+    rejected (429) or answered from memory (cached 404s) never build a
+    Session or touch the pool.
+    """
+
+    __slots__ = ("_factory", "_session")
+
+    def __init__(self, factory: sessionmaker):
+        self._factory = factory
+        self._session: Optional[Session] = None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self._factory()
+        return getattr(self._session, name)
+
+    @property
+    def checkouts(self) -> int:
+        if self._session is None:
+            return 0
+        return self._session.info.get("checkouts", 0)
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
+
+
+def lazy_db(factory: sessionmaker) -> Generator[LazySession, None, None]:
+    db = LazySession(factory)
     try:
         yield db
     finally:
         db.close()
+        metrics.observe("db.checkouts_per_request", db.checkouts)
+        if not db.checkouts:
+            metrics.incr("db.requests_without_checkout")
+
+
+def get_db():
+    yield from lazy_db(SessionLocal)
@@ -0,0 +1,81 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, HTTPException, Path, status
+from fastapi.responses import RedirectResponse
+
+from app import __version__, metrics
+from app.api.helpers import CODE_REGEX, has_passed
+from app.background import PeriodicTask
+from app.core.config import settings
+from app.responses import FastJSONResponse
+from app.snapshot import EdgeSnapshots
+
+# ---------------------------
+# Redirect-only edge app
+# ---------------------------
+#
+#     uvicorn app.edge:app
+#
+# Serves GET /{code} from the compiled snapshots in SNAPSHOT_DIR (see
+# app/snapshot.py) without touching the database: no click counting, no
+# management API. Newer snapshot files are picked up every
+# SNAPSHOT_POLL_SECONDS.
+
+snapshots = EdgeSnapshots(settings.SNAPSHOT_DIR)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    snapshots.reload()
+    reloader = PeriodicTask(
+        "snapshot-reload", settings.SNAPSHOT_POLL_SECONDS, snapshots.reload
+    )
+    reloader.start()
+    yield
+    reloader.stop()
+
+
+app = FastAPI(
+    title="URL Shortener Edge",
+    version=__version__,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+
+@app.get("/health", include_in_schema=False)
+def health():
+    current = snapshots.current
+    if current is None:
+        # nothing to serve yet: keep the node out of rotation
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="No snapshot loaded",
+        )
+    built_at = (current.delta or current.full).built_at
+    return {"status": "ok", "snapshot_built_at": built_at.isoformat()}
+
+
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return metrics.snapshot()
+
+
+@app.get(
+    "/{code}",
+    name="redirect_to_url",
+    responses={307: {"description": "Temporary redirect to the original URL"}},
+)
+def redirect_to_url(code: str = Path(..., pattern=CODE_REGEX)):
+    """Same semantics as the main app: inactive or expired links are 404."""
+    target = snapshots.get(code)
+    if target is None or has_passed(target[1]):
+        metrics.incr("snapshot.misses")
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Short URL not found",
+        )
+    metrics.incr("snapshot.hits")
+    return RedirectResponse(
+        url=target[0], status_code=status.HTTP_307_TEMPORARY_REDIRECT
+    )
@@ -0,0 +1,360 @@
+import json
+import logging
+import queue
+import random
+import time
+import urllib.request
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import metrics
+from app.background import PeriodicTask
+from app.core.config import settings
+from app.models import OutboundEvent, ShortUrl
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Outbound events (link created / clicked)
+# ---------------------------
+#
+# link.created rows are written to the outbox (shortener__outbound_events),
+# one per subscribed destination, in the transaction that inserts the link
+# (stage_event, from add_links), so a created link always gets its event.
+# link.clicked is high volume and best effort: the redirect path only calls
+# emit(), which puts the event on a bounded in-process queue and never blocks;
+# when the queue is full the overflow policy drops the new event ("drop_new")
+# or the oldest queued one ("drop_oldest"), and a crash loses what is queued.
+# Every EVENT_FLUSH_SECONDS a background task
+#
+#   1. writes the queued events to the outbox in one transaction;
+#   2. per destination, claims up to EVENT_BATCH_SIZE due rows, POSTs them as
+#      one JSON batch and deletes them on a 2xx; on failure the batch is
+#      retried with exponential backoff (with jitter) and dropped after
+#      EVENT_MAX_ATTEMPTS.
+#
+# Delivery is at least once: receivers should dedupe on the event id.
+
+LINK_CREATED = "link.created"
+LINK_CLICKED = "link.clicked"
+
+DROP_NEW = "drop_new"
+DROP_OLDEST = "drop_oldest"
+OVERFLOW_POLICIES = (DROP_NEW, DROP_OLDEST)
+
+# batches per destination per flush, so one backlog doesn't starve the rest
+_MAX_BATCHES_PER_FLUSH = 10
+
+
+@dataclass(frozen=True)
+class Destination:
+    name: str
+    url: str
+    event_types: FrozenSet[str]
+
+
+def parse_destinations(spec: str) -> Dict[str, Destination]:
+    """
+    "analytics:link.created+link.clicked=https://a.example/hook,crm:link.created=..."
+    -> name:event_type+event_type=url
+    """
+    destinations = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        head, _, url = item.partition("=")
+        name, _, event_types = head.partition(":")
+        destinations[name.strip()] = Destination(
+            name.strip(),
+            url.strip(),
+            frozenset(t.strip() for t in event_types.split("+") if t.strip()),
+        )
+    return destinations
+
+
+def post_json(url: str, body: bytes, timeout: float) -> None:
+    """POST `body`; raises on a connection error or a non-2xx status."""
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}, method="POST"
+    )
+    with urllib.request.urlopen(request, timeout=timeout) as resp:
+        if not 200 <= resp.status < 300:
+            raise RuntimeError(f"HTTP {resp.status}")
+
+
+class EventDispatcher:
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        destinations: Dict[str, Destination],
+        queue_size: int = 10_000,
+        overflow: str = DROP_NEW,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_attempts: int = 10,
+        retry_base: float = 1.0,
+        retry_max: float = 600.0,
+        timeout: float = 5.0,
+        post: Callable[[str, bytes, float], None] = post_json,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown event overflow policy {overflow!r}")
+        self.session_factory = session_factory
+        self.destinations = destinations
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.timeout = timeout
+        self.post = post
+        self._queue: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._subscribed = frozenset().union(
+            *(d.event_types for d in destinations.values())
+        )
+        self._task = PeriodicTask("event-dispatcher", flush_interval, self.flush)
+
+    def start(self) -> None:
+        self._task.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Persist whatever is still queued; delivery resumes on next start."""
+        self._task.stop(timeout)
+        self.persist()
+
+    # ---------------------------
+    # Request path
+    # ---------------------------
+
+    def emit(self, event_type: str, payload: Dict[str, Any]) -> bool:
+        """Queue an event without blocking. Returns False if it was dropped."""
+        if event_type not in self._subscribed:
+            return False
+        event = (event_type, payload, datetime.now(timezone.utc))
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            metrics.incr("events.dropped")
+            if self.overflow != DROP_OLDEST:
+                return False
+            try:
+                self._queue.get_nowait()
+                self._queue.put_nowait(event)
+            except (queue.Empty, queue.Full):
+                return False
+        metrics.incr("events.enqueued")
+        return True
+
+    def stage(
+        self, db: Session, event_type: str, payloads: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Add events straight to the outbox in the caller's transaction (caller
+        commits). Returns the rows added.
+        """
+        now = datetime.now(timezone.utc)
+        rows = self._outbox_rows([(event_type, payload, now) for payload in payloads])
+        db.add_all(rows)
+        metrics.incr("events.staged", len(rows))
+        return len(rows)
+
+    # ---------------------------
+    # Background task
+    # ---------------------------
+
+    def flush(self, now: Optional[datetime] = None) -> None:
+        self.persist()
+        for destination in self.destinations.values():
+            for _ in range(_MAX_BATCHES_PER_FLUSH):
+                if self.deliver(destination, now) < self.batch_size:
+                    break
+
+    def _drain(self) -> List[Tuple[str, Dict[str, Any], datetime]]:
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+    def persist(self) -> int:
+        """Move queued events to the outbox. Returns the rows written."""
+        events = self._drain()
+        metrics.set_gauge("events.queue_depth", self._queue.qsize())
+        rows = self._outbox_rows(events)
+        if not rows:
+            return 0
+        try:
+            with self.session_factory() as db:
+                db.add_all(rows)
+                db.commit()
+        except Exception:
+            logger.exception("Writing %d events to the outbox failed", len(rows))
+            # back on the queue for the next flush, as far as it has room
+            for event in events:
+                try:
+                    self._queue.put_nowait(event)
+                except queue.Full:
+                    metrics.incr("events.dropped")
+            return 0
+        metrics.incr("events.persisted", len(rows))
+        return len(rows)
+
+    def _outbox_rows(
+        self, events: List[Tuple[str, Dict[str, Any], datetime]]
+    ) -> List[OutboundEvent]:
+        """One row per event and subscribed destination."""
+        return [
+            OutboundEvent(
+                destination=destination.name,
+                event_type=event_type,
+                payload=payload,
+                created_at=created_at,
+                next_attempt_at=created_at,
+            )
+            for event_type, payload, created_at in events
+            for destination in self.destinations.values()
+            if event_type in destination.event_types
+        ]
+
+    def _backoff(self, attempts: int) -> float:
+        delay = min(self.retry_max, self.retry_base * 2 ** (attempts - 1))
+        return delay * random.uniform(0.5, 1.0)
+
+    def deliver(self, destination: Destination, now: Optional[datetime] = None) -> int:
+        """
+        Send one batch of due events to `destination`. Returns how many were
+        delivered.
+        """
+        now = now or datetime.now(timezone.utc)
+        with self.session_factory(expire_on_commit=False) as db:
+            stmt = (
+                select(OutboundEvent)
+                .where(
+                    OutboundEvent.destination == destination.name,
+                    OutboundEvent.next_attempt_at <= now,
+                )
+                .order_by(OutboundEvent.id)
+                .limit(self.batch_size)
+            )
+            if db.get_bind().dialect.name == "postgresql":
+                # other workers claim other rows instead of waiting
+                stmt = stmt.with_for_update(skip_locked=True)
+            events = db.execute(stmt).scalars().all()
+            if not events:
+                return 0
+            # claimed until the POST has had time to finish
+            lease = now + timedelta(seconds=2 * self.timeout)
+            for event in events:
+                event.next_attempt_at = lease
+            db.commit()
+
+            body = json.dumps(
+                {
+                    "events": [
+                        {
+                            "id": event.id,
+                            "type": event.event_type,
+                            "created_at": event.created_at.isoformat(),
+                            "payload": event.payload,
+                        }
+                        for event in events
+                    ]
+                }
+            ).encode()
+            started = time.perf_counter()
+            try:
+                self.post(destination.url, body, self.timeout)
+            except Exception as exc:
+                self._retry_later(db, destination, events, now, exc)
+                return 0
+            metrics.observe(
+                f"events.{destination.name}.delivery_ms",
+                (time.perf_counter() - started) * 1000,
+            )
+
+            db.execute(
+                delete(OutboundEvent).where(
+                    OutboundEvent.id.in_([event.id for event in events])
+                )
+            )
+            db.commit()
+        metrics.incr(f"events.{destination.name}.delivered", len(events))
+        return len(events)
+
+    def _retry_later(
+        self, db, destination: Destination, events, now: datetime, exc: Exception
+    ) -> None:
+        metrics.incr(f"events.{destination.name}.failed_batches")
+        error = f"{type(exc).__name__}: {exc}"[:255]
+        dead = []
+        for event in events:
+            event.attempts += 1
+            event.last_error = error
+            if event.attempts >= self.max_attempts:
+                dead.append(event)
+            else:
+                event.next_attempt_at = now + timedelta(
+                    seconds=self._backoff(event.attempts)
+                )
+        for event in dead:
+            db.delete(event)
+        db.commit()
+        if dead:
+            metrics.incr(f"events.{destination.name}.dead_lettered", len(dead))
+            logger.warning(
+                "Dropped %d events for %s after %d attempts: %s",
+                len(dead),
+                destination.name,
+                self.max_attempts,
+                error,
+            )
+
+
+_dispatcher: Optional[EventDispatcher] = None
+
+
+def get_dispatcher() -> EventDispatcher:
+    global _dispatcher
+    if _dispatcher is None:
+        from app.database import SessionLocal
+
+        _dispatcher = EventDispatcher(
+            SessionLocal,
+            parse_destinations(settings.EVENT_DESTINATIONS),
+            queue_size=settings.EVENT_QUEUE_SIZE,
+            overflow=settings.EVENT_OVERFLOW_POLICY,
+            batch_size=settings.EVENT_BATCH_SIZE,
+            flush_interval=settings.EVENT_FLUSH_SECONDS,
+            max_attempts=settings.EVENT_MAX_ATTEMPTS,
+            retry_base=settings.EVENT_RETRY_BASE_SECONDS,
+            retry_max=settings.EVENT_RETRY_MAX_SECONDS,
+            timeout=settings.EVENT_TIMEOUT_SECONDS,
+        )
+    return _dispatcher
+
+
+def emit_event(event_type: str, payload: Dict[str, Any]) -> None:
+    """Call when EVENTS_ENABLED; never blocks the caller."""
+    get_dispatcher().emit(event_type, payload)
+
+
+def stage_event(db: Session, event_type: str, payloads: List[Dict[str, Any]]) -> None:
+    """Call when EVENTS_ENABLED, inside the transaction making the change."""
+    get_dispatcher().stage(db, event_type, payloads)
+
+
+def link_created_payload(short: ShortUrl) -> Dict[str, Any]:
+    return {
+        "code": short.code,
+        "original_url": short.original_url,
+        "owner_client_id": short.owner_client_id,
+        "created_by_user_id": short.created_by_user_id,
+        "source_type": short.source_type,
+        "expires_at": short.expires_at and short.expires_at.isoformat(),
+    }
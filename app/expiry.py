@@ -0,0 +1,206 @@
+import math
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, Hashable, List, Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import metrics
+from app.core.config import settings
+from app.invalidation import evict_local, publish_invalidation, register_evictor
+from app.models import ShortUrl
+from app.owner_stats import record_active_changes
+
+# ---------------------------
+# Expiry scheduling (hierarchical timing wheel)
+# ---------------------------
+#
+# Every link put in a local cache with an expires_at gets a timer; each tick
+# evicts the links that expired since the last one, instead of anything
+# scanning caches for stale entries. Scheduling, cancelling and expiring are
+# O(1); a timer too far out for the lowest wheel sits in a coarser one and is
+# moved down (cascaded) as its deadline approaches, at most once per level.
+#
+# Readers keep their own expires_at check, so a link never redirects past its
+# expiry even between ticks; the wheel is what removes the entry.
+
+
+class TimingWheel:
+    """
+    `levels` wheels of `slots` buckets; a bucket on level n spans
+    slots**n ticks. Timers never fire before their deadline.
+    """
+
+    def __init__(self, tick: float, start: float, slots: int = 64, levels: int = 4):
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        # last tick already processed
+        self._now = int(start // tick)
+        self._wheels: List[List[Dict[Hashable, float]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._where: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Hashable, when: float) -> None:
+        """(Re)schedule `key` to fire at epoch seconds `when`."""
+        self.cancel(key)
+        # already due: fire on the next tick
+        self._place(key, when, earliest=self._now + 1)
+
+    def cancel(self, key: Hashable) -> None:
+        where = self._where.pop(key, None)
+        if where is not None:
+            level, index = where
+            del self._wheels[level][index][key]
+
+    def _place(self, key: Hashable, when: float, earliest: int) -> None:
+        deadline = max(math.ceil(when / self.tick), earliest)
+        delta = deadline - self._now
+        for level in range(self.levels):
+            if delta < self.slots ** (level + 1) or level == self.levels - 1:
+                break
+        index = (deadline // self.slots**level) % self.slots
+        self._wheels[level][index][key] = when
+        self._where[key] = (level, index)
+
+    def advance(self, now: float) -> List[Tuple[Hashable, float]]:
+        """Process every tick up to `now`; returns the fired (key, when)."""
+        target = int(now // self.tick)
+        if not self._where:
+            self._now = max(self._now, target)
+            return []
+
+        fired: List[Tuple[Hashable, float]] = []
+        while self._now < target:
+            self._now += 1
+            tick = self._now
+            for level in range(self.levels - 1, 0, -1):
+                width = self.slots**level
+                if tick % width == 0:
+                    index = (tick // width) % self.slots
+                    bucket = self._wheels[level][index]
+                    self._wheels[level][index] = {}
+                    for key, when in bucket.items():
+                        del self._where[key]
+                        # may land in this tick's level-0 bucket, handled below
+                        self._place(key, when, earliest=tick)
+
+            index = tick % self.slots
+            bucket = self._wheels[0][index]
+            if bucket:
+                self._wheels[0][index] = {}
+                for key, when in bucket.items():
+                    del self._where[key]
+                    fired.append((key, when))
+        return fired
+
+
+class ExpiryScheduler:
+    def __init__(self, tick_seconds: float):
+        self._wheel = TimingWheel(tick_seconds, start=time.time())
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._wheel)
+
+    def track(self, code: str, expires_at: Optional[datetime]) -> None:
+        with self._lock:
+            if expires_at is None:
+                self._wheel.cancel(code)
+                return
+            if expires_at.tzinfo is None:
+                expires_at = expires_at.replace(tzinfo=timezone.utc)
+            self._wheel.schedule(code, expires_at.timestamp())
+
+    def forget(self, codes: List[str]) -> None:
+        with self._lock:
+            for code in codes:
+                self._wheel.cancel(code)
+
+    def tick(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        now: Optional[float] = None,
+    ) -> List[str]:
+        """
+        Evict links whose expiry passed (and deactivate them when
+        EXPIRY_DEACTIVATE is on). Returns the expired codes.
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            fired = self._wheel.advance(now)
+            pending = len(self._wheel)
+
+        metrics.set_gauge("expiry.pending_timers", pending)
+        if not fired:
+            return []
+
+        codes = [code for code, _ in fired]
+        metrics.incr("expiry.expired", len(codes))
+        metrics.observe("expiry.lag_ms", max(now - when for _, when in fired) * 1000)
+        evict_local(codes)
+        if settings.EXPIRY_DEACTIVATE and session_factory is not None:
+            with session_factory() as db:
+                deactivate_expired(db, codes)
+        return codes
+
+
+def deactivate_expired(db: Session, codes: List[str]) -> int:
+    """
+    Set is_active=False on links in `codes` that really have expired (their
+    expiry may have been extended since the timer was set).
+    """
+    now = datetime.now(timezone.utc)
+    chunk_size = settings.LINK_BATCH_CHUNK_SIZE
+    deactivated = 0
+    for start in range(0, len(codes), chunk_size):
+        rows = db.execute(
+            update(ShortUrl)
+            .where(
+                ShortUrl.code.in_(codes[start : start + chunk_size]),
+                ShortUrl.is_active.is_(True),
+                ShortUrl.expires_at <= now,
+            )
+            .values(is_active=False)
+            .returning(
+                ShortUrl.code, ShortUrl.created_by_user_id, ShortUrl.owner_client_id
+            )
+            .execution_options(synchronize_session=False)
+        ).all()
+        record_active_changes(db, rows, -1)
+        publish_invalidation(db, [row.code for row in rows])
+        db.commit()
+        deactivated += len(rows)
+
+    metrics.incr("expiry.deactivated", deactivated)
+    return deactivated
+
+
+_scheduler: Optional[ExpiryScheduler] = None
+
+
+def get_scheduler() -> ExpiryScheduler:
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = ExpiryScheduler(settings.EXPIRY_TICK_SECONDS)
+    return _scheduler
+
+
+def track_expiry(code: str, expires_at: Optional[datetime]) -> None:
+    """Call after caching a link locally (when EXPIRY_WHEEL_ENABLED)."""
+    get_scheduler().track(code, expires_at)
+
+
+def _forget(codes: List[str]) -> None:
+    # changed links get a fresh timer when they are cached again
+    if _scheduler is not None:
+        _scheduler.forget(codes)
+
+
+register_evictor(_forget)
@@ -0,0 +1,201 @@
+import logging
+import queue
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.code_space import record_codes
+from app.core.config import settings
+from app.events import LINK_CREATED, link_created_payload, stage_event
+from app.models import ShortUrl
+from app.owner_stats import OwnerDeltas
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Group commit for new links
+# ---------------------------
+#
+# Every POST /shorten otherwise pays for its own transaction (one fsync per
+# link on SQLite). With GROUP_COMMIT_ENABLED, request threads hand their row
+# to one writer thread and block; the writer takes whatever is queued, waits
+# up to GROUP_COMMIT_MAX_DELAY_MS for more (at most GROUP_COMMIT_MAX_BATCH
+# rows), inserts them in one transaction and wakes every caller. If the batch
+# fails (e.g. a code collision), its rows are retried one transaction each,
+# so only the offending request sees the error.
+#
+# Callers must give back their own pooled connection before submit(): the
+# writer needs one too, and a pool full of requests waiting on the writer
+# would otherwise starve it.
+
+
+def add_links(db: Session, shorts: List[ShortUrl]) -> None:
+    """
+    Add new links, their owner deltas, code counts and link.created events
+    (caller commits).
+    """
+    db.add_all(shorts)
+    record_codes(db, [short.code for short in shorts])
+    if settings.EVENTS_ENABLED:
+        stage_event(db, LINK_CREATED, [link_created_payload(s) for s in shorts])
+    deltas = OwnerDeltas()
+    for short in shorts:
+        deltas.add(
+            short.created_by_user_id,
+            short.owner_client_id,
+            links=1,
+            active=int(short.is_active),
+        )
+    deltas.apply(db)
+
+
+class _Pending:
+    __slots__ = ("values", "done", "result", "error")
+
+    def __init__(self, values: Dict[str, Any]):
+        self.values = values
+        self.done = threading.Event()
+        self.result: Optional[ShortUrl] = None
+        self.error: Optional[BaseException] = None
+
+
+_STOP = object()
+
+
+class GroupCommitTimeout(Exception):
+    """The batch didn't commit in time (the row may still be written)."""
+
+
+class GroupCommitWriter:
+    def __init__(
+        self,
+        session_factory,
+        max_batch: int = 100,
+        max_delay: float = 0.002,
+        submit_timeout: float = 10.0,
+    ):
+        self.session_factory = session_factory
+        self.max_batch = max(1, max_batch)
+        self.max_delay = max_delay
+        self.submit_timeout = submit_timeout
+        self._queue: queue.Queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="group-commit", daemon=True
+                )
+                self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Commit everything already queued, then stop the writer."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, values: Dict[str, Any]) -> ShortUrl:
+        """
+        Queue one ShortUrl (as column values) and block until its batch has
+        committed. Returns the detached row (id set); re-raises its error,
+        or raises GroupCommitTimeout after submit_timeout seconds.
+        """
+        self.start()
+        pending = _Pending(values)
+        self._queue.put(pending)
+        if not pending.done.wait(self.submit_timeout):
+            metrics.incr("group_commit.timeouts")
+            raise GroupCommitTimeout(
+                f"link not committed within {self.submit_timeout}s"
+            )
+        if pending.error is not None:
+            raise pending.error
+        return pending.result
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()
+            if first is _STOP:
+                break
+            batch = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(
+                        timeout=max(0.0, deadline - time.monotonic())
+                    )
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+        # drain whatever raced with stop()
+        leftover = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                leftover.append(item)
+        if leftover:
+            self._commit(leftover)
+
+    def _commit(self, batch: List[_Pending]) -> None:
+        metrics.incr("group_commit.batches")
+        metrics.observe("group_commit.batch_size", len(batch))
+        try:
+            self._insert(batch)
+        except IntegrityError:
+            metrics.incr("group_commit.fallbacks")
+            for pending in batch:
+                try:
+                    self._insert([pending])
+                except Exception as exc:
+                    pending.error = exc
+        except Exception as exc:
+            logger.exception("Group commit of %d links failed", len(batch))
+            for pending in batch:
+                pending.error = exc
+        finally:
+            for pending in batch:
+                pending.done.set()
+
+    def _insert(self, batch: List[_Pending]) -> None:
+        with self.session_factory(expire_on_commit=False) as db:
+            shorts = [ShortUrl(**pending.values) for pending in batch]
+            add_links(db, shorts)
+            db.commit()
+            for short in shorts:
+                db.expunge(short)
+        for pending, short in zip(batch, shorts):
+            pending.result = short
+
+
+_writer: Optional[GroupCommitWriter] = None
+
+
+def get_writer() -> GroupCommitWriter:
+    global _writer
+    if _writer is None:
+        from app.database import SessionLocal
+
+        _writer = GroupCommitWriter(
+            SessionLocal,
+            settings.GROUP_COMMIT_MAX_BATCH,
+            settings.GROUP_COMMIT_MAX_DELAY_MS / 1000,
+            settings.GROUP_COMMIT_SUBMIT_TIMEOUT_SECONDS,
+        )
+    return _writer
@@ -0,0 +1,207 @@
+import heapq
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Tuple
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.api.helpers import has_passed
+from app.core.config import settings
+from app.expiry import track_expiry
+from app.models import HotLinkReport, ShortUrl
+from app.redirect_cache import get_redirect_cache
+
+# ---------------------------
+# Hottest links (Space-Saving heavy hitters)
+# ---------------------------
+#
+# Every redirect request feeds a per-worker Space-Saving summary holding at
+# most HOT_LINKS_CAPACITY counters, whatever the traffic. Each report interval
+# a worker writes its summary for the window to shortener__hot_link_reports
+# (one row per worker) and starts a new window. GET /admin/hot merges the
+# fresh reports into estimated request rates; the same merged top list is used
+# to warm the shared redirect cache.
+
+_WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+class SpaceSaving:
+    """
+    Top-k summary: every code with a true count above N/capacity is tracked,
+    and each count overestimates the truth by at most its `error`.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.total = 0
+        self._counts: Dict[str, List[int]] = {}  # code -> [count, error]
+        # min-heap of (count, code); entries may be stale (count only grows)
+        self._heap: List[Tuple[int, str]] = []
+
+    def add(self, code: str) -> None:
+        self.total += 1
+        entry = self._counts.get(code)
+        if entry is not None:
+            entry[0] += 1
+            return
+
+        if len(self._counts) < self.capacity:
+            self._counts[code] = [1, 0]
+            heapq.heappush(self._heap, (1, code))
+            return
+
+        # replace the current minimum, inheriting its count as error
+        while True:
+            count, victim = heapq.heappop(self._heap)
+            current = self._counts[victim][0]
+            if current == count:
+                break
+            heapq.heappush(self._heap, (current, victim))
+
+        del self._counts[victim]
+        self._counts[code] = [count + 1, count]
+        heapq.heappush(self._heap, (count + 1, code))
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def top(self, limit: int = 0) -> List[Tuple[str, int, int]]:
+        """(code, count, error), highest count first."""
+        items = sorted(
+            ((code, c[0], c[1]) for code, c in self._counts.items()),
+            key=lambda item: item[1],
+            reverse=True,
+        )
+        return items[:limit] if limit else items
+
+
+class HotLinkTracker:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        self._summary = SpaceSaving(capacity)
+        self._window_started = time.monotonic()
+
+    def record(self, code: str) -> None:
+        with self._lock:
+            self._summary.add(code)
+
+    def rotate(self) -> Tuple[SpaceSaving, float]:
+        """Close the current window: returns its summary and length."""
+        with self._lock:
+            summary, self._summary = self._summary, SpaceSaving(self.capacity)
+            now = time.monotonic()
+            window, self._window_started = now - self._window_started, now
+        return summary, window
+
+
+tracker = HotLinkTracker(settings.HOT_LINKS_CAPACITY)
+
+
+def record_hit(code: str) -> None:
+    tracker.record(code)
+
+
+def report_hot_links(session_factory) -> None:
+    """
+    Publish this worker's window, drop reports from workers that went away,
+    and warm the redirect cache with the merged top links.
+    """
+    summary, window = tracker.rotate()
+    entries = summary.top()
+    now = datetime.now(timezone.utc)
+
+    with session_factory() as db:
+        db.merge(
+            HotLinkReport(
+                worker_id=_WORKER_ID,
+                reported_at=now,
+                window_seconds=window,
+                total=summary.total,
+                full=len(summary) >= summary.capacity,
+                entries=[list(item) for item in entries],
+            )
+        )
+        db.execute(
+            delete(HotLinkReport).where(
+                HotLinkReport.reported_at < now - _freshness() * 5
+            )
+        )
+        db.commit()
+        metrics.set_gauge("hot_links.window_requests", summary.total)
+
+        if settings.HOT_LINKS_WARM_COUNT:
+            top = top_hot_links(db, settings.HOT_LINKS_WARM_COUNT)
+            warm_redirect_cache(db, [item["code"] for item in top])
+
+
+def _freshness() -> timedelta:
+    return timedelta(seconds=settings.HOT_LINKS_REPORT_SECONDS * 3)
+
+
+def top_hot_links(db: Session, limit: int) -> List[dict]:
+    """
+    Merge the latest report of every live worker: per-code rates are summed.
+    A code missing from a full report may still have had up to that report's
+    smallest count there, so that is added to its error bound.
+    """
+    cutoff = datetime.now(timezone.utc) - _freshness()
+    reports = db.execute(
+        select(HotLinkReport).where(HotLinkReport.reported_at >= cutoff)
+    ).scalars()
+
+    rates: Dict[str, float] = {}
+    errors: Dict[str, float] = {}
+    per_report = []
+    for report in reports:
+        window = max(report.window_seconds, 1e-3)
+        codes = set()
+        for code, count, error in report.entries:
+            rates[code] = rates.get(code, 0.0) + count / window
+            errors[code] = errors.get(code, 0.0) + error / window
+            codes.add(code)
+        floor = report.entries[-1][1] / window if report.full else 0.0
+        per_report.append((codes, floor))
+
+    items = []
+    for code, rate in rates.items():
+        error = errors[code] + sum(
+            floor for codes, floor in per_report if code not in codes
+        )
+        items.append({"code": code, "rate": rate, "error": error})
+    items.sort(key=lambda item: item["rate"], reverse=True)
+    return items[:limit]
+
+
+def warm_redirect_cache(db: Session, codes: List[str]) -> int:
+    """
+    Load hot codes missing from the shared cache in one query and add them.
+    Returns how many were added.
+    """
+    cache = get_redirect_cache()
+    if cache is None or not codes:
+        return 0
+
+    missing = [code for code in codes if cache.get(code) is None]
+    if not missing:
+        return 0
+    tokens = {code: cache.fill_token(code) for code in missing}
+
+    stmt = select(ShortUrl.code, ShortUrl.original_url, ShortUrl.expires_at).where(
+        ShortUrl.code.in_(missing), ShortUrl.is_active.is_(True)
+    )
+    warmed = 0
+    for row in db.execute(stmt):
+        if not has_passed(row.expires_at):
+            cache.put(row.code, row.original_url, row.expires_at, tokens[row.code])
+            if settings.EXPIRY_WHEEL_ENABLED:
+                track_expiry(row.code, row.expires_at)
+            warmed += 1
+
+    metrics.incr("hot_links.warmed", warmed)
+    return warmed
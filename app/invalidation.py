@@ -0,0 +1,303 @@
+import logging
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import ARRAY, Text, bindparam, delete, func, select, text
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import metrics
+from app.background import PeriodicTask
+from app.core.config import settings
+from app.models import LinkChange
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Cross-node cache invalidation
+# ---------------------------
+#
+# Mutation paths call publish_invalidation() inside their transaction, so the
+# change is only visible to other nodes once it commits. Every node then runs
+# one transport that delivers the codes to evict_local():
+#
+#   - PollingTransport: reads new rows from shortener__link_changes (the row id
+#     is the change version). Works everywhere; staleness <= poll interval.
+#     Ids are handed out at insert but become visible at commit, so a lower id
+#     can show up after a higher one; ids skipped over are re-checked as gaps
+#     until they appear or INVALIDATION_GAP_TIMEOUT_SECONDS passes (a rolled
+#     back insert never fills its gap).
+#   - PostgresNotifyTransport: LISTEN on a channel fed by pg_notify() in the
+#     same transaction; catches up from the change table after reconnects.
+
+_evictors: List[Callable[[List[str]], None]] = []
+
+# open gaps tracked per node; beyond this the oldest are given up
+_MAX_GAPS = 10_000
+
+# NOTIFY payloads must stay under 8000 bytes; leave room for the timestamp
+_MAX_NOTIFY_CODES_BYTES = 7900
+
+
+def register_evictor(fn: Callable[[List[str]], None]) -> None:
+    """
+    Register a local cache to be purged when codes change.
+    """
+    if fn not in _evictors:
+        _evictors.append(fn)
+
+
+def evict_local(codes: Iterable[str]) -> None:
+    codes = list(codes)
+    if not codes:
+        return
+    for fn in _evictors:
+        try:
+            fn(codes)
+        except Exception:
+            logger.exception("Local eviction failed")
+    metrics.incr("invalidation.evicted_codes", len(codes))
+
+
+def publish_invalidation(db: Session, codes: Iterable[str]) -> None:
+    """
+    Record changed codes in the caller's transaction (commit is up to the caller).
+    """
+    codes = list(dict.fromkeys(codes))
+    if not codes or not settings.INVALIDATION_ENABLED:
+        return
+
+    now = datetime.now(timezone.utc)
+    db.add_all([LinkChange(code=code, changed_at=now) for code in codes])
+
+    if _use_notify(db):
+        # one round trip however many codes changed
+        db.execute(
+            text(
+                "SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload"
+            ).bindparams(bindparam("payloads", type_=ARRAY(Text))),
+            {
+                "channel": settings.INVALIDATION_CHANNEL,
+                "payloads": _notify_payloads(codes, now.timestamp()),
+            },
+        )
+
+    metrics.incr("invalidation.published", len(codes))
+
+
+def _notify_payloads(codes: List[str], sent_at: float) -> List[str]:
+    """Pack codes into as few "code,code,...|sent_at" payloads as fit."""
+    payloads = []
+    chunk: List[str] = []
+    size = 0
+    for code in codes:
+        if chunk and size + 1 + len(code) > _MAX_NOTIFY_CODES_BYTES:
+            payloads.append(f"{','.join(chunk)}|{sent_at}")
+            chunk, size = [], 0
+        size += len(code) + (1 if chunk else 0)
+        chunk.append(code)
+    if chunk:
+        payloads.append(f"{','.join(chunk)}|{sent_at}")
+    return payloads
+
+
+def _use_notify(db: Session) -> bool:
+    if db.get_bind().dialect.name != "postgresql":
+        return False
+    return settings.INVALIDATION_TRANSPORT in ("auto", "notify")
+
+
+def _record_lag(changed_at: float) -> None:
+    lag = max(0.0, time.time() - changed_at)
+    metrics.observe("invalidation.lag_seconds", lag)
+    metrics.set_gauge("invalidation.last_lag_seconds", lag)
+
+
+def _as_timestamp(value: datetime) -> float:
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class PollingTransport:
+    """
+    Poll the change-version table and evict everything newer than the last
+    version this node has seen, plus skipped versions that committed since.
+    """
+
+    def __init__(
+        self,
+        session_factory: sessionmaker,
+        interval: float,
+        gap_timeout: float = 60.0,
+    ):
+        self.session_factory = session_factory
+        self.gap_timeout = gap_timeout
+        self.last_version: Optional[int] = None
+        # skipped version -> when it was first seen missing (monotonic)
+        self._gaps: Dict[int, float] = {}
+        self._task = PeriodicTask("invalidation-poller", interval, self.poll)
+
+    def start(self) -> None:
+        if self.last_version is None:
+            with self.session_factory() as db:
+                self.last_version = db.execute(
+                    select(func.coalesce(func.max(LinkChange.id), 0))
+                ).scalar_one()
+        self._task.start()
+
+    def stop(self) -> None:
+        self._task.stop()
+
+    def poll(self, batch_size: int = 1000) -> int:
+        """
+        Evict codes changed since the last seen version. Returns how many.
+        """
+        seen = 0
+        with self.session_factory() as db:
+            if self._gaps:
+                seen += self._poll_gaps(db)
+            while True:
+                rows = db.execute(
+                    select(LinkChange.id, LinkChange.code, LinkChange.changed_at)
+                    .where(LinkChange.id > (self.last_version or 0))
+                    .order_by(LinkChange.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    break
+
+                evict_local(row.code for row in rows)
+                now = time.monotonic()
+                previous = self.last_version or 0
+                for row in rows:
+                    _record_lag(_as_timestamp(row.changed_at))
+                    if self.last_version is not None:
+                        first = max(previous + 1, row.id - _MAX_GAPS)
+                        for version in range(first, row.id):
+                            self._gaps[version] = now
+                    previous = row.id
+                self.last_version = rows[-1].id
+                seen += len(rows)
+
+                if len(rows) < batch_size:
+                    break
+
+        self._expire_gaps()
+        metrics.set_gauge("invalidation.version", self.last_version or 0)
+        metrics.set_gauge("invalidation.open_gaps", len(self._gaps))
+        return seen
+
+    def _poll_gaps(self, db: Session) -> int:
+        """Evict skipped versions that have committed since."""
+        found = 0
+        gaps = sorted(self._gaps)
+        for start in range(0, len(gaps), 500):
+            rows = db.execute(
+                select(LinkChange.id, LinkChange.code, LinkChange.changed_at).where(
+                    LinkChange.id.in_(gaps[start : start + 500])
+                )
+            ).all()
+            if not rows:
+                continue
+            evict_local(row.code for row in rows)
+            for row in rows:
+                _record_lag(_as_timestamp(row.changed_at))
+                del self._gaps[row.id]
+            found += len(rows)
+        metrics.incr("invalidation.gaps_filled", found)
+        return found
+
+    def _expire_gaps(self) -> None:
+        cutoff = time.monotonic() - self.gap_timeout
+        expired = [version for version, since in self._gaps.items() if since < cutoff]
+        overflow = len(self._gaps) - len(expired) - _MAX_GAPS
+        if overflow > 0:
+            expired += sorted(set(self._gaps) - set(expired))[:overflow]
+        for version in expired:
+            del self._gaps[version]
+        if expired:
+            metrics.incr("invalidation.gaps_expired", len(expired))
+
+
+class PostgresNotifyTransport:
+    """
+    LISTEN for invalidations on a dedicated connection. Falls back to the
+    polling transport to catch up on anything missed while disconnected.
+    """
+
+    def __init__(self, dsn: str, catch_up: PollingTransport):
+        self.dsn = dsn
+        self.catch_up = catch_up
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.catch_up.start()
+        # Polling stays on as a slow safety net for dropped notifications.
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="invalidation-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5.0)
+        self._thread = None
+        self.catch_up.stop()
+
+    def _run(self) -> None:
+        import psycopg
+
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{settings.INVALIDATION_CHANNEL}"')
+                    self.catch_up.poll()
+                    while not self._stop.is_set():
+                        for notify in conn.notifies(timeout=1.0):
+                            self._handle(notify.payload)
+            except Exception:
+                logger.exception("Invalidation listener disconnected, retrying")
+                self._stop.wait(1.0)
+
+    def _handle(self, payload: str) -> None:
+        codes, _, sent_at = payload.partition("|")
+        evict_local(codes.split(","))
+        if sent_at:
+            _record_lag(float(sent_at))
+
+
+def build_transport(engine, session_factory: sessionmaker):
+    interval = settings.INVALIDATION_POLL_INTERVAL_SECONDS
+    gap_timeout = settings.INVALIDATION_GAP_TIMEOUT_SECONDS
+
+    if engine.dialect.name == "postgresql" and settings.INVALIDATION_TRANSPORT in (
+        "auto",
+        "notify",
+    ):
+        # NOTIFY delivers in milliseconds; the poller only backs it up.
+        poller = PollingTransport(session_factory, max(interval, 30.0), gap_timeout)
+        dsn = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        return PostgresNotifyTransport(dsn, poller)
+
+    return PollingTransport(session_factory, interval, gap_timeout)
+
+
+def prune_changes(session_factory: sessionmaker) -> int:
+    """
+    Drop change rows older than the retention window (every node has long
+    since seen them).
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        hours=settings.INVALIDATION_RETENTION_HOURS
+    )
+    with session_factory() as db:
+        result = db.execute(delete(LinkChange).where(LinkChange.changed_at < cutoff))
+        db.commit()
+    return result.rowcount or 0
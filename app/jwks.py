@@ -0,0 +1,123 @@
+import json
+import logging
+import threading
+import time
+import urllib.request
+from typing import Dict, Optional
+
+import jwt
+
+from app import metrics
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# JWKS key set (asymmetric JWT verification)
+# ---------------------------
+#
+# Public keys are loaded from a JWKS document (file path or http(s) URL) and
+# cached by kid. A background task refreshes them every
+# JWT_JWKS_REFRESH_SECONDS, so requests never fetch. A token with an unknown
+# kid (the auth service rotated keys) forces one refresh, at most once per
+# JWT_JWKS_MIN_REFRESH_SECONDS, so junk kids can't hammer the JWKS endpoint.
+
+
+class JWKSKeySet:
+    def __init__(
+        self, source: str, min_refresh_interval: float = 30.0, timeout: float = 5.0
+    ):
+        self.source = source
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._lock = threading.Lock()
+        self._last_forced_refresh = float("-inf")
+
+    def _fetch(self) -> dict:
+        if self.source.startswith(("http://", "https://")):
+            with urllib.request.urlopen(self.source, timeout=self.timeout) as resp:
+                return json.load(resp)
+        with open(self.source, encoding="utf-8") as fh:
+            return json.load(fh)
+
+    def refresh(self) -> None:
+        with self._lock:
+            self._refresh_locked()
+
+    def _refresh_locked(self) -> None:
+        document = self._fetch()
+        keys = {}
+        for data in document.get("keys", []):
+            if data.get("use", "sig") != "sig":
+                continue
+            try:
+                key = jwt.PyJWK(data)
+            except jwt.PyJWTError:
+                logger.warning("Skipping unusable JWKS key %s", data.get("kid"))
+                continue
+            keys[key.key_id or ""] = key
+        # swap the whole dict: readers never see a partial key set
+        self._keys = keys
+        metrics.incr("jwks.refreshes")
+        metrics.set_gauge("jwks.keys", len(keys))
+
+    def get_signing_key(self, kid: Optional[str]) -> jwt.PyJWK:
+        key = self._lookup(kid)
+        if key is not None:
+            return key
+
+        metrics.incr("jwks.unknown_kid")
+        self._maybe_refresh()
+        key = self._lookup(kid)
+        if key is None:
+            raise jwt.InvalidKeyError(f"Unknown signing key {kid!r}")
+        return key
+
+    def _lookup(self, kid: Optional[str]) -> Optional[jwt.PyJWK]:
+        keys = self._keys
+        if kid is None:
+            # tokens without kid are only fine while there is a single key
+            return next(iter(keys.values())) if len(keys) == 1 else None
+        return keys.get(kid)
+
+    def _maybe_refresh(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_forced_refresh < self.min_refresh_interval:
+                metrics.incr("jwks.refresh_throttled")
+                return
+            self._last_forced_refresh = now
+            try:
+                self._refresh_locked()
+            except Exception:
+                logger.exception("JWKS refresh from %s failed", self.source)
+
+
+_key_set: Optional[JWKSKeySet] = None
+
+
+def get_key_set() -> Optional[JWKSKeySet]:
+    """
+    Process-wide key set for JWT_JWKS_SOURCE (None when not configured).
+    The first call loads the keys (a failure is logged and retried like an
+    unknown kid).
+    """
+    global _key_set
+    if not settings.JWT_JWKS_SOURCE:
+        return None
+    if _key_set is None or _key_set.source != settings.JWT_JWKS_SOURCE:
+        key_set = JWKSKeySet(
+            settings.JWT_JWKS_SOURCE, settings.JWT_JWKS_MIN_REFRESH_SECONDS
+        )
+        try:
+            key_set.refresh()
+        except Exception:
+            logger.exception("Loading JWKS from %s failed", key_set.source)
+        _key_set = key_set
+    return _key_set
+
+
+def reset_key_set() -> None:
+    global _key_set
+    _key_set = None
@@ -1,16 +1,137 @@
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import RedirectResponse
 
-from app import __version__
+from app import (
+    __version__,
+    admission,
+    click_counter,
+    events,
+    expiry,
+    group_commit,
+    hot_links,
+    invalidation,
+    metrics,
+    quotas,
+    security,
+    visitors,
+)
+from app.api import admin as admin_router
 from app.api import redirect as redirect_router
 from app.api import shortener as shortener_router
-from app.api.helpers import api_version_prefix
+from app.api.helpers import api_version_prefix, code_space
+from app.background import PeriodicTask, register_service, start_services, stop_services
 from app.core.config import settings
+from app.database import SessionLocal, engine
+from app.responses import FastJSONResponse
+
+
+def _register_background_services() -> None:
+    register_service(
+        PeriodicTask(
+            "code-occupancy",
+            settings.CODE_OCCUPANCY_REFRESH_SECONDS,
+            lambda: code_space.refresh(SessionLocal),
+            run_on_start=True,
+        )
+    )
+    if settings.AUTH_ENABLED and settings.JWT_JWKS_SOURCE:
+        from app import jwks
+
+        register_service(
+            PeriodicTask(
+                "jwks-refresh",
+                settings.JWT_JWKS_REFRESH_SECONDS,
+                lambda: jwks.get_key_set().refresh(),
+            )
+        )
+    if settings.INVALIDATION_ENABLED:
+        register_service(invalidation.build_transport(engine, SessionLocal))
+        register_service(
+            PeriodicTask(
+                "invalidation-pruner",
+                3600,
+                lambda: invalidation.prune_changes(SessionLocal),
+            )
+        )
+    if settings.GROUP_COMMIT_ENABLED:
+        register_service(group_commit.get_writer())
+    if settings.CLICK_SHARDS_ENABLED:
+        register_service(
+            PeriodicTask(
+                "click-compactor",
+                settings.CLICK_COMPACT_SECONDS,
+                lambda: click_counter.compact_clicks(SessionLocal),
+                run_on_stop=True,
+            )
+        )
+    if settings.UNIQUE_VISITORS_ENABLED:
+        register_service(
+            PeriodicTask(
+                "visitors-flush",
+                settings.UNIQUE_VISITORS_FLUSH_SECONDS,
+                lambda: visitors.flush_visitors(SessionLocal),
+                run_on_stop=True,
+            )
+        )
+    if settings.EVENTS_ENABLED:
+        register_service(events.get_dispatcher())
+    if settings.TENANT_QUOTAS_ENABLED:
+        register_service(
+            PeriodicTask(
+                "quota-sync",
+                settings.TENANT_QUOTA_SYNC_SECONDS,
+                lambda: quotas.sync_usage(SessionLocal),
+                run_on_stop=True,
+            )
+        )
+    if settings.EXPIRY_WHEEL_ENABLED:
+        register_service(
+            PeriodicTask(
+                "expiry-wheel",
+                settings.EXPIRY_TICK_SECONDS,
+                lambda: expiry.get_scheduler().tick(SessionLocal),
+            )
+        )
+    if settings.HOT_LINKS_ENABLED:
+        register_service(
+            PeriodicTask(
+                "hot-links-report",
+                settings.HOT_LINKS_REPORT_SECONDS,
+                lambda: hot_links.report_hot_links(SessionLocal),
+            )
+        )
+
 
-app = FastAPI(title="URL Shortener Service", version=__version__)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.ADMISSION_ENABLED:
+        # the pools, not the threadpool, are now what bounds concurrency
+        to_thread.current_default_thread_limiter().total_tokens = max(
+            40, admission.threadpool_size()
+        )
+    if settings.AUTH_ENABLED:
+        security.load_auth_stack()
+    _register_background_services()
+    start_services()
+    yield
+    stop_services()
 
 
+app = FastAPI(
+    title="URL Shortener Service",
+    version=__version__,
+    lifespan=lifespan,
+    default_response_class=FastJSONResponse,
+)
+
+
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(admission.AdmissionMiddleware)
+
 if settings.CORS_ORIGINS:
     app.add_middleware(
         CORSMiddleware,
@@ -26,6 +147,11 @@ def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics", include_in_schema=False)
+def get_metrics():
+    return metrics.snapshot()
+
+
 @app.get("/", include_in_schema=False)
 def root():
     if settings.FRONTEND_URL:
@@ -37,4 +163,6 @@ def root():
 # Legacy API kept for backward compatibility while clients migrate to /api/v{major}.
 app.include_router(shortener_router.router, prefix="/api")
 app.include_router(shortener_router.router, prefix=api_version_prefix())
+app.include_router(admin_router.router, prefix="/api")
+app.include_router(admin_router.router, prefix=api_version_prefix())
 app.include_router(redirect_router.router)
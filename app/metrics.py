@@ -0,0 +1,52 @@
+import threading
+from collections import defaultdict
+from typing import Any, Dict
+
+# Simple in-process metrics (per worker). Good enough for /metrics scraping and
+# tests; swap for Prometheus/StatsD later if needed.
+
+_lock = threading.Lock()
+_counters: Dict[str, int] = defaultdict(int)
+_gauges: Dict[str, float] = {}
+_observations: Dict[str, Dict[str, float]] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    with _lock:
+        _counters[name] += value
+
+
+def set_gauge(name: str, value: float) -> None:
+    with _lock:
+        _gauges[name] = value
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Track count / sum / max for a value (latencies, lags, sizes).
+    """
+    with _lock:
+        obs = _observations.get(name)
+        if obs is None:
+            _observations[name] = {"count": 1, "sum": value, "max": value}
+            return
+        obs["count"] += 1
+        obs["sum"] += value
+        if value > obs["max"]:
+            obs["max"] = value
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        return {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "observations": {k: dict(v) for k, v in _observations.items()},
+        }
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _gauges.clear()
+        _observations.clear()
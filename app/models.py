@@ -1,19 +1,78 @@
-from datetime import datetime
-from typing import Any, Dict, Optional
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import JSON, Column, DateTime, func
+from sqlalchemy import (
+    JSON,
+    BigInteger,
+    Column,
+    DateTime,
+    Index,
+    LargeBinary,
+    func,
+    literal_column,
+    text,
+)
 from sqlmodel import Field, SQLModel
 
 from app.enums import SourceType
 
+# extras keys service clients can filter on (GET /clients/me/urls); each one is
+# backed by an index, so adding a key needs a migration.
+FILTERABLE_EXTRAS_KEYS = ("campaign", "tag")
+
+
+def extras_path(key: str):
+    """
+    json_extract() path as an inline literal, so SQLite can match the
+    expression indexes below (a bound parameter would not match).
+    """
+    return literal_column(f"'$.{key}'")
+
 
 class ShortUrl(SQLModel, table=True):
     __tablename__ = "shortener__short_urls"
+    __table_args__ = (
+        # Covering index for the redirect hot path (index-only lookups).
+        # SQLite has no INCLUDE, so it gets a composite index instead (the
+        # integer primary key is the rowid, so it is always covered there).
+        Index(
+            "ix_shortener__short_urls_redirect_lookup",
+            "code",
+            postgresql_include=["id", "original_url", "is_active", "expires_at"],
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_shortener__short_urls_redirect_lookup",
+            "code",
+            "is_active",
+            "expires_at",
+            "original_url",
+        ).ddl_if(dialect="sqlite"),
+        # Keyset pagination of a client's links
+        Index("ix_shortener__short_urls_owner_client_id_id", "owner_client_id", "id"),
+        # Admin lookups / takedowns by destination host (keyset on id)
+        Index("ix_shortener__short_urls_destination_host_id", "destination_host", "id"),
+        # extras filters: JSONB containment on Postgres, json_extract on SQLite
+        Index(
+            "ix_shortener__short_urls_extras_gin",
+            text("(extras::jsonb) jsonb_path_ops"),
+            postgresql_using="gin",
+        ).ddl_if(dialect="postgresql"),
+        *(
+            Index(
+                f"ix_shortener__short_urls_extras_{key}",
+                "owner_client_id",
+                func.json_extract(text("extras"), extras_path(key)),
+            ).ddl_if(dialect="sqlite")
+            for key in FILTERABLE_EXTRAS_KEYS
+        ),
+    )
 
     id: Optional[int] = Field(default=None, primary_key=True)
 
     code: str = Field(index=True, nullable=False, max_length=16, unique=True)
     original_url: str = Field(nullable=False, max_length=2048, index=True)
+    # normalized host of original_url (see app.api.helpers.destination_host)
+    destination_host: Optional[str] = Field(default=None, max_length=255)
 
     # Which app/service created this link
     owner_client_id: str = Field(
@@ -58,3 +117,201 @@ class ShortUrl(SQLModel, table=True):
         default=None,
         sa_column=Column(JSON, nullable=True),
     )
+
+
+class ArchivedShortUrl(SQLModel, table=True):
+    """
+    Cold storage for inactive / long-expired links (see app/archive.py).
+    Same columns as ShortUrl, keeping the original id, plus archived_at.
+    """
+
+    __tablename__ = "shortener__short_urls_archive"
+
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+
+    code: str = Field(index=True, nullable=False, max_length=16, unique=True)
+    original_url: str = Field(nullable=False, max_length=2048)
+    destination_host: Optional[str] = Field(default=None, max_length=255)
+    owner_client_id: str = Field(default="default", nullable=False, max_length=64)
+    created_by_user_id: Optional[str] = Field(
+        default=None,
+        max_length=128,
+        index=True,
+    )
+
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    expires_at: Optional[datetime] = Field(
+        default=None,
+        sa_column=Column(DateTime(timezone=True), nullable=True),
+    )
+    is_active: bool = Field(default=False, nullable=False)
+    source_type: SourceType = Field(default=SourceType.ANONYMOUS, nullable=False)
+    clicks: int = Field(default=0, nullable=False)
+    extras: Optional[Dict[str, Any]] = Field(
+        default=None,
+        sa_column=Column(JSON, nullable=True),
+    )
+
+    archived_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+        )
+    )
+
+
+class LinkChange(SQLModel, table=True):
+    """
+    Append-only change log: one row per mutated code. The autoincrement id is
+    the monotonically increasing change version nodes poll from.
+    """
+
+    __tablename__ = "shortener__link_changes"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    code: str = Field(nullable=False, max_length=16)
+    changed_at: datetime = Field(
+        sa_column=Column(
+            DateTime(timezone=True),
+            server_default=func.now(),
+            nullable=False,
+            index=True,
+        )
+    )
+
+
+class LinkVisitors(SQLModel, table=True):
+    """
+    One HyperLogLog sketch of distinct visitors per code and UTC day (see
+    app/visitors.py). Keyed by code so the redirect path never needs the id.
+    """
+
+    __tablename__ = "shortener__link_visitors"
+
+    code: str = Field(primary_key=True, max_length=16)
+    day: date = Field(primary_key=True)
+    sketch: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+
+
+class HotLinkReport(SQLModel, table=True):
+    """
+    Latest Space-Saving window of each worker (see app/hot_links.py).
+    entries is a list of [code, count, error], highest count first.
+    """
+
+    __tablename__ = "shortener__hot_link_reports"
+
+    worker_id: str = Field(primary_key=True, max_length=128)
+    reported_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False, index=True)
+    )
+    window_seconds: float = Field(nullable=False)
+    total: int = Field(default=0, nullable=False)
+    # the summary was at capacity, so untracked codes may have had hits too
+    full: bool = Field(default=False, nullable=False)
+    entries: List[List[Any]] = Field(
+        default_factory=list, sa_column=Column(JSON, nullable=False)
+    )
+
+
+class ClickShard(SQLModel, table=True):
+    """
+    Clicks not yet folded into ShortUrl.clicks, spread over a few rows per
+    code so concurrent redirects don't contend on one row (see
+    app/click_counter.py).
+    """
+
+    __tablename__ = "shortener__click_shards"
+
+    code: str = Field(primary_key=True, max_length=16)
+    shard: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    clicks: int = Field(default=0, nullable=False)
+
+
+class OwnerStats(SQLModel, table=True):
+    """
+    Per-owner aggregates (app.owner_stats), kept in step with
+    shortener__short_urls so totals are an O(1) read. Each owner is spread
+    over a few rows so concurrent creates for one owner don't contend.
+    """
+
+    __tablename__ = "shortener__owner_stats"
+
+    # "user" (created_by_user_id) or "client" (owner_client_id)
+    owner_kind: str = Field(primary_key=True, max_length=8)
+    owner_id: str = Field(primary_key=True, max_length=128)
+    shard: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    links: int = Field(default=0, nullable=False)
+    active_links: int = Field(default=0, nullable=False)
+    clicks: int = Field(default=0, nullable=False)
+
+
+class TenantUsage(SQLModel, table=True):
+    """
+    Quota usage per tenant and window, summed over workers (see
+    app/quotas.py). Workers count locally and add their deltas here.
+    """
+
+    __tablename__ = "shortener__tenant_usage"
+
+    # "user" (sub) or "client" (client_id)
+    owner_kind: str = Field(primary_key=True, max_length=8)
+    owner_id: str = Field(primary_key=True, max_length=128)
+    # "rate" (requests per window) or "day" (links created per UTC day)
+    period: str = Field(primary_key=True, max_length=8)
+    # epoch seconds the window starts at
+    window_start: int = Field(
+        primary_key=True,
+        index=True,
+        sa_type=BigInteger,
+        sa_column_kwargs={"autoincrement": False},
+    )
+    used: int = Field(default=0, nullable=False)
+
+
+class OutboundEvent(SQLModel, table=True):
+    """
+    Outbox of events waiting to be pushed to a destination (see
+    app/events.py). Rows are deleted once delivered or given up on.
+    """
+
+    __tablename__ = "shortener__outbound_events"
+    __table_args__ = (
+        # next due batch per destination
+        Index(
+            "ix_shortener__outbound_events_destination_next_attempt_at",
+            "destination",
+            "next_attempt_at",
+        ),
+    )
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    destination: str = Field(nullable=False, max_length=64)
+    event_type: str = Field(nullable=False, max_length=32)
+    payload: Dict[str, Any] = Field(
+        default_factory=dict, sa_column=Column(JSON, nullable=False)
+    )
+    created_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    attempts: int = Field(default=0, nullable=False)
+    next_attempt_at: datetime = Field(
+        sa_column=Column(DateTime(timezone=True), nullable=False)
+    )
+    last_error: Optional[str] = Field(default=None, max_length=255)
+
+
+class CodeLengthCount(SQLModel, table=True):
+    """
+    Codes issued per length over both tiers (see app/code_space.py), spread
+    over a few rows per length so concurrent inserts don't contend.
+    """
+
+    __tablename__ = "shortener__code_length_counts"
+
+    length: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    shard: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    codes: int = Field(default=0, nullable=False)
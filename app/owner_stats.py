@@ -0,0 +1,202 @@
+import argparse
+import random
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import case, delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.models import OwnerStats, ShortUrl
+
+# ---------------------------
+# Per-owner aggregates
+# ---------------------------
+#
+# A few rows per owner (a user = created_by_user_id, or a client =
+# owner_client_id) with link count, active link count and click sum, so
+# /me/urls totals and /me/summary are a primary-key range sum instead of a
+# count(*). Each write lands on a random shard row: a busy owner (all
+# anonymous creates share one client) would otherwise serialize every create
+# on a single row. Writers add deltas in the same transaction as the change itself:
+# create, activate/deactivate, archive/restore, and the sharded-click
+# compactor. Everything else (direct SQL, per-redirect clicks when click
+# shards are off) is picked up by `python -m app.owner_stats reconcile`.
+#
+# "active" follows the is_active flag; links that merely expired still count.
+
+USER = "user"
+CLIENT = "client"
+
+_SHARDS = 16
+
+_table = OwnerStats.__table__
+
+
+class OwnerDeltas:
+    """Accumulate (links, active_links, clicks) changes per owner, then apply."""
+
+    def __init__(self):
+        self._deltas: Dict[Tuple[str, str], List[int]] = defaultdict(lambda: [0, 0, 0])
+
+    def add(
+        self,
+        user_id: Optional[str],
+        client_id: Optional[str],
+        links: int = 0,
+        active: int = 0,
+        clicks: int = 0,
+    ) -> None:
+        for key in _owner_keys(user_id, client_id):
+            delta = self._deltas[key]
+            delta[0] += links
+            delta[1] += active
+            delta[2] += clicks
+
+    def apply(self, db: Session) -> None:
+        """Upsert every non-zero delta (the caller commits)."""
+        insert = (
+            pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+        )
+        # fixed order, so concurrent writers lock owner rows in the same order
+        for (kind, owner_id), (links, active, clicks) in sorted(self._deltas.items()):
+            if not (links or active or clicks):
+                continue
+            stmt = insert(_table).values(
+                owner_kind=kind,
+                owner_id=owner_id,
+                shard=random.randrange(_SHARDS),
+                links=links,
+                active_links=active,
+                clicks=clicks,
+            )
+            db.execute(
+                stmt.on_conflict_do_update(
+                    index_elements=[
+                        _table.c.owner_kind,
+                        _table.c.owner_id,
+                        _table.c.shard,
+                    ],
+                    set_={
+                        "links": _table.c.links + stmt.excluded.links,
+                        "active_links": _table.c.active_links
+                        + stmt.excluded.active_links,
+                        "clicks": _table.c.clicks + stmt.excluded.clicks,
+                    },
+                )
+            )
+        self._deltas.clear()
+
+
+def _owner_keys(user_id: Optional[str], client_id: Optional[str]):
+    if user_id:
+        yield USER, str(user_id)
+    if client_id:
+        yield CLIENT, str(client_id)
+
+
+def record_active_changes(db: Session, rows: Iterable, active: int) -> None:
+    """
+    rows: (created_by_user_id, owner_client_id) of links whose is_active just
+    flipped (e.g. from UPDATE ... RETURNING); active is +1 or -1.
+    """
+    deltas = OwnerDeltas()
+    for row in rows:
+        deltas.add(row.created_by_user_id, row.owner_client_id, active=active)
+    deltas.apply(db)
+
+
+def get_owner_stats(db: Session, kind: str, owner_id: str) -> Dict[str, int]:
+    row = db.execute(
+        select(
+            func.coalesce(func.sum(_table.c.links), 0).label("links"),
+            func.coalesce(func.sum(_table.c.active_links), 0).label("active_links"),
+            func.coalesce(func.sum(_table.c.clicks), 0).label("clicks"),
+        ).where(_table.c.owner_kind == kind, _table.c.owner_id == owner_id)
+    ).one()
+    return {
+        "links": int(row.links),
+        "active_links": int(row.active_links),
+        "clicks": int(row.clicks),
+    }
+
+
+def reconcile(db: Session) -> int:
+    """
+    Recompute every aggregate from shortener__short_urls. Writers are held
+    off while it runs, so no delta is lost or double counted. Returns how
+    many owners had drifted.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text(f"LOCK TABLE {_table.name} IN EXCLUSIVE MODE"))
+    before = {
+        (kind, owner_id): (int(links), int(active_links), int(clicks))
+        for kind, owner_id, links, active_links, clicks in db.execute(
+            select(
+                _table.c.owner_kind,
+                _table.c.owner_id,
+                func.sum(_table.c.links),
+                func.sum(_table.c.active_links),
+                func.sum(_table.c.clicks),
+            ).group_by(_table.c.owner_kind, _table.c.owner_id)
+        )
+    }
+    # on SQLite the first write takes the database write lock
+    db.execute(delete(_table))
+
+    active = func.sum(case((ShortUrl.is_active.is_(True), 1), else_=0))
+    clicks = func.coalesce(func.sum(ShortUrl.clicks), 0)
+    after = {}
+    for kind, column in (
+        (USER, ShortUrl.created_by_user_id),
+        (CLIENT, ShortUrl.owner_client_id),
+    ):
+        stmt = (
+            select(column, func.count(), active, clicks)
+            .where(column.is_not(None))
+            .group_by(column)
+        )
+        for owner_id, links, active_links, click_sum in db.execute(stmt):
+            after[(kind, owner_id)] = (links, active_links, click_sum)
+
+    if after:
+        db.execute(
+            _table.insert(),
+            [
+                {
+                    "owner_kind": kind,
+                    "owner_id": owner_id,
+                    "shard": 0,
+                    "links": links,
+                    "active_links": active_links,
+                    "clicks": click_sum,
+                }
+                for (kind, owner_id), (links, active_links, click_sum) in after.items()
+            ],
+        )
+    db.commit()
+
+    drifted = sum(
+        1 for key in before.keys() | after.keys() if before.get(key) != after.get(key)
+    )
+    metrics.incr("owner_stats.drift_repaired", drifted)
+    return drifted
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Per-owner aggregate maintenance")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("reconcile", help="recompute aggregates from the links table")
+    parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        drifted = reconcile(db)
+    print(f"Reconciled owner aggregates ({drifted} owners corrected)")
+
+
+if __name__ == "__main__":
+    main()
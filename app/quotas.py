@@ -0,0 +1,285 @@
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, sessionmaker
+
+from app import metrics
+from app.core.config import settings
+from app.models import TenantUsage
+from app.owner_stats import CLIENT, USER
+
+# ---------------------------
+# Per-tenant quotas
+# ---------------------------
+#
+# POST /shorten is limited per tenant (a user = token sub, a client = token
+# client_id): requests per fixed window plus links created per UTC day. Each
+# worker counts in memory and checks against its own count plus the totals it
+# last read from shortener__tenant_usage, so a request never waits on the
+# database. Every TENANT_QUOTA_SYNC_SECONDS a worker adds its counts to the
+# shared rows and reads the totals back; between syncs the workers together
+# can overshoot a quota by what they admit in one sync interval.
+
+RATE = "rate"
+DAY = "day"
+
+_DAY_SECONDS = 86_400
+_PRUNE_INTERVAL_SECONDS = 3600
+
+_table = TenantUsage.__table__
+
+# (owner_kind, owner_id, period, window_start)
+UsageKey = Tuple[str, str, str, int]
+
+
+@dataclass(frozen=True)
+class Quota:
+    requests: int
+    window_seconds: int
+    # links per UTC day; 0 = unlimited
+    daily_links: int = 0
+
+
+@dataclass(frozen=True)
+class QuotaState:
+    limit: int
+    remaining: int
+    reset_seconds: int
+
+
+def parse_quotas(spec: str) -> Dict[Tuple[str, str], Quota]:
+    """
+    "user:*=60/60:1000,client:acme=600/60:0" ->
+    kind:id=requests/window_seconds:daily_links ("*" = any other id of that kind)
+    """
+    quotas = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        tenant, _, values = item.rpartition("=")
+        kind, _, owner_id = tenant.partition(":")
+        rate, _, daily = values.partition(":")
+        requests, _, window = rate.partition("/")
+        quotas[(kind.strip(), owner_id.strip())] = Quota(
+            int(requests), int(window), int(daily or 0)
+        )
+    return quotas
+
+
+def tenants_for(token_payload: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """
+    A user token (sub set) is charged to its user only, even if it also
+    names a client_id; the client tenant is for service tokens (no sub).
+    Anonymous callers have no tenant (the per-IP limit still applies).
+    """
+    if not token_payload:
+        return []
+    if token_payload.get("sub"):
+        return [(USER, str(token_payload["sub"]))]
+    if token_payload.get("client_id"):
+        return [(CLIENT, str(token_payload["client_id"]))]
+    return []
+
+
+class QuotaTracker:
+    def __init__(self, quotas: Dict[Tuple[str, str], Quota]):
+        self.quotas = quotas
+        self._lock = threading.Lock()
+        # admitted here since the last sync
+        self._local: Dict[UsageKey, int] = defaultdict(int)
+        # all workers' totals as of the last sync
+        self._shared: Dict[UsageKey, int] = {}
+        self._last_prune = 0.0
+
+    def quota_for(self, kind: str, owner_id: str) -> Optional[Quota]:
+        return self.quotas.get((kind, owner_id)) or self.quotas.get((kind, "*"))
+
+    def _limits(
+        self, tenants: List[Tuple[str, str]], now: float
+    ) -> List[Tuple[UsageKey, int, int]]:
+        """(key, limit, window end) for every limit that applies."""
+        limits = []
+        day_start = int(now // _DAY_SECONDS) * _DAY_SECONDS
+        for kind, owner_id in tenants:
+            quota = self.quota_for(kind, owner_id)
+            if quota is None:
+                continue
+            if quota.requests:
+                window = quota.window_seconds
+                start = int(now // window) * window
+                limits.append(
+                    ((kind, owner_id, RATE, start), quota.requests, start + window)
+                )
+            if quota.daily_links:
+                limits.append(
+                    (
+                        (kind, owner_id, DAY, day_start),
+                        quota.daily_links,
+                        day_start + _DAY_SECONDS,
+                    )
+                )
+        return limits
+
+    def acquire(
+        self, tenants: List[Tuple[str, str]], now: Optional[float] = None
+    ) -> Tuple[bool, Optional[QuotaState]]:
+        """
+        Count one request against every tenant's quotas, unless one of them
+        is used up. Returns (admitted, tightest limit or None).
+        """
+        now = time.time() if now is None else now
+        limits = self._limits(tenants, now)
+        if not limits:
+            return True, None
+
+        with self._lock:
+            tightest = None
+            for key, limit, window_end in limits:
+                used = self._shared.get(key, 0) + self._local.get(key, 0)
+                state = QuotaState(
+                    limit, max(0, limit - used - 1), max(1, int(window_end - now))
+                )
+                if used >= limit:
+                    return False, QuotaState(limit, 0, state.reset_seconds)
+                if tightest is None or state.remaining < tightest.remaining:
+                    tightest = state
+            for key, _, _ in limits:
+                self._local[key] += 1
+        return True, tightest
+
+    def sync(self, db: Session, now: Optional[float] = None) -> None:
+        """Add local counts to the shared rows and read the totals back."""
+        now = time.time() if now is None else now
+        with self._lock:
+            deltas = dict(self._local)
+            self._local.clear()
+            keys = set(deltas) | set(self._shared)
+
+        try:
+            _add_usage(db, deltas)
+            if now - self._last_prune > _PRUNE_INTERVAL_SECONDS:
+                # older than any window still being enforced
+                db.execute(
+                    delete(TenantUsage).where(
+                        TenantUsage.window_start < now - 2 * _DAY_SECONDS
+                    )
+                )
+                self._last_prune = now
+            db.commit()
+        except Exception:
+            db.rollback()
+            with self._lock:
+                for key, used in deltas.items():
+                    self._local[key] += used
+            raise
+
+        current = [key for key in keys if not self._expired(key, now)]
+        totals = {}
+        for start in range(0, len(current), 500):
+            chunk = current[start : start + 500]
+            rows = db.execute(
+                select(
+                    TenantUsage.owner_kind,
+                    TenantUsage.owner_id,
+                    TenantUsage.period,
+                    TenantUsage.window_start,
+                    TenantUsage.used,
+                ).where(
+                    tuple_(
+                        TenantUsage.owner_kind,
+                        TenantUsage.owner_id,
+                        TenantUsage.period,
+                        TenantUsage.window_start,
+                    ).in_(chunk)
+                )
+            )
+            for kind, owner_id, period, window_start, used in rows:
+                totals[(kind, owner_id, period, window_start)] = used
+        db.commit()
+
+        with self._lock:
+            self._shared = totals
+        metrics.incr("quotas.syncs")
+        metrics.set_gauge("quotas.tracked_windows", len(totals))
+
+    def _expired(self, key: UsageKey, now: float) -> bool:
+        kind, owner_id, period, window_start = key
+        if period == DAY:
+            return window_start + _DAY_SECONDS <= now
+        quota = self.quota_for(kind, owner_id)
+        return quota is None or window_start + quota.window_seconds <= now
+
+
+def _add_usage(db: Session, deltas: Dict[UsageKey, int]) -> None:
+    insert = pg_insert if db.get_bind().dialect.name == "postgresql" else sqlite_insert
+    # fixed order, so concurrent workers lock rows in the same order
+    for (kind, owner_id, period, window_start), used in sorted(deltas.items()):
+        stmt = insert(_table).values(
+            owner_kind=kind,
+            owner_id=owner_id,
+            period=period,
+            window_start=window_start,
+            used=used,
+        )
+        db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[
+                    _table.c.owner_kind,
+                    _table.c.owner_id,
+                    _table.c.period,
+                    _table.c.window_start,
+                ],
+                set_={"used": _table.c.used + stmt.excluded.used},
+            )
+        )
+
+
+_tracker: Optional[QuotaTracker] = None
+
+
+def get_tracker() -> QuotaTracker:
+    global _tracker
+    if _tracker is None:
+        _tracker = QuotaTracker(parse_quotas(settings.TENANT_QUOTAS))
+    return _tracker
+
+
+def sync_usage(session_factory: sessionmaker) -> None:
+    with session_factory() as db:
+        get_tracker().sync(db)
+
+
+def _headers(state: QuotaState) -> Dict[str, str]:
+    return {
+        "RateLimit-Limit": str(state.limit),
+        "RateLimit-Remaining": str(state.remaining),
+        "RateLimit-Reset": str(state.reset_seconds),
+    }
+
+
+def enforce_tenant_quota(
+    token_payload: Optional[Dict[str, Any]], response: Response
+) -> None:
+    """429 with RateLimit-* and Retry-After headers when a quota is used up."""
+    if not settings.TENANT_QUOTAS_ENABLED:
+        return
+
+    admitted, state = get_tracker().acquire(tenants_for(token_payload))
+    if state is None:
+        return
+    if not admitted:
+        metrics.incr("quotas.rejected")
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Tenant quota exceeded",
+            headers={**_headers(state), "Retry-After": str(state.reset_seconds)},
+        )
+    response.headers.update(_headers(state))
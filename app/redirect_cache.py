@@ -0,0 +1,365 @@
+import fcntl
+import hashlib
+import mmap
+import os
+import struct
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+
+from app import metrics
+from app.core.config import settings
+from app.invalidation import register_evictor
+
+# ---------------------------
+# Shared-memory redirect cache
+# ---------------------------
+#
+# One mmap-backed file per host, shared by every worker process.
+#
+# Layout:
+#   header | change counters | slots (open addressing, linear probing)
+#   | string heap (URLs)
+#
+# Reads never lock: every slot carries a sequence counter (seqlock), and the
+# header carries a generation counter that is bumped around a full reset.
+# Writes (fill / invalidate / reset) are serialized with an flock on the file,
+# so there is only ever one writer at a time.
+#
+# A fill can race with a change: the reader loads the old row, the change
+# commits and invalidates (nothing cached yet), then the reader caches the old
+# row for good. So every invalidation bumps a change counter for the code's
+# stripe, readers take fill_token() before reading the database, and put()
+# drops the fill if the counter moved in between.
+
+_MAGIC = b"SURLCACH"
+_VERSION = 2
+
+# magic, version, slot_count, heap_size, generation, heap_used, used_slots
+_HEADER = struct.Struct("<8sIIQQQQ")
+_HEADER_SIZE = 64
+
+# u64 change counters, indexed by code hash
+_CHANGE_STRIPES = 1024
+
+# seq, state, hash, code, url_offset, url_length, expires_at (epoch µs, 0 = none)
+_SLOT = struct.Struct("<IB3xQ16sIIq")
+
+_EMPTY = 0
+_LIVE = 1
+_TOMBSTONE = 2
+
+_MAX_LOAD = 0.7
+_MAX_READ_RETRIES = 4
+
+# Header field offsets
+_GENERATION_OFFSET = 24
+_HEAP_USED_OFFSET = 32  # heap_used, used_slots
+
+
+def _hash_code(code: str) -> int:
+    digest = hashlib.blake2b(code.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little") | 1
+
+
+def _to_micros(value: Optional[datetime]) -> int:
+    if value is None:
+        return 0
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1_000_000)
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    if not value:
+        return None
+    return datetime.fromtimestamp(value / 1_000_000, tz=timezone.utc)
+
+
+class SharedRedirectCache:
+    """
+    code -> (original_url, expires_at) lookup table shared across processes.
+
+    Only active links are stored; callers still check expiry on hit.
+    """
+
+    def __init__(self, path: str, slot_count: int, heap_size: int):
+        self.path = path
+        self.slot_count = slot_count
+        self.heap_size = heap_size
+
+        self._slots_offset = _HEADER_SIZE + _CHANGE_STRIPES * 8
+        self._heap_offset = self._slots_offset + slot_count * _SLOT.size
+        size = self._heap_offset + heap_size
+
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        with self._write_lock():
+            if os.fstat(self._fd).st_size != size or not self._header_matches():
+                os.ftruncate(self._fd, 0)
+                os.ftruncate(self._fd, size)
+                self._mm = mmap.mmap(self._fd, size)
+                _HEADER.pack_into(
+                    self._mm, 0, _MAGIC, _VERSION, slot_count, heap_size, 0, 0, 0
+                )
+            else:
+                self._mm = mmap.mmap(self._fd, size)
+
+    def _header_matches(self) -> bool:
+        raw = os.pread(self._fd, _HEADER.size, 0)
+        if len(raw) < _HEADER.size:
+            return False
+        magic, version, slot_count, heap_size, *_ = _HEADER.unpack(raw)
+        return (
+            magic == _MAGIC
+            and version == _VERSION
+            and slot_count == self.slot_count
+            and heap_size == self.heap_size
+        )
+
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        fcntl.flock(self._fd, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+    # ---------------------------
+    # Reads (lock-free)
+    # ---------------------------
+
+    def _read_u64(self, offset: int) -> int:
+        return struct.unpack_from("<Q", self._mm, offset)[0]
+
+    def _change_offset(self, code_hash: int) -> int:
+        return _HEADER_SIZE + (code_hash % _CHANGE_STRIPES) * 8
+
+    def fill_token(self, code: str) -> int:
+        """Take before reading `code` from the database; pass to put()."""
+        return self._read_u64(self._change_offset(_hash_code(code)))
+
+    def get(self, code: str) -> Optional[Tuple[str, Optional[datetime]]]:
+        for _ in range(_MAX_READ_RETRIES):
+            generation = self._read_u64(_GENERATION_OFFSET)
+            if generation & 1:
+                # reset in progress
+                break
+
+            found, value = self._lookup(code)
+            if self._read_u64(_GENERATION_OFFSET) != generation:
+                continue
+            if found:
+                metrics.incr("redirect_cache.hits")
+                return value
+            break
+
+        metrics.incr("redirect_cache.misses")
+        return None
+
+    def _lookup(
+        self, code: str
+    ) -> Tuple[bool, Optional[Tuple[str, Optional[datetime]]]]:
+        code_hash = _hash_code(code)
+        code_bytes = code.encode()
+        index = code_hash % self.slot_count
+
+        for _ in range(self.slot_count):
+            offset = self._slots_offset + index * _SLOT.size
+            for _ in range(_MAX_READ_RETRIES):
+                seq, state, slot_hash, slot_code, url_off, url_len, expires = (
+                    _SLOT.unpack_from(self._mm, offset)
+                )
+                if seq & 1:
+                    continue
+                if state == _LIVE and slot_hash == code_hash:
+                    start = self._heap_offset + url_off
+                    url = self._mm[start : start + url_len]
+                else:
+                    url = None
+                if struct.unpack_from("<I", self._mm, offset)[0] == seq:
+                    break
+            else:
+                # slot is being rewritten; treat as a miss rather than spin
+                return False, None
+
+            if state == _EMPTY:
+                return False, None
+            if (
+                state == _LIVE
+                and slot_hash == code_hash
+                and slot_code.rstrip(b"\0") == code_bytes
+            ):
+                return True, (url.decode(), _from_micros(expires))
+
+            index = (index + 1) % self.slot_count
+
+        return False, None
+
+    # ---------------------------
+    # Writes (serialized by flock)
+    # ---------------------------
+
+    def _write_slot(self, offset: int, *fields) -> None:
+        seq = struct.unpack_from("<I", self._mm, offset)[0]
+        struct.pack_into("<I", self._mm, offset, seq + 1)
+        _SLOT.pack_into(self._mm, offset, seq + 1, *fields)
+        struct.pack_into("<I", self._mm, offset, seq + 2)
+
+    def _find_slot(self, code_hash: int, code_bytes: bytes) -> Tuple[int, bool]:
+        """
+        Return (offset, exists) for the slot holding `code`, or the first
+        reusable slot on its probe sequence.
+        """
+        index = code_hash % self.slot_count
+        reusable = -1
+        for _ in range(self.slot_count):
+            offset = self._slots_offset + index * _SLOT.size
+            _, state, slot_hash, slot_code, *_ = _SLOT.unpack_from(self._mm, offset)
+            if state == _EMPTY:
+                return (reusable if reusable >= 0 else offset), False
+            if state == _TOMBSTONE and reusable < 0:
+                reusable = offset
+            elif (
+                state == _LIVE
+                and slot_hash == code_hash
+                and slot_code.rstrip(b"\0") == code_bytes
+            ):
+                return offset, True
+            index = (index + 1) % self.slot_count
+        return reusable, False
+
+    def _reset(self) -> None:
+        generation = self._read_u64(_GENERATION_OFFSET)
+        struct.pack_into("<Q", self._mm, _GENERATION_OFFSET, generation + 1)
+        self._mm[self._slots_offset : self._heap_offset] = bytes(
+            self._heap_offset - self._slots_offset
+        )
+        struct.pack_into("<QQ", self._mm, _HEAP_USED_OFFSET, 0, 0)
+        struct.pack_into("<Q", self._mm, _GENERATION_OFFSET, generation + 2)
+        metrics.incr("redirect_cache.resets")
+
+    def put(
+        self,
+        code: str,
+        original_url: str,
+        expires_at: Optional[datetime],
+        token: Optional[int] = None,
+    ) -> None:
+        """
+        Cache `code`, unless it was invalidated since `token` was taken (the
+        value read may be stale then; the next miss reloads it).
+        """
+        code_bytes = code.encode()
+        url_bytes = original_url.encode()
+        if len(code_bytes) > 16 or len(url_bytes) > self.heap_size:
+            return
+
+        code_hash = _hash_code(code)
+        with self._write_lock():
+            if (
+                token is not None
+                and self._read_u64(self._change_offset(code_hash)) != token
+            ):
+                metrics.incr("redirect_cache.stale_fills")
+                return
+
+            heap_used, used_slots = struct.unpack_from(
+                "<QQ", self._mm, _HEAP_USED_OFFSET
+            )
+            if (
+                heap_used + len(url_bytes) > self.heap_size
+                or used_slots + 1 > self.slot_count * _MAX_LOAD
+            ):
+                self._reset()
+                heap_used, used_slots = 0, 0
+
+            offset, exists = self._find_slot(code_hash, code_bytes)
+            if offset < 0:
+                return
+
+            self._mm[
+                self._heap_offset
+                + heap_used : self._heap_offset
+                + heap_used
+                + len(url_bytes)
+            ] = url_bytes
+            self._write_slot(
+                offset,
+                _LIVE,
+                code_hash,
+                code_bytes,
+                heap_used,
+                len(url_bytes),
+                _to_micros(expires_at),
+            )
+            struct.pack_into(
+                "<QQ",
+                self._mm,
+                _HEAP_USED_OFFSET,
+                heap_used + len(url_bytes),
+                used_slots if exists else used_slots + 1,
+            )
+
+    def invalidate(self, code: str) -> None:
+        code_bytes = code.encode()
+        code_hash = _hash_code(code)
+        with self._write_lock():
+            # also when nothing is cached yet: a fill may be in flight
+            change_offset = self._change_offset(code_hash)
+            struct.pack_into(
+                "<Q", self._mm, change_offset, self._read_u64(change_offset) + 1
+            )
+            offset, exists = self._find_slot(code_hash, code_bytes)
+            if exists:
+                self._write_slot(offset, _TOMBSTONE, 0, b"", 0, 0, 0)
+                metrics.incr("redirect_cache.invalidations")
+
+    def clear(self) -> None:
+        with self._write_lock():
+            self._reset()
+
+
+_cache: Optional[SharedRedirectCache] = None
+
+
+def _default_cache_path() -> str:
+    base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(base, "url_shortener_redirects.cache")
+
+
+def get_redirect_cache() -> Optional[SharedRedirectCache]:
+    """
+    Per-process handle to the host-wide cache (None when disabled).
+    """
+    global _cache
+    if not settings.REDIRECT_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        _cache = SharedRedirectCache(
+            settings.REDIRECT_CACHE_PATH or _default_cache_path(),
+            slot_count=settings.REDIRECT_CACHE_SLOTS,
+            heap_size=settings.REDIRECT_CACHE_HEAP_BYTES,
+        )
+    return _cache
+
+
+def reset_redirect_cache() -> None:
+    global _cache
+    if _cache is not None:
+        _cache.close()
+    _cache = None
+
+
+def _evict(codes: List[str]) -> None:
+    cache = get_redirect_cache()
+    if cache:
+        for code in codes:
+            cache.invalidate(code)
+
+
+register_evictor(_evict)
@@ -0,0 +1,41 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+try:  # optional, faster encoder
+    import orjson
+except ImportError:  # pragma: no cover - depends on the environment
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encode plain dicts/lists (datetimes, enums, models allowed) to JSON bytes.
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=_orjson_default,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS,
+        )
+    return to_json(content)
+
+
+def _orjson_default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered with orjson when installed (pydantic-core otherwise).
+
+    Endpoints that return one of these directly skip FastAPI's response_model
+    validation and serialization: only return payloads built from trusted
+    data that already match the declared response_model.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
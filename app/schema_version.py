@@ -0,0 +1,99 @@
+import argparse
+import re
+import sys
+from pathlib import Path
+from typing import Optional, Set
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import NullPool
+
+from app.core.database_url import resolve_database_url
+
+# ---------------------------
+# Fast "is the schema at head?" check
+# ---------------------------
+#
+# `alembic upgrade head` on every boot costs a whole extra interpreter that
+# imports alembic (~1s) just to find out there is nothing to do. This reads
+# the head revision(s) straight from the migration files and the applied
+# one(s) from the version table, and only hands over to Alembic when they
+# differ:
+#
+#     python -m app.schema_version            # exit 1 when not at head
+#     python -m app.schema_version --upgrade  # upgrade only when behind
+
+ROOT = Path(__file__).resolve().parent.parent
+ALEMBIC_INI = ROOT / "alembic.ini"
+VERSIONS_DIR = ROOT / "alembic" / "versions"
+# same as version_table in alembic/env.py
+VERSION_TABLE = "shortener__alembic_version"
+
+_REVISION = re.compile(r"^revision(?:\s*:[^=]*)?\s*=\s*['\"](\w+)['\"]", re.M)
+_DOWN_REVISION = re.compile(r"^down_revision(?:\s*:[^=]*)?\s*=\s*(.+)$", re.M)
+_QUOTED = re.compile(r"['\"](\w+)['\"]")
+
+
+def head_revisions(versions_dir: Path = VERSIONS_DIR) -> Set[str]:
+    """Revisions no other revision builds on (without importing alembic)."""
+    revisions: Set[str] = set()
+    parents: Set[str] = set()
+    for path in versions_dir.glob("*.py"):
+        source = path.read_text(encoding="utf-8")
+        revision = _REVISION.search(source)
+        if revision is None:
+            continue
+        revisions.add(revision.group(1))
+        down = _DOWN_REVISION.search(source)
+        if down is not None:
+            parents.update(_QUOTED.findall(down.group(1)))
+    return revisions - parents
+
+
+def current_revisions(engine: Engine) -> Set[str]:
+    with engine.connect() as conn:
+        if not inspect(conn).has_table(VERSION_TABLE):
+            return set()
+        rows = conn.execute(text(f"SELECT version_num FROM {VERSION_TABLE}"))
+        return set(rows.scalars())
+
+
+def is_current(engine: Engine, versions_dir: Path = VERSIONS_DIR) -> bool:
+    return current_revisions(engine) == head_revisions(versions_dir)
+
+
+def upgrade() -> None:
+    from alembic import command
+    from alembic.config import Config
+
+    command.upgrade(Config(str(ALEMBIC_INI)), "head")
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check the database schema version")
+    parser.add_argument(
+        "--upgrade", action="store_true", help="run alembic upgrade head if behind"
+    )
+    args = parser.parse_args(argv)
+
+    # a bare engine: importing app.database would pull in settings and models
+    engine = create_engine(resolve_database_url(), poolclass=NullPool)
+    try:
+        current = is_current(engine)
+    finally:
+        engine.dispose()
+
+    if current:
+        print("Database schema is at head; skipping migrations")
+        return 0
+    if not args.upgrade:
+        print("Database schema is not at head")
+        return 1
+
+    print("Running Alembic migrations...")
+    upgrade()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -39,6 +39,21 @@ class PrivateURLStats(BaseModel):
     source_type: SourceType
     clicks: int
     extras: dict[str, Any] | None = None
+    # only on GET /stats/{code} with UNIQUE_VISITORS_ENABLED
+    unique_visitors: int | None = None
+
+
+class BatchStatsRequest(BaseModel):
+    codes: list[str]
+
+
+class BatchStatsItem(BaseModel):
+    found: bool
+    stats: PrivateURLStats | PublicURLStats | None = None
+
+
+class BatchStatsResponse(BaseModel):
+    results: dict[str, BatchStatsItem]
 
 
 class LinkUpdateRequest(BaseModel):
@@ -46,6 +61,25 @@ class LinkUpdateRequest(BaseModel):
     expires_at: datetime | None = None
 
 
+class LinkBatchFilter(BaseModel):
+    owner_client_id: str | None = None
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    tag: str | None = None  # extras["tag"]
+
+
+class LinkBatchUpdateRequest(LinkUpdateRequest):
+    # exactly one of codes / filter
+    codes: list[str] | None = None
+    filter: LinkBatchFilter | None = None
+
+
+class LinkBatchUpdateResponse(BaseModel):
+    # code -> "updated" | "not_found" | "forbidden"
+    results: dict[str, str]
+    updated: int
+
+
 class MyUrlItem(BaseModel):
     code: str
     short_url: str
@@ -61,3 +95,61 @@ class MyUrlsResponse(BaseModel):
     page: int
     page_size: int
     total: int
+
+
+class OwnerSummaryResponse(BaseModel):
+    owner_kind: str
+    owner_id: str
+    links: int
+    active_links: int
+    clicks: int
+
+
+class ClientUrlItem(MyUrlItem):
+    created_by_user_id: str | None = None
+    extras: dict[str, Any] | None = None
+
+
+class ClientUrlsResponse(BaseModel):
+    items: list[ClientUrlItem]
+    limit: int
+    next_cursor: int | None = None
+
+
+class HotLinkItem(BaseModel):
+    code: str
+    # estimated requests per second over the last report window(s)
+    rate: float
+    # bound on how far `rate` may be off (Space-Saving overestimate + misses)
+    error: float
+
+
+class HotLinksResponse(BaseModel):
+    items: list[HotLinkItem]
+
+
+class HostLinkCount(BaseModel):
+    host: str
+    links: int
+    active_links: int
+
+
+class HostLinkItem(BaseModel):
+    code: str
+    original_url: str
+    is_active: bool
+    owner_client_id: str
+    created_by_user_id: str | None = None
+    created_at: datetime
+
+
+class HostLinksResponse(BaseModel):
+    host: str
+    items: list[HostLinkItem]
+    limit: int
+    next_cursor: int | None = None
+
+
+class HostDeactivateResponse(BaseModel):
+    host: str
+    deactivated: int
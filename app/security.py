@@ -1,22 +1,54 @@
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from app.core.config import settings
 
+# jwt (and cryptography behind it) is imported on first use, not at import
+# time: deployments with AUTH_ENABLED=false never load it, and the app
+# lifespan preloads it when auth is on (see load_auth_stack).
+
 # Don't auto-error here. We'll decide per dependency.
 bearer_optional = HTTPBearer(auto_error=False)
 bearer_required = HTTPBearer(auto_error=True)
 
 
+def _verification_key(token: str) -> Tuple[Any, List[str]]:
+    """
+    JWKS configured: the public key for the token's kid (RS256/ES256...).
+    Otherwise: the shared JWT_SECRET_KEY (HS256 by default).
+    """
+    import jwt
+
+    from app.jwks import get_key_set
+
+    key_set = get_key_set()
+    if key_set is None:
+        return settings.JWT_SECRET_KEY, [settings.JWT_ALGORITHM]
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    return key_set.get_signing_key(kid).key, settings.JWT_JWKS_ALGORITHMS
+
+
+def load_auth_stack() -> None:
+    """Import the JWT stack and load JWKS keys before the first request."""
+    import jwt  # noqa: F401
+
+    from app.jwks import get_key_set
+
+    get_key_set()
+
+
 def decode_access_token(token: str) -> Dict[str, Any]:
+    import jwt
+
     try:
+        key, algorithms = _verification_key(token)
         payload = jwt.decode(
             token,
-            settings.JWT_SECRET_KEY,
-            algorithms=[settings.JWT_ALGORITHM],
+            key,
+            algorithms=algorithms,
             audience=settings.JWT_AUDIENCE,
             options={"require": ["exp", "iat", "iss", "aud", "sub"]},
         )
@@ -72,3 +104,27 @@ def get_required_token_payload(
         )
 
     return decode_access_token(credentials.credentials)
+
+
+def get_admin_token_payload(
+    token_payload: Dict[str, Any] = Depends(get_required_token_payload),
+) -> Dict[str, Any]:
+    """
+    Admin endpoints: the token's sub must be in ADMIN_USER_IDS, or, for
+    service tokens (no sub), its client_id in ADMIN_CLIENT_IDS.
+    """
+    user_id = token_payload.get("sub")
+    client_id = token_payload.get("client_id")
+
+    if user_id:
+        allowed = str(user_id) in settings.ADMIN_USER_IDS
+    else:
+        allowed = bool(client_id) and client_id in settings.ADMIN_CLIENT_IDS
+
+    if not allowed:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Admin access required",
+        )
+
+    return token_payload
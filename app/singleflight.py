@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from app import metrics
+from app.core.config import settings
+from app.invalidation import register_evictor
+
+# ---------------------------
+# Single-flight request coalescing
+# ---------------------------
+#
+# Concurrent lookups for the same key share one in-flight call: the first
+# caller (leader) runs it, everyone else waits for its result. Negative
+# results (not found / inactive / expired) are also remembered for a short
+# TTL so a burst of misses for a dead code doesn't hit the DB at all.
+
+_MISS = object()
+_MAX_NEGATIVE_ENTRIES = 100_000
+
+
+class _Call:
+    __slots__ = ("event", "value", "error")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    def __init__(
+        self,
+        name: str,
+        negative_ttl: float,
+        is_negative: Callable[[Any], bool] = lambda value: value is None,
+    ):
+        self.name = name
+        self.negative_ttl = negative_ttl
+        self.is_negative = is_negative
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self._async_calls: Dict[Hashable, asyncio.Future] = {}
+        self._negative: Dict[Hashable, Tuple[Any, float]] = {}
+
+    # ---------------------------
+    # Thread-based callers (sync endpoints)
+    # ---------------------------
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            cached = self._negative_hit(key)
+            if cached is not _MISS:
+                return cached
+
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            metrics.incr(f"singleflight.{self.name}.shared")
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value
+
+        metrics.incr(f"singleflight.{self.name}.calls")
+        try:
+            call.value = fn()
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+                if call.error is None:
+                    self._remember(key, call.value)
+            call.event.set()
+
+        return call.value
+
+    # ---------------------------
+    # Async callers (one event loop per worker)
+    # ---------------------------
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        with self._lock:
+            cached = self._negative_hit(key)
+        if cached is not _MISS:
+            return cached
+
+        pending = self._async_calls.get(key)
+        if pending is not None:
+            metrics.incr(f"singleflight.{self.name}.shared")
+            return await asyncio.shield(pending)
+
+        fut = asyncio.get_running_loop().create_future()
+        # followers retrieve the error; don't warn if there were none
+        fut.add_done_callback(lambda f: f.cancelled() or f.exception())
+        self._async_calls[key] = fut
+
+        metrics.incr(f"singleflight.{self.name}.calls")
+        try:
+            value = await fn()
+        except BaseException as exc:
+            fut.set_exception(exc)
+            raise
+        finally:
+            del self._async_calls[key]
+
+        with self._lock:
+            self._remember(key, value)
+        fut.set_result(value)
+        return value
+
+    # ---------------------------
+    # Negative cache
+    # ---------------------------
+
+    def _negative_hit(self, key: Hashable) -> Any:
+        entry = self._negative.get(key)
+        if entry is None:
+            return _MISS
+        value, expires = entry
+        if expires <= time.monotonic():
+            del self._negative[key]
+            return _MISS
+        metrics.incr(f"singleflight.{self.name}.negative_hits")
+        return value
+
+    def _remember(self, key: Hashable, value: Any) -> None:
+        if self.negative_ttl <= 0 or not self.is_negative(value):
+            return
+        now = time.monotonic()
+        if len(self._negative) >= _MAX_NEGATIVE_ENTRIES:
+            self._negative = {k: v for k, v in self._negative.items() if v[1] > now}
+            if len(self._negative) >= _MAX_NEGATIVE_ENTRIES:
+                self._negative.clear()
+        self._negative[key] = (value, now + self.negative_ttl)
+
+    def forget(self, keys: List[Hashable]) -> None:
+        with self._lock:
+            for key in keys:
+                self._negative.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._negative.clear()
+
+
+def _is_dead_target(target) -> bool:
+    from app.api.helpers import is_expired
+
+    return target is None or not target.is_active or is_expired(target)
+
+
+# Redirect lookups by code (see redirect_to_url)
+redirect_lookups = SingleFlight(
+    "redirect",
+    negative_ttl=settings.REDIRECT_NEGATIVE_TTL_SECONDS,
+    is_negative=_is_dead_target,
+)
+
+register_evictor(redirect_lookups.forget)
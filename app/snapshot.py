@@ -0,0 +1,437 @@
+import argparse
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Any, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import Session
+
+from app import metrics
+from app.api.helpers import has_passed
+from app.core.config import settings
+from app.models import LinkChange, ShortUrl
+from app.redirect_cache import _from_micros, _hash_code, _to_micros
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------
+# Compiled redirect snapshots
+# ---------------------------
+#
+# Redirect-only edge nodes (app/edge.py) serve /{code} from immutable files
+# instead of a database:
+#
+#   full-<build>.snap          every active link at build time
+#   delta-<build>-<ts>.snap    links created or changed since that full build
+#                              (cumulative, so only the newest one is read)
+#
+# Layout: header | slots (open addressing, linear probing) | string heap
+#
+# Files are written to a temp name and renamed into place, so readers only
+# ever see complete files; edge nodes mmap them read-only and swap to newer
+# ones atomically. Deltas come from new link ids plus the invalidation change
+# log (shortener__link_changes), each re-read a little below the base marks to
+# catch ids that committed late; a tombstone in a delta hides a link that was
+# deactivated or archived since the full build.
+
+_MAGIC = b"SURLSNAP"
+_VERSION = 1
+
+_FULL = 0
+_DELTA = 1
+
+# magic, version, kind, slot_count, entry_count, built_at, base_built_at
+# (epoch µs), max_link_id, last_change_id
+_HEADER = struct.Struct("<8sIB3xIIqqqq")
+_HEADER_SIZE = 64
+
+# state, url_length, url_offset, code, expires_at (epoch µs, 0 = none)
+_SLOT = struct.Struct("<B3xIQ16sq")
+
+_EMPTY = 0
+_LIVE = 1
+_TOMBSTONE = 2
+
+_MAX_LOAD = 0.7
+_KEEP_BUILDS = 2
+
+Entry = Tuple[str, Optional[str], Optional[datetime]]
+
+
+def _write_entries(
+    mm: mmap.mmap, fd: int, entries: Iterable[Entry], slot_count: int
+) -> int:
+    """Hash entries into the mapped slot table; URLs go to the heap after it."""
+    heap_start = _HEADER_SIZE + slot_count * _SLOT.size
+    heap_offset = 0
+    count = 0
+    for code, url, expires_at in entries:
+        if count + 1 >= slot_count:
+            raise ValueError("more snapshot entries than the counted capacity")
+        url_bytes = url.encode() if url is not None else b""
+        index = _hash_code(code) % slot_count
+        while mm[_HEADER_SIZE + index * _SLOT.size] != _EMPTY:
+            index = (index + 1) % slot_count
+        _SLOT.pack_into(
+            mm,
+            _HEADER_SIZE + index * _SLOT.size,
+            _LIVE if url is not None else _TOMBSTONE,
+            len(url_bytes),
+            heap_offset,
+            code.encode(),
+            _to_micros(expires_at),
+        )
+        os.pwrite(fd, url_bytes, heap_start + heap_offset)
+        heap_offset += len(url_bytes)
+        count += 1
+    return count
+
+
+def write_snapshot(
+    path: str,
+    entries: Iterable[Entry],
+    capacity: int,
+    kind: int,
+    built_at: datetime,
+    base_built_at: datetime,
+    max_link_id: int,
+    last_change_id: int,
+) -> int:
+    """
+    Compile (code, url, expires_at) entries into `path`; url None writes a
+    tombstone. `capacity` (at least the number of entries, counted up front)
+    sizes the slot table, so entries stream straight into the mapped file
+    instead of being held in memory. Returns the number of entries.
+    """
+    slot_count = max(8, int(capacity / _MAX_LOAD) + 1)
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        try:
+            os.ftruncate(fd, _HEADER_SIZE + slot_count * _SLOT.size)
+            with mmap.mmap(fd, _HEADER_SIZE + slot_count * _SLOT.size) as mm:
+                count = _write_entries(mm, fd, entries, slot_count)
+                _HEADER.pack_into(
+                    mm,
+                    0,
+                    _MAGIC,
+                    _VERSION,
+                    kind,
+                    slot_count,
+                    count,
+                    _to_micros(built_at),
+                    _to_micros(base_built_at),
+                    max_link_id,
+                    last_change_id,
+                )
+                mm.flush()
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+    return count
+
+
+class Snapshot:
+    """Read-only view of one compiled snapshot file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        (
+            magic,
+            version,
+            self.kind,
+            self.slot_count,
+            self.entry_count,
+            built_at,
+            base_built_at,
+            self.max_link_id,
+            self.last_change_id,
+        ) = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC or version != _VERSION:
+            raise ValueError(f"{path} is not a redirect snapshot")
+        self.built_at = _from_micros(built_at)
+        self.base_built_at = _from_micros(base_built_at)
+        self._heap_offset = _HEADER_SIZE + self.slot_count * _SLOT.size
+
+    def lookup(
+        self, code: str
+    ) -> Tuple[bool, Optional[Tuple[str, Optional[datetime]]]]:
+        """
+        (found, value): value is (url, expires_at), or None for a tombstone.
+        Probes the mapped file in place; only the matched URL is copied out.
+        """
+        code_bytes = code.encode()
+        index = _hash_code(code) % self.slot_count
+        for _ in range(self.slot_count):
+            offset = _HEADER_SIZE + index * _SLOT.size
+            state, url_len, url_off, slot_code, expires = _SLOT.unpack_from(
+                self._mm, offset
+            )
+            if state == _EMPTY:
+                return False, None
+            if slot_code.rstrip(b"\0") == code_bytes:
+                if state == _TOMBSTONE:
+                    return True, None
+                start = self._heap_offset + url_off
+                url = self._mm[start : start + url_len].decode()
+                return True, (url, _from_micros(expires))
+            index = (index + 1) % self.slot_count
+        return False, None
+
+
+class SnapshotSet:
+    """A full snapshot plus (optionally) its newest delta."""
+
+    def __init__(self, full: Snapshot, delta: Optional[Snapshot] = None):
+        self.full = full
+        self.delta = delta
+
+    def get(self, code: str) -> Optional[Tuple[str, Optional[datetime]]]:
+        if self.delta is not None:
+            found, value = self.delta.lookup(code)
+            if found:
+                return value
+        return self.full.lookup(code)[1]
+
+
+def _build_id(value: datetime) -> str:
+    return value.strftime("%Y%m%dT%H%M%S%f")
+
+
+def _list(directory: str, prefix: str) -> List[str]:
+    if not os.path.isdir(directory):
+        return []
+    return sorted(
+        name
+        for name in os.listdir(directory)
+        if name.startswith(prefix) and name.endswith(".snap")
+    )
+
+
+def latest_paths(directory: str) -> Tuple[Optional[str], Optional[str]]:
+    """(newest full snapshot, newest delta for it) in `directory`."""
+    fulls = _list(directory, "full-")
+    if not fulls:
+        return None, None
+    build = fulls[-1][len("full-") : -len(".snap")]
+    deltas = _list(directory, f"delta-{build}-")
+    return (
+        os.path.join(directory, fulls[-1]),
+        os.path.join(directory, deltas[-1]) if deltas else None,
+    )
+
+
+class EdgeSnapshots:
+    """
+    The snapshot set an edge node serves from. reload() picks up newer files;
+    the swap is a single reference assignment, and files being replaced stay
+    mapped until the last request holding them finishes.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._current: Optional[SnapshotSet] = None
+        self._paths: Tuple[Optional[str], Optional[str]] = (None, None)
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> Optional[SnapshotSet]:
+        return self._current
+
+    def reload(self) -> bool:
+        with self._lock:
+            paths = latest_paths(self.directory)
+            if paths == self._paths or paths[0] is None:
+                return False
+            full_path, delta_path = paths
+            full = (
+                self._current.full
+                if self._current and self._paths[0] == full_path
+                else Snapshot(full_path)
+            )
+            delta = Snapshot(delta_path) if delta_path else None
+            self._current = SnapshotSet(full, delta)
+            self._paths = paths
+
+        metrics.incr("snapshot.swaps")
+        metrics.set_gauge("snapshot.entries", full.entry_count)
+        metrics.set_gauge("snapshot.delta_entries", delta.entry_count if delta else 0)
+        logger.info("Serving snapshot %s (delta %s)", full_path, delta_path)
+        return True
+
+    def get(self, code: str) -> Optional[Tuple[str, Optional[datetime]]]:
+        current = self._current
+        return current.get(code) if current is not None else None
+
+
+# ---------------------------
+# Builders (need the database)
+# ---------------------------
+
+
+def _marks(db: Session) -> Tuple[int, int]:
+    # taken before reading links: anything changed later is in the next delta
+    last_change_id = db.execute(select(func.coalesce(func.max(LinkChange.id), 0)))
+    max_link_id = db.execute(select(func.coalesce(func.max(ShortUrl.id), 0)))
+    return max_link_id.scalar_one(), last_change_id.scalar_one()
+
+
+def _serving(now: datetime):
+    return ShortUrl.is_active.is_(True), or_(
+        ShortUrl.expires_at.is_(None), ShortUrl.expires_at > now
+    )
+
+
+def build_full(db: Session, directory: str) -> str:
+    """Compile every active, unexpired link. Returns the new file's path."""
+    os.makedirs(directory, exist_ok=True)
+    built_at = datetime.now(timezone.utc)
+    max_link_id, last_change_id = _marks(db)
+
+    # ids up to the mark, so the count and the read see the same links (plus
+    # lower ids still committing, which the lookback leaves room for)
+    where = (*_serving(built_at), ShortUrl.id <= max_link_id)
+    counted = db.execute(select(func.count()).where(*where)).scalar_one()
+    rows = db.execute(
+        select(ShortUrl.code, ShortUrl.original_url, ShortUrl.expires_at)
+        .where(*where)
+        .execution_options(yield_per=10_000)
+    )
+
+    path = os.path.join(directory, f"full-{_build_id(built_at)}.snap")
+    count = write_snapshot(
+        path,
+        rows,
+        counted + settings.SNAPSHOT_ID_LOOKBACK,
+        _FULL,
+        built_at,
+        built_at,
+        max_link_id,
+        last_change_id,
+    )
+    metrics.incr("snapshot.full_builds")
+    logger.info("Wrote %s (%d links)", path, count)
+    _prune(directory)
+    return path
+
+
+def _read_links(db: Session, where) -> Iterable[Tuple[str, str, Any, bool]]:
+    return db.execute(
+        select(
+            ShortUrl.code,
+            ShortUrl.original_url,
+            ShortUrl.expires_at,
+            ShortUrl.is_active,
+        ).where(where)
+    )
+
+
+def build_delta(db: Session, directory: str) -> Optional[str]:
+    """
+    Compile links created or changed since the newest full snapshot. Returns
+    None when a delta can't be complete (no full build yet, change log
+    disabled or already pruned past it); build a full snapshot instead.
+    """
+    full_path, _ = latest_paths(directory)
+    if full_path is None or not settings.INVALIDATION_ENABLED:
+        return None
+    base = Snapshot(full_path)
+    retention = timedelta(hours=settings.INVALIDATION_RETENTION_HOURS)
+    built_at = datetime.now(timezone.utc)
+    if built_at - base.built_at >= retention:
+        return None
+
+    # Ids are assigned at insert but visible at commit, so a lower id can
+    # commit after the base marks were taken. Re-read SNAPSHOT_ID_LOOKBACK ids
+    # below each mark and keep only what differs from the base snapshot.
+    lookback = settings.SNAPSHOT_ID_LOOKBACK
+    max_link_id, last_change_id = _marks(db)
+    changed = set(
+        db.execute(
+            select(LinkChange.code).where(
+                LinkChange.id > base.last_change_id - lookback
+            )
+        ).scalars()
+    )
+    rows = {}
+    for code, url, expires_at, is_active in _read_links(
+        db, ShortUrl.id > base.max_link_id - lookback
+    ):
+        rows[code] = (url, expires_at, is_active)
+    codes = sorted(changed - rows.keys())
+    for start in range(0, len(codes), 500):
+        for code, url, expires_at, is_active in _read_links(
+            db, ShortUrl.code.in_(codes[start : start + 500])
+        ):
+            rows[code] = (url, expires_at, is_active)
+
+    entries = []
+    for code in sorted(changed | rows.keys()):
+        url, expires_at, is_active = rows.get(code, (None, None, False))
+        # missing (archived), inactive or expired: tombstone over the full one
+        if not is_active or has_passed(expires_at):
+            url = None
+        current = (url, _to_micros(expires_at)) if url is not None else None
+        _, value = base.lookup(code)
+        served = (value[0], _to_micros(value[1])) if value is not None else None
+        if current == served:
+            continue  # the base already serves it this way
+        entries.append((code, url, expires_at))
+
+    path = os.path.join(
+        directory,
+        f"delta-{_build_id(base.built_at)}-{_build_id(built_at)}.snap",
+    )
+    count = write_snapshot(
+        path,
+        entries,
+        len(entries),
+        _DELTA,
+        built_at,
+        base.built_at,
+        max_link_id,
+        last_change_id,
+    )
+    metrics.incr("snapshot.delta_builds")
+    logger.info("Wrote %s (%d links)", path, count)
+    return path
+
+
+def _prune(directory: str) -> None:
+    """Keep the newest _KEEP_BUILDS full builds and their deltas."""
+    fulls = _list(directory, "full-")
+    for name in fulls[:-_KEEP_BUILDS]:
+        build = name[len("full-") : -len(".snap")]
+        for stale in [name, *_list(directory, f"delta-{build}-")]:
+            os.remove(os.path.join(directory, stale))
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    from app.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Build redirect snapshots")
+    parser.add_argument("command", choices=["full", "delta"])
+    parser.add_argument("--dir", default=settings.SNAPSHOT_DIR)
+    args = parser.parse_args(argv)
+
+    with SessionLocal() as db:
+        path = build_delta(db, args.dir) if args.command == "delta" else None
+        if path is None:
+            path = build_full(db, args.dir)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Shorten write throughput: one transaction per request (current path) vs the
+group-commit writer, with concurrent request threads against a file-backed
+SQLite database (or BENCH_DATABASE_URL).
+
+Both paths insert the same rows with the same owner aggregate upserts; code
+generation and HTTP handling are left out.
+
+    python -m benchmarks.bench_group_commit
+"""
+
+import itertools
+import os
+import tempfile
+import threading
+import time
+
+from sqlalchemy import create_engine, delete
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.group_commit import GroupCommitWriter, add_links
+from app.models import OwnerStats, ShortUrl
+
+_codes = itertools.count()
+
+
+def _values() -> dict:
+    n = next(_codes)
+    return {
+        "code": f"B{n:09d}",
+        "original_url": f"https://example.com/{n}",
+        "owner_client_id": f"client-{n % 10}",
+    }
+
+
+def _per_request(Session):
+    def create(values: dict):
+        with Session() as db:
+            short = ShortUrl(**values)
+            add_links(db, [short])
+            db.commit()
+            db.refresh(short)
+
+    return create
+
+
+def _run(create, threads: int, per_thread: int) -> float:
+    def worker():
+        for _ in range(per_thread):
+            create(_values())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+
+def main(threads: int = 16, per_thread: int = 100) -> None:
+    path = None
+    url = os.getenv("BENCH_DATABASE_URL")
+    if url is None:
+        fd, path = tempfile.mkstemp(suffix=".db")
+        os.close(fd)
+        url = f"sqlite:///{path}"
+    connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+    engine = create_engine(url, connect_args=connect_args)
+    Base.metadata.create_all(bind=engine)
+    Session = sessionmaker(bind=engine)
+
+    total = threads * per_thread
+    print(f"{total} links from {threads} threads on {engine.dialect.name}")
+    try:
+        cases = [("per-request commit", _per_request(Session), None)]
+        for delay_ms in (0, 2, 10):
+            writer = GroupCommitWriter(
+                Session, max_batch=100, max_delay=delay_ms / 1000
+            )
+            cases.append((f"group commit ({delay_ms} ms)", writer.submit, writer))
+
+        baseline = None
+        for name, create, writer in cases:
+            elapsed = _run(create, threads, per_thread)
+            if writer:
+                writer.stop()
+            rate = total / elapsed
+            baseline = baseline or rate
+            print(f"{name:22} {rate:9.0f} links/s   ({rate / baseline:4.1f}x)")
+            with Session() as db:
+                db.execute(delete(ShortUrl))
+                db.execute(delete(OwnerStats))
+                db.commit()
+    finally:
+        engine.dispose()
+        if path:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Token verification cost: shared-secret HS256 vs JWKS-backed RS256 / ES256.
+
+All three go through app.security.decode_access_token; the JWKS cases read
+their keys from a local file once, so only verification is measured.
+
+    python -m benchmarks.bench_jwt
+"""
+
+import json
+import os
+import tempfile
+import timeit
+from datetime import datetime, timedelta, timezone
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+
+from app.core.config import settings
+from app.jwks import reset_key_set
+from app.security import decode_access_token
+
+SECRET = "bench-secret"
+RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+EC_KEY = ec.generate_private_key(ec.SECP256R1())
+
+
+def _token(key, algorithm: str, kid: str = "") -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": "user-123",
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(hours=1)).timestamp()),
+        "iss": settings.JWT_ISSUER,
+        "aud": settings.JWT_AUDIENCE[0],
+    }
+    headers = {"kid": kid} if kid else None
+    return jwt.encode(payload, key, algorithm=algorithm, headers=headers)
+
+
+def _write_jwks() -> str:
+    keys = [
+        {**RSAAlgorithm.to_jwk(RSA_KEY.public_key(), as_dict=True), "kid": "rsa"},
+        {**ECAlgorithm.to_jwk(EC_KEY.public_key(), as_dict=True), "kid": "ec"},
+    ]
+    fd, path = tempfile.mkstemp(suffix=".json")
+    with os.fdopen(fd, "w") as fh:
+        json.dump({"keys": keys}, fh)
+    return path
+
+
+def main(number: int = 5_000) -> None:
+    settings.AUTH_ENABLED = True
+    settings.JWT_SECRET_KEY = SECRET
+    settings.JWT_ALGORITHM = "HS256"
+    jwks_path = _write_jwks()
+
+    cases = [
+        ("HS256 (shared secret)", "", _token(SECRET, "HS256")),
+        ("RS256 (JWKS, 2048-bit)", jwks_path, _token(RSA_KEY, "RS256", "rsa")),
+        ("ES256 (JWKS, P-256)", jwks_path, _token(EC_KEY, "ES256", "ec")),
+    ]
+    print(f"{number} verifications each")
+    try:
+        baseline = None
+        for name, source, token in cases:
+            settings.JWT_JWKS_SOURCE = source
+            reset_key_set()
+            decode_access_token(token)  # load keys outside the timing
+            elapsed = timeit.timeit(lambda: decode_access_token(token), number=number)
+            per_call = elapsed / number
+            baseline = baseline or per_call
+            print(
+                f"{name:24} {per_call * 1e6:8.1f} µs   {1 / per_call:9.0f}/s"
+                f"   ({per_call / baseline:4.1f}x HS256)"
+            )
+    finally:
+        os.remove(jwks_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""
+Response serialization: FastAPI's response_model path vs FastJSONResponse.
+
+The old path validates each payload against the response_model (for /stats a
+PublicURLStats | PrivateURLStats union, tried member by member), dumps it to
+JSON-able Python, then json.dumps() it. The fast path encodes the payload once.
+
+    python -m benchmarks.bench_responses
+"""
+
+import json
+import timeit
+from datetime import datetime, timezone
+
+from pydantic import TypeAdapter
+
+from app.enums import SourceType
+from app.responses import dumps, orjson
+from app.schemas import MyUrlsResponse, PrivateURLStats, PublicURLStats
+
+NOW = datetime.now(timezone.utc)
+
+STATS_PAYLOAD = {
+    "code": "aB3k9X",
+    "original_url": "https://example.com/some/landing/page?utm_source=newsletter",
+    "clicks": 1234,
+    "owner_client_id": "angular-web",
+    "created_by_user_id": "user-123",
+    "source_type": SourceType.HUMAN,
+    "created_at": NOW,
+    "expires_at": None,
+    "is_active": True,
+    "extras": {"campaign": "spring", "tag": "sale"},
+}
+
+ME_URLS_PAYLOAD = {
+    "items": [
+        {
+            "code": f"code{i:04d}",
+            "short_url": f"http://127.0.0.1:8000/code{i:04d}",
+            "original_url": f"https://example.com/page/{i}",
+            "clicks": i,
+            "created_at": NOW,
+            "is_active": True,
+            "expires_at": None,
+        }
+        for i in range(50)
+    ],
+    "page": 1,
+    "page_size": 50,
+    "total": 5000,
+}
+
+
+def _response_model_path(adapter: TypeAdapter, payload) -> bytes:
+    value = adapter.validate_python(payload)
+    return json.dumps(adapter.dump_python(value, mode="json")).encode()
+
+
+def main(number: int = 20_000) -> None:
+    encoder = "orjson" if orjson is not None else "pydantic-core"
+    print(f"encoder: {encoder}, {number} iterations each")
+
+    cases = [
+        (
+            "/stats (private)",
+            TypeAdapter(PublicURLStats | PrivateURLStats),
+            STATS_PAYLOAD,
+        ),
+        ("/me/urls (50 items)", TypeAdapter(MyUrlsResponse), ME_URLS_PAYLOAD),
+    ]
+    for name, adapter, payload in cases:
+        n = number if "stats" in name else number // 10
+        old = timeit.timeit(lambda: _response_model_path(adapter, payload), number=n)
+        new = timeit.timeit(lambda: dumps(payload), number=n)
+        print(
+            f"{name:22} response_model: {old / n * 1e6:8.1f} µs"
+            f"   fast: {new / n * 1e6:8.1f} µs   ({old / new:4.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""
+Cold start: import time of app.main, time to the first answered request, and
+the boot-time schema check vs `alembic upgrade head`. Every sample is a fresh
+interpreter against a temporary, already migrated SQLite database.
+
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --max-import-ms 1500 --max-first-request-ms 3000
+
+With thresholds it exits non-zero when a median exceeds them, or when the JWT
+stack gets imported with AUTH_ENABLED=false.
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+_IMPORT_PROBE = (
+    "import sys, time\n"
+    "t = time.perf_counter()\n"
+    "import app.main\n"
+    "print((time.perf_counter() - t) * 1000, 'jwt' in sys.modules)\n"
+)
+
+
+def _env(database_url: str, **overrides: str) -> dict:
+    env = dict(os.environ)
+    env.update(
+        DATABASE_URL=database_url,
+        JWT_SECRET_KEY=env.get("JWT_SECRET_KEY", "bench-secret"),
+        **overrides,
+    )
+    return env
+
+
+def _import_ms(env: dict) -> tuple[float, bool]:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_PROBE],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    return float(out[0]), out[1] == "True"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _first_request_ms(env: dict, timeout: float = 30.0) -> float:
+    port = _free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - start < timeout:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/health", timeout=1
+                ) as resp:
+                    if resp.status == 200:
+                        return (time.perf_counter() - start) * 1000
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError("server did not answer in time")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def _command_ms(args: list[str], env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run(args, env=env, check=True, capture_output=True)
+    return (time.perf_counter() - start) * 1000
+
+
+def _median(fn, runs: int) -> float:
+    return statistics.median(fn() for _ in range(runs))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import-ms", type=float)
+    parser.add_argument("--max-first-request-ms", type=float)
+    args = parser.parse_args(argv)
+
+    fd, path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    database_url = f"sqlite:///{path}"
+    failures = []
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "app.schema_version", "--upgrade"],
+            env=_env(database_url),
+            check=True,
+            capture_output=True,
+        )
+
+        print(f"median of {args.runs} fresh interpreters")
+        for auth in ("false", "true"):
+            env = _env(database_url, AUTH_ENABLED=auth)
+            samples = [_import_ms(env) for _ in range(args.runs)]
+            import_ms = statistics.median(ms for ms, _ in samples)
+            jwt_loaded = any(loaded for _, loaded in samples)
+            first_ms = _median(lambda: _first_request_ms(env), args.runs)
+            print(
+                f"AUTH_ENABLED={auth:5}  import app.main {import_ms:7.0f} ms"
+                f"   first request {first_ms:7.0f} ms   jwt imported: {jwt_loaded}"
+            )
+            if auth == "false" and jwt_loaded:
+                failures.append("jwt imported with AUTH_ENABLED=false")
+            if args.max_import_ms and import_ms > args.max_import_ms:
+                failures.append(f"import {import_ms:.0f} ms > {args.max_import_ms}")
+            if args.max_first_request_ms and first_ms > args.max_first_request_ms:
+                failures.append(
+                    f"first request {first_ms:.0f} ms > {args.max_first_request_ms}"
+                )
+
+        env = _env(database_url)
+        check_ms = _median(
+            lambda: _command_ms([sys.executable, "-m", "app.schema_version"], env),
+            args.runs,
+        )
+        alembic_ms = _median(
+            lambda: _command_ms(
+                [sys.executable, "-m", "alembic", "upgrade", "head"], env
+            ),
+            args.runs,
+        )
+        print(
+            f"schema at head: app.schema_version {check_ms:7.0f} ms"
+            f"   alembic upgrade head {alembic_ms:7.0f} ms"
+        )
+    finally:
+        os.remove(path)
+
+    for failure in failures:
+        print(f"REGRESSION: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,8 @@
 #!/usr/bin/env sh
 set -e
 
-echo "Running Alembic migrations..."
-alembic upgrade head
+# Runs Alembic only when the schema is behind head
+python -m app.schema_version --upgrade
 
 echo "Starting FastAPI..."
 exec uvicorn app.main:app --host 0.0.0.0 --port ${PORT:-8000}
@@ -8,6 +8,8 @@ from sqlalchemy.orm import sessionmaker
 
 from app.database import Base, get_db
 from app.main import app
+from app.rate_limit import _requests as rate_limit_buckets
+from app.singleflight import redirect_lookups
 
 TEST_DB_PATH = "./test_shortener.db"
 SQLALCHEMY_DATABASE_URL = f"sqlite:///{TEST_DB_PATH}"
@@ -76,3 +78,5 @@ def client(db_session) -> TestClient:
     test_client = TestClient(app)
     yield test_client
     app.dependency_overrides.clear()
+    redirect_lookups.clear()
+    rate_limit_buckets.clear()
@@ -0,0 +1,166 @@
+"""
+Seed a database with realistic ShortUrl rows for scale and query-plan tests.
+
+- owners (client ids) and users: Zipf-distributed, a few own most links
+- clicks: heavy-tailed (most links get a handful, a few go viral)
+- expiry mix: mostly none, some in the future, some already expired
+- ~5% inactive; ~30% carry extras (campaign / tag / free-form keys)
+
+    python -m tests.data_generator --rows 2000000 --database-url sqlite:///./scale.db
+"""
+
+import argparse
+import bisect
+import itertools
+import random
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app import code_space
+from app.database import Base
+from app.enums import SourceType
+from app.models import ShortUrl
+from app.owner_stats import reconcile
+
+ALPHABET = "ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+CODE_LENGTH = 6
+_KEYSPACE = len(ALPHABET) ** CODE_LENGTH
+# coprime with 62^6, so i -> i * _STRIDE mod 62^6 is a permutation
+_STRIDE = 2_654_435_761
+
+CAMPAIGNS = ["spring", "summer", "autumn", "winter", "launch", "newsletter"]
+TAGS = ["promo", "docs", "social", "email", "internal"]
+
+
+class _Zipf:
+    """Sample 1..n with P(k) ~ 1 / k^s."""
+
+    def __init__(self, n: int, s: float, rng: random.Random):
+        weights = itertools.accumulate(1 / k**s for k in range(1, n + 1))
+        self._cumulative = list(weights)
+        self._rng = rng
+
+    def sample(self) -> int:
+        point = self._rng.random() * self._cumulative[-1]
+        return bisect.bisect_left(self._cumulative, point) + 1
+
+
+def code_for(index: int) -> str:
+    """Unique, random-looking code for row `index`."""
+    value = (index * _STRIDE) % _KEYSPACE
+    chars = []
+    for _ in range(CODE_LENGTH):
+        value, digit = divmod(value, len(ALPHABET))
+        chars.append(ALPHABET[digit])
+    return "".join(chars)
+
+
+def generate_rows(
+    count: int,
+    seed: int = 42,
+    owners: int = 1000,
+    users: int = 50_000,
+    start: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    rng = random.Random(seed)
+    owner_dist = _Zipf(owners, 1.1, rng)
+    user_dist = _Zipf(users, 1.05, rng)
+    now = datetime.now(timezone.utc)
+
+    for index in range(start, start + count):
+        created_at = now - timedelta(seconds=rng.randrange(3 * 365 * 86400))
+
+        roll = rng.random()
+        if roll < 0.7:
+            expires_at = None
+        elif roll < 0.9:
+            expires_at = now + timedelta(days=rng.randrange(1, 365))
+        else:
+            expires_at = created_at + timedelta(days=rng.randrange(1, 30))
+
+        if rng.random() < 0.6:
+            source_type = SourceType.HUMAN
+            user_id = f"user-{user_dist.sample()}"
+        else:
+            source_type = rng.choice([SourceType.SERVICE, SourceType.ANONYMOUS])
+            user_id = None
+
+        extras = None
+        if rng.random() < 0.3:
+            extras = {"campaign": rng.choice(CAMPAIGNS)}
+            if rng.random() < 0.5:
+                extras["tag"] = rng.choice(TAGS)
+            if rng.random() < 0.2:
+                extras["note"] = f"batch-{rng.randrange(100)}"
+
+        host = f"example{rng.randrange(5000)}.com"
+        yield {
+            "code": code_for(index),
+            "original_url": f"https://{host}/p/{index}",
+            "destination_host": host,
+            "owner_client_id": f"client-{owner_dist.sample()}",
+            "created_by_user_id": user_id,
+            "created_at": created_at,
+            "expires_at": expires_at,
+            "is_active": rng.random() >= 0.05,
+            "source_type": source_type,
+            # Pareto tail: median ~2 clicks, a few links in the millions
+            "clicks": int(rng.paretovariate(1.2)) - 1,
+            "extras": extras,
+        }
+
+
+def seed_database(
+    engine: Engine, rows: int, batch_size: int = 10_000, seed: int = 42
+) -> int:
+    """
+    Create the tables (if needed), insert `rows` generated links in batches
+    and rebuild the owner aggregates and code counts. Returns the number of rows inserted.
+    """
+    Base.metadata.create_all(bind=engine)
+    stmt = insert(ShortUrl.__table__)
+
+    inserted = 0
+    batch: List[Dict[str, Any]] = []
+    with engine.begin() as conn:
+        for row in generate_rows(rows, seed=seed):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                conn.execute(stmt, batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            conn.execute(stmt, batch)
+            inserted += len(batch)
+
+        if engine.dialect.name == "sqlite":
+            conn.exec_driver_sql("ANALYZE")
+        else:
+            conn.exec_driver_sql(f"ANALYZE {ShortUrl.__tablename__}")
+
+    with Session(engine) as db:
+        reconcile(db)
+        code_space.reconcile(db)
+
+    return inserted
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Seed a scale-test database")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database-url", default="sqlite:///./scale_test.db")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    inserted = seed_database(engine, args.rows, args.batch_size, args.seed)
+    print(f"Inserted {inserted} rows into {engine.url.render_as_string()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Local stand-in for an event destination (see app/events.py): accepts POSTed
+event batches and keeps them, or fails on demand to exercise retries.
+
+    with EventSink() as sink:
+        settings.EVENT_DESTINATIONS = f"analytics:link.created={sink.url}"
+        ...
+        sink.events()  # every event received, in order
+
+Or run it on its own and point EVENT_DESTINATIONS at it:
+
+    python -m tests.event_sink --port 8099
+"""
+
+import argparse
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class EventSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, verbose: bool = False):
+        self.batches: List[List[Dict[str, Any]]] = []
+        self.verbose = verbose
+        self._failures = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/events"
+
+    def fail_next(self, count: int) -> None:
+        """Answer the next `count` batches with 503."""
+        with self._lock:
+            self._failures = count
+
+    def events(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [event for batch in self.batches for event in batch]
+
+    def _handler(self):
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                with sink._lock:
+                    failing = sink._failures > 0
+                    if failing:
+                        sink._failures -= 1
+                    else:
+                        sink.batches.append(json.loads(body)["events"])
+                if sink.verbose:
+                    print("503" if failing else body.decode(), flush=True)
+                self.send_response(503 if failing else 204)
+                self.end_headers()
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "EventSink":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "EventSink":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Print received event batches")
+    parser.add_argument("--port", type=int, default=8099)
+    args = parser.parse_args(argv)
+    sink = EventSink(port=args.port, verbose=True)
+    print(f"Listening on {sink.url}", flush=True)
+    sink._server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app import admission, metrics
+from app.admission import AdmissionMiddleware, AdmissionPool, classify
+
+
+def test_classify_paths():
+    assert classify("/aB3k9X") == "redirect"
+    assert classify("/api/v0/shorten") == "shorten"
+    assert classify("/api/v0/me/urls") == "listing"
+    assert classify("/api/clients/me/urls") == "listing"
+    assert classify("/api/v0/stats/aB3k9X") == "api"
+    assert classify("/health") is None
+    assert classify("/docs") is None
+
+
+def test_pool_queues_times_out_and_sheds():
+    async def scenario():
+        pool = AdmissionPool("test", concurrency=1, max_queue=1, max_wait=0.05)
+
+        assert await pool.acquire() is True
+
+        # queued behind the active request, gives up after max_wait
+        assert await pool.acquire() is False
+
+        # queue full -> rejected without waiting
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        assert pool.queue_depth == 1
+        assert await pool.acquire() is False
+
+        # releasing hands the slot to the queued waiter
+        pool.release()
+        assert await waiter is True
+        assert pool.active == 1
+        pool.release()
+        assert pool.active == 0
+
+    asyncio.run(scenario())
+    assert metrics.snapshot()["counters"]["admission.test.rejected"] >= 2
+
+
+def test_slot_handed_over_as_the_wait_times_out_is_not_leaked(monkeypatch):
+    async def scenario():
+        pool = AdmissionPool("race", concurrency=1, max_queue=1, max_wait=0.05)
+        assert await pool.acquire() is True
+
+        async def racing_wait_for(fut, timeout):
+            # the holder releases in the same loop iteration the wait expires
+            pool.release()
+            raise asyncio.TimeoutError
+
+        monkeypatch.setattr(admission.asyncio, "wait_for", racing_wait_for)
+        assert await pool.acquire() is True
+        assert (pool.active, pool.queue_depth) == (1, 0)
+        pool.release()
+        assert pool.active == 0
+
+    asyncio.run(scenario())
+
+
+def test_middleware_returns_503_with_retry_after():
+    app = FastAPI()
+
+    @app.get("/{code}")
+    def redirect(code: str):
+        return {"code": code}
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    # no capacity at all for redirects
+    app.add_middleware(AdmissionMiddleware, pools="redirect=0:0:0")
+    client = TestClient(app)
+
+    resp = client.get("/aB3k9X")
+    assert resp.status_code == 503
+    assert resp.headers["retry-after"] == "1"
+
+    assert client.get("/health").status_code == 200
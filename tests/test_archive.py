@@ -0,0 +1,138 @@
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlmodel import select
+
+from app.api.helpers import api_version_prefix
+from app.archive import archive_links, find_archived, restore_link
+from app.click_counter import increment, pending_clicks
+from app.core.config import settings
+from app.models import ArchivedShortUrl, LinkVisitors, ShortUrl
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+
+@pytest.fixture()
+def archive_lookup_enabled():
+    original = settings.ARCHIVE_LOOKUP_ENABLED
+    settings.ARCHIVE_LOOKUP_ENABLED = True
+    yield
+    settings.ARCHIVE_LOOKUP_ENABLED = original
+
+
+def _add(db_session, code, **kwargs) -> ShortUrl:
+    short = ShortUrl(code=code, original_url=f"https://example.com/{code}", **kwargs)
+    db_session.add(short)
+    db_session.commit()
+    return short
+
+
+def test_archive_moves_inactive_and_long_expired_links(db_session):
+    now = datetime.now(timezone.utc)
+    _add(db_session, "ARCHV1", is_active=False, clicks=7)
+    _add(db_session, "ARCHV2", expires_at=now - timedelta(days=400))
+    _add(db_session, "ARCHV3", expires_at=now - timedelta(hours=1))
+    _add(db_session, "ARCHV4")
+
+    moved = archive_links(db_session, expired_before=now - timedelta(days=90))
+    assert moved == 2
+
+    hot = set(db_session.execute(select(ShortUrl.code)).scalars())
+    assert {"ARCHV3", "ARCHV4"} <= hot
+    assert not {"ARCHV1", "ARCHV2"} & hot
+
+    archived = find_archived(db_session, "ARCHV1")
+    assert archived is not None
+    assert archived.clicks == 7
+    assert archived.archived_at is not None
+
+
+def test_archive_walks_candidates_in_batches(db_session):
+    for i in range(5):
+        _add(db_session, f"BATCH{i}", is_active=i % 2 == 1)
+
+    assert archive_links(db_session, batch_size=1) >= 2
+    hot = set(db_session.execute(select(ShortUrl.code)).scalars())
+    assert {"BATCH1", "BATCH3"} <= hot
+    assert not {"BATCH0", "BATCH2", "BATCH4"} & hot
+
+
+def test_archive_skips_link_reactivated_after_candidate_read(db_session, monkeypatch):
+    _add(db_session, "RACE01", is_active=False)
+    _add(db_session, "RACE02", is_active=False)
+    execute = db_session.execute
+
+    def reactivate_after_first_read(statement, *args, **kwargs):
+        result = execute(statement, *args, **kwargs)
+        if statement.is_select:
+            monkeypatch.setattr(db_session, "execute", execute)
+            execute(
+                update(ShortUrl).where(ShortUrl.code == "RACE01").values(is_active=True)
+            )
+        return result
+
+    monkeypatch.setattr(db_session, "execute", reactivate_after_first_read)
+    moved = archive_links(db_session)
+
+    assert find_archived(db_session, "RACE01") is None
+    assert find_archived(db_session, "RACE02") is not None
+    assert moved >= 1
+    hot = db_session.execute(select(ShortUrl).where(ShortUrl.code == "RACE01"))
+    assert hot.scalars().one().is_active is True
+
+
+def test_archive_folds_click_shards_and_drops_visitors(db_session):
+    _add(db_session, "FOLDC1", is_active=False, clicks=7)
+    increment(db_session, "FOLDC1")
+    increment(db_session, "FOLDC1")
+    db_session.add(LinkVisitors(code="FOLDC1", day=date(2024, 1, 1), sketch=b"\0" * 16))
+    db_session.commit()
+
+    archive_links(db_session)
+
+    assert find_archived(db_session, "FOLDC1").clicks == 9
+    assert pending_clicks(db_session, ["FOLDC1"]) == {}
+    assert db_session.get(LinkVisitors, ("FOLDC1", date(2024, 1, 1))) is None
+
+
+def test_restore_keeps_id_and_state(db_session):
+    original = _add(db_session, "RESTR1", is_active=False)
+    original_id = original.id
+    archive_links(db_session, batch_size=1)
+
+    restored = restore_link(db_session, "RESTR1")
+    assert restored is not None
+    assert restored.id == original_id
+    assert restored.is_active is False
+    assert (
+        db_session.execute(
+            select(ArchivedShortUrl).where(ArchivedShortUrl.code == "RESTR1")
+        ).first()
+        is None
+    )
+    assert restore_link(db_session, "RESTR1") is None
+
+
+def test_update_link_reactivates_archived_link(
+    client: TestClient, db_session, restore_auth_settings, archive_lookup_enabled
+):
+    _set_auth(True)
+    _add(db_session, "COLD01", is_active=False, created_by_user_id="owner-1")
+    archive_links(db_session)
+
+    other = {"Authorization": f"Bearer {_make_token(sub='owner-2')}"}
+    resp = client.patch(
+        f"{api_version_prefix()}/links/COLD01", json={"is_active": True}, headers=other
+    )
+    assert resp.status_code == 403
+    assert find_archived(db_session, "COLD01") is not None
+
+    owner = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+    resp = client.patch(
+        f"{api_version_prefix()}/links/COLD01", json={"is_active": True}, headers=owner
+    )
+    assert resp.status_code == 200
+    assert resp.json()["is_active"] is True
+    assert client.get("/COLD01", follow_redirects=False).status_code == 307
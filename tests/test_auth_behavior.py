@@ -3,10 +3,11 @@ from datetime import datetime, timedelta, timezone
 import jwt
 import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event
 
 from app.api.helpers import api_version_prefix
 from app.core.config import settings
-from tests.conftest import client
+from tests.conftest import client, db_session, engine
 
 
 @pytest.fixture()
@@ -230,3 +231,151 @@ def test_delete_link_soft_deletes(client: TestClient, restore_auth_settings):
 
     stats_resp = client.get(f"{api_version_prefix()}/stats/{code}", headers=headers)
     assert stats_resp.status_code == 404
+
+
+def test_stats_batch_applies_visibility_per_code(
+    client: TestClient, db_session, restore_auth_settings
+):
+    _set_auth(True)
+
+    owner_headers = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+    other_headers = {"Authorization": f"Bearer {_make_token(sub='owner-2')}"}
+
+    mine = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": "https://example.com/mine"},
+        headers=owner_headers,
+    ).json()["code"]
+    theirs = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": "https://example.com/theirs"},
+        headers=other_headers,
+    ).json()["code"]
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    db_session.expire_all()
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        resp = client.post(
+            f"{api_version_prefix()}/stats/batch",
+            json={"codes": [mine, theirs, "missing1"]},
+            headers=owner_headers,
+        )
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert resp.status_code == 200
+    results = resp.json()["results"]
+
+    # one query for the whole batch, no per-row load of the private payload
+    assert len([s for s in statements if "shortener__short_urls" in s]) == 1
+
+    assert results[mine]["found"] is True
+    assert results[mine]["stats"]["clicks"] == 0
+    assert results[theirs]["found"] is True
+    assert "clicks" not in results[theirs]["stats"]
+    assert results["missing1"] == {"found": False, "stats": None}
+
+
+def test_stats_batch_rejects_too_many_codes(client: TestClient, restore_auth_settings):
+    _set_auth(True)
+
+    codes = [f"code{i:04d}" for i in range(settings.STATS_BATCH_MAX_CODES + 1)]
+    resp = client.post(f"{api_version_prefix()}/stats/batch", json={"codes": codes})
+    assert resp.status_code == 400
+
+
+def test_links_batch_by_codes_reports_per_code_outcomes(
+    client: TestClient, restore_auth_settings
+):
+    _set_auth(True)
+
+    owner_headers = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+    other_headers = {"Authorization": f"Bearer {_make_token(sub='owner-2')}"}
+
+    mine = [
+        client.post(
+            f"{api_version_prefix()}/shorten",
+            json={"url": f"https://example.com/batch/{i}"},
+            headers=owner_headers,
+        ).json()["code"]
+        for i in range(3)
+    ]
+    theirs = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": "https://example.com/batch/theirs"},
+        headers=other_headers,
+    ).json()["code"]
+
+    resp = client.patch(
+        f"{api_version_prefix()}/links/batch",
+        json={"codes": [*mine, theirs, "missing1"], "is_active": False},
+        headers=owner_headers,
+    )
+    assert resp.status_code == 200
+    data = resp.json()
+    assert data["updated"] == 3
+    assert all(data["results"][code] == "updated" for code in mine)
+    assert data["results"][theirs] == "forbidden"
+    assert data["results"]["missing1"] == "not_found"
+
+    for code in mine:
+        assert client.get(f"/{code}", follow_redirects=False).status_code == 404
+    assert client.get(f"/{theirs}", follow_redirects=False).status_code == 307
+
+
+def test_links_batch_by_filter_only_touches_owned_links(
+    client: TestClient, restore_auth_settings
+):
+    _set_auth(True)
+
+    owner_headers = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+    other_headers = {"Authorization": f"Bearer {_make_token(sub='owner-2')}"}
+
+    def shorten(headers, tag):
+        return client.post(
+            f"{api_version_prefix()}/shorten",
+            json={"url": "https://example.com/tagged", "extras": {"tag": tag}},
+            headers=headers,
+        ).json()["code"]
+
+    tagged = shorten(owner_headers, "summer-sale")
+    untagged = shorten(owner_headers, "evergreen")
+    foreign = shorten(other_headers, "summer-sale")
+
+    expires_at = (datetime.now(timezone.utc) + timedelta(days=7)).isoformat()
+    resp = client.patch(
+        f"{api_version_prefix()}/links/batch",
+        json={"filter": {"tag": "summer-sale"}, "expires_at": expires_at},
+        headers=owner_headers,
+    )
+    assert resp.status_code == 200
+    assert resp.json()["results"] == {tagged: "updated"}
+
+    stats = client.get(
+        f"{api_version_prefix()}/stats/{tagged}", headers=owner_headers
+    ).json()
+    assert stats["expires_at"] is not None
+    stats = client.get(
+        f"{api_version_prefix()}/stats/{untagged}", headers=owner_headers
+    ).json()
+    assert stats["expires_at"] is None
+    assert foreign not in resp.json()["results"]
+
+
+def test_links_batch_requires_codes_or_filter(
+    client: TestClient, restore_auth_settings
+):
+    _set_auth(True)
+    headers = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+
+    resp = client.patch(
+        f"{api_version_prefix()}/links/batch",
+        json={"is_active": False},
+        headers=headers,
+    )
+    assert resp.status_code == 400
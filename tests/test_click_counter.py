@@ -0,0 +1,87 @@
+import threading
+from contextlib import nullcontext
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.api.helpers import api_version_prefix
+from app.click_counter import compact_clicks, increment, pending_clicks
+from app.core.config import settings
+from app.models import ClickShard, ShortUrl
+from tests.conftest import client, db_session, engine
+
+
+@pytest.fixture()
+def click_shards_enabled():
+    original = (settings.CLICK_SHARDS_ENABLED, settings.AUTH_ENABLED)
+    settings.CLICK_SHARDS_ENABLED = True
+    settings.AUTH_ENABLED = False
+    yield
+    settings.CLICK_SHARDS_ENABLED, settings.AUTH_ENABLED = original
+
+
+def test_stats_include_clicks_not_yet_compacted(
+    client: TestClient, db_session, click_shards_enabled
+):
+    db_session.add(ShortUrl(code="SHARD1", original_url="https://example.com/s"))
+    db_session.commit()
+
+    for _ in range(5):
+        assert client.get("/SHARD1", follow_redirects=False).status_code == 307
+
+    short = db_session.execute(select(ShortUrl).where(ShortUrl.code == "SHARD1"))
+    assert short.scalar_one().clicks == 0
+    assert pending_clicks(db_session, ["SHARD1"]) == {"SHARD1": 5}
+
+    stats = client.get(f"{api_version_prefix()}/stats/SHARD1").json()
+    assert stats["clicks"] == 5
+
+    assert compact_clicks(lambda: nullcontext(db_session)) == 5
+    assert pending_clicks(db_session, ["SHARD1"]) == {}
+    stats = client.get(f"{api_version_prefix()}/stats/SHARD1").json()
+    assert stats["clicks"] == 5
+
+
+def test_no_increments_are_lost_while_compacting():
+    Session = sessionmaker(bind=engine)
+    with Session() as db:
+        db.add(ShortUrl(code="SHARDC", original_url="https://example.com/c"))
+        db.commit()
+
+    threads, per_thread = 8, 50
+    done = threading.Event()
+
+    def click():
+        with Session() as db:
+            for _ in range(per_thread):
+                increment(db, "SHARDC")
+                db.commit()
+
+    def compact():
+        while not done.is_set():
+            compact_clicks(Session)
+
+    compactor = threading.Thread(target=compact)
+    workers = [threading.Thread(target=click) for _ in range(threads)]
+    compactor.start()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    done.set()
+    compactor.join()
+
+    try:
+        with Session() as db:
+            clicks = db.execute(
+                select(ShortUrl.clicks).where(ShortUrl.code == "SHARDC")
+            ).scalar_one()
+            pending = pending_clicks(db, ["SHARDC"]).get("SHARDC", 0)
+            assert clicks + pending == threads * per_thread
+    finally:
+        with Session() as db:
+            db.execute(delete(ShortUrl).where(ShortUrl.code == "SHARDC"))
+            db.execute(delete(ClickShard).where(ClickShard.code == "SHARDC"))
+            db.commit()
@@ -0,0 +1,82 @@
+from fastapi.testclient import TestClient
+
+from app.api.helpers import api_version_prefix
+from tests.conftest import client
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+
+def _service_headers(client_id: str = "billing-svc") -> dict:
+    return {"Authorization": f"Bearer {_make_token(sub='', client_id=client_id)}"}
+
+
+def _shorten(client: TestClient, headers: dict, url: str, extras=None) -> str:
+    resp = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": url, "extras": extras},
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    return resp.json()["code"]
+
+
+def test_client_urls_keyset_pagination(client: TestClient, restore_auth_settings):
+    _set_auth(True)
+    headers = _service_headers()
+
+    created = [
+        _shorten(client, headers, f"https://example.com/svc/{i}") for i in range(5)
+    ]
+    _shorten(client, _service_headers("other-svc"), "https://example.com/other")
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        resp = client.get(
+            f"{api_version_prefix()}/clients/me/urls", params=params, headers=headers
+        )
+        assert resp.status_code == 200
+        data = resp.json()
+        assert len(data["items"]) <= 2
+        seen.extend(item["code"] for item in data["items"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            break
+
+    # newest first, no duplicates, only this client's links
+    assert seen[: len(created)] == list(reversed(created))
+    assert len(seen) == len(set(seen))
+
+
+def test_client_urls_filters_on_extras(client: TestClient, restore_auth_settings):
+    _set_auth(True)
+    headers = _service_headers("crm-svc")
+
+    spring = _shorten(
+        client, headers, "https://example.com/a", {"campaign": "spring", "tag": "x"}
+    )
+    _shorten(client, headers, "https://example.com/b", {"campaign": "autumn"})
+
+    resp = client.get(
+        f"{api_version_prefix()}/clients/me/urls?extra=campaign:spring",
+        headers=headers,
+    )
+    assert resp.status_code == 200
+    items = resp.json()["items"]
+    assert [item["code"] for item in items] == [spring]
+    assert items[0]["extras"]["tag"] == "x"
+
+    resp = client.get(
+        f"{api_version_prefix()}/clients/me/urls?extra=owner:me", headers=headers
+    )
+    assert resp.status_code == 400
+
+
+def test_client_urls_rejects_user_tokens(client: TestClient, restore_auth_settings):
+    _set_auth(True)
+    headers = {"Authorization": f"Bearer {_make_token(sub='user-1')}"}
+
+    resp = client.get(f"{api_version_prefix()}/clients/me/urls", headers=headers)
+    assert resp.status_code == 403
@@ -0,0 +1,93 @@
+import math
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import pytest
+
+from app import metrics
+from app.api import helpers
+from app.api.helpers import CODE_ALPHABET, code_space, generate_code
+from app.code_space import CodeSpace, read_counts, reconcile, record_codes
+from app.core.config import settings
+from app.models import ArchivedShortUrl, ShortUrl
+from tests.conftest import db_session
+
+
+@pytest.fixture()
+def fresh_code_space():
+    yield
+    code_space.seed({})
+
+
+def test_length_grows_with_occupancy(db_session):
+    space = CodeSpace(len(CODE_ALPHABET))
+    size_6 = len(CODE_ALPHABET) ** 6
+
+    space.seed({6: math.ceil(size_6 * settings.CODE_COLLISION_THRESHOLD) - 1})
+    assert space.length() == 6
+
+    space.issued(6)
+    assert space.length() == 7
+    assert metrics.snapshot()["gauges"]["codes.length"] == 7
+
+
+def test_length_never_queries_the_database(db_session):
+    space = CodeSpace(len(CODE_ALPHABET))
+    # no seed and no session: starts at the minimum until the first refresh
+    assert space.length() == settings.CODE_MIN_LENGTH
+
+
+def test_new_links_are_counted(db_session):
+    before = read_counts(db_session)
+    record_codes(db_session, ["abcdefg", "abcdefh", "abcdefgh"])
+    record_codes(db_session, ["abcdefi"])
+    db_session.commit()
+
+    after = read_counts(db_session)
+    assert after[7] - before.get(7, 0) == 3
+    assert after[8] - before.get(8, 0) == 1
+
+
+def test_refresh_reads_the_counts(db_session):
+    record_codes(db_session, ["abcdefg"])
+    db_session.commit()
+
+    space = CodeSpace(len(CODE_ALPHABET))
+    space.refresh(lambda: nullcontext(db_session))
+    assert space.occupancy(7) == read_counts(db_session)[7] / len(CODE_ALPHABET) ** 7
+
+
+def test_reconcile_counts_both_tiers(db_session):
+    before = reconcile(db_session)
+    db_session.add(ShortUrl(code="abcdefg", original_url="https://example.com/1"))
+    db_session.add(
+        ArchivedShortUrl(
+            id=999_999,
+            code="abcdefh",
+            original_url="https://example.com/2",
+            created_at=datetime(2020, 1, 1, tzinfo=timezone.utc),
+        )
+    )
+    # drifted counts are replaced
+    record_codes(db_session, ["abcdefghij"])
+    db_session.commit()
+
+    after = reconcile(db_session)
+    assert after[7] == before.get(7, 0) + 2
+    assert after.get(10, 0) == before.get(10, 0)
+    assert read_counts(db_session) == after
+
+
+def test_repeated_collisions_move_to_a_longer_code(
+    db_session, monkeypatch, fresh_code_space
+):
+    code_space.seed({})
+    taken = iter([True] * settings.CODE_MAX_ATTEMPTS_PER_LENGTH)
+    monkeypatch.setattr(helpers, "_code_taken", lambda db, code: next(taken, False))
+
+    before = metrics.snapshot()["counters"].get("codes.collisions", 0)
+    code = generate_code(db_session)
+
+    assert len(code) == settings.CODE_MIN_LENGTH + 1
+    after = metrics.snapshot()["counters"]["codes.collisions"]
+    assert after - before == settings.CODE_MAX_ATTEMPTS_PER_LENGTH
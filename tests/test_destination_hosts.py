@@ -0,0 +1,96 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.helpers import api_version_prefix, destination_host
+from app.core.config import settings
+from app.models import ShortUrl
+from app.owner_stats import CLIENT, get_owner_stats, reconcile
+from app.redirect_cache import get_redirect_cache
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+from tests.test_redirect_cache import cache_path, shared_cache_enabled
+
+
+@pytest.fixture()
+def admin_headers(restore_auth_settings):
+    original = settings.ADMIN_USER_IDS
+    settings.ADMIN_USER_IDS = ["admin-1"]
+    _set_auth(True)
+    yield {"Authorization": f"Bearer {_make_token(sub='admin-1')}"}
+    settings.ADMIN_USER_IDS = original
+
+
+@pytest.mark.parametrize(
+    "url, host",
+    [
+        ("https://Example.COM/path", "example.com"),
+        ("https://user:pw@www.example.com.:8443/x?q=1", "www.example.com"),
+        ("https://bücher.de/", "xn--bcher-kva.de"),
+        ("http://[2001:db8::1]:80/", "2001:db8::1"),
+    ],
+)
+def test_destination_host_is_normalized(url, host):
+    assert destination_host(url) == host
+
+
+def test_shorten_stores_destination_host(client: TestClient, db_session):
+    resp = client.post(
+        f"{api_version_prefix()}/shorten", json={"url": "https://Docs.Example.org/a"}
+    )
+    code = resp.json()["code"]
+    short = db_session.query(ShortUrl).filter(ShortUrl.code == code).one()
+    assert short.destination_host == "docs.example.org"
+
+
+def test_admin_takedown_by_host(
+    client: TestClient, db_session, shared_cache_enabled, admin_headers
+):
+    for i in range(5):
+        db_session.add(
+            ShortUrl(
+                code=f"EVILH{i}",
+                original_url=f"https://evil.example/{i}",
+                destination_host="evil.example",
+                owner_client_id="takedown-client",
+                is_active=i != 0,
+            )
+        )
+    db_session.add(
+        ShortUrl(
+            code="GOODH1",
+            original_url="https://good.example/",
+            destination_host="good.example",
+        )
+    )
+    db_session.commit()
+    reconcile(db_session)
+
+    assert client.get("/EVILH1", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get("EVILH1") is not None
+
+    prefix = f"{api_version_prefix()}/admin/hosts"
+    user = {"Authorization": f"Bearer {_make_token(sub='user-1')}"}
+    assert client.get(f"{prefix}/evil.example/count", headers=user).status_code == 403
+
+    count = client.get(f"{prefix}/EVIL.example./count", headers=admin_headers).json()
+    assert count == {"host": "evil.example", "links": 5, "active_links": 4}
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+        page = client.get(
+            f"{prefix}/evil.example/links", params=params, headers=admin_headers
+        ).json()
+        seen += [item["code"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == [f"EVILH{i}" for i in reversed(range(5))]
+
+    resp = client.post(f"{prefix}/evil.example/deactivate", headers=admin_headers)
+    assert resp.json() == {"host": "evil.example", "deactivated": 4}
+
+    assert get_redirect_cache().get("EVILH1") is None
+    assert client.get("/EVILH1", follow_redirects=False).status_code == 404
+    assert client.get("/GOODH1", follow_redirects=False).status_code == 307
+    assert get_owner_stats(db_session, CLIENT, "takedown-client")["active_links"] == 0
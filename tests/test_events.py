@@ -0,0 +1,157 @@
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app import events
+from app.api.helpers import api_version_prefix
+from app.core.config import Settings, settings
+from app.events import (
+    DROP_OLDEST,
+    LINK_CLICKED,
+    LINK_CREATED,
+    EventDispatcher,
+    parse_destinations,
+)
+from app.group_commit import add_links
+from app.models import OutboundEvent, ShortUrl
+from tests.conftest import client, db_session, engine
+from tests.event_sink import EventSink
+
+
+@pytest.fixture()
+def sink():
+    with EventSink() as sink:
+        yield sink
+
+
+def _dispatcher(db_session, spec: str, **kwargs) -> EventDispatcher:
+    return EventDispatcher(
+        lambda **_: nullcontext(db_session), parse_destinations(spec), **kwargs
+    )
+
+
+@pytest.fixture()
+def events_enabled():
+    original = settings.EVENTS_ENABLED
+    settings.EVENTS_ENABLED = True
+    yield
+    events._dispatcher = None
+    settings.EVENTS_ENABLED = original
+
+
+@pytest.fixture(autouse=True)
+def empty_outbox():
+    # link.created rows are written by the request's own session and can
+    # outlive the test transaction; autouse runs before db_session opens
+    with engine.begin() as conn:
+        conn.execute(delete(OutboundEvent))
+
+
+def test_parse_destinations():
+    parsed = parse_destinations(
+        "analytics:link.created+link.clicked=http://a.example/hook?x=1,"
+        " crm:link.created=http://crm.example/"
+    )
+    assert parsed["analytics"].url == "http://a.example/hook?x=1"
+    assert parsed["analytics"].event_types == {LINK_CREATED, LINK_CLICKED}
+    assert parsed["crm"].event_types == {LINK_CREATED}
+
+
+@pytest.mark.parametrize(
+    "overflow, kept", [("drop_new", [0, 1]), (DROP_OLDEST, [1, 2])]
+)
+def test_full_queue_drops_without_blocking(overflow, kept):
+    dispatcher = EventDispatcher(
+        None,
+        parse_destinations("a:link.clicked=http://unused/"),
+        queue_size=2,
+        overflow=overflow,
+    )
+    results = [dispatcher.emit(LINK_CLICKED, {"n": n}) for n in range(3)]
+    assert results.count(True) == (2 if overflow == "drop_new" else 3)
+    assert [payload["n"] for _, payload, _ in dispatcher._drain()] == kept
+    # nobody subscribes to this type: not even queued
+    assert not dispatcher.emit(LINK_CREATED, {})
+
+
+def test_events_are_batched_per_destination(
+    client: TestClient, db_session, sink, events_enabled
+):
+    with EventSink() as crm:
+        events._dispatcher = _dispatcher(
+            db_session,
+            f"analytics:link.created+link.clicked={sink.url},"
+            f"crm:link.created={crm.url}",
+        )
+        resp = client.post(
+            f"{api_version_prefix()}/shorten", json={"url": "https://example.com/ev"}
+        )
+        code = resp.json()["code"]
+        for _ in range(3):
+            client.get(f"/{code}", follow_redirects=False)
+
+        events._dispatcher.flush()
+
+        received = sink.events()
+        assert [e["type"] for e in received] == [LINK_CREATED] + [LINK_CLICKED] * 3
+        assert received[0]["payload"]["original_url"] == "https://example.com/ev"
+        assert len(sink.batches) == 1
+        assert [e["type"] for e in crm.events()] == [LINK_CREATED]
+    assert db_session.query(OutboundEvent).count() == 0
+
+
+def test_link_created_is_written_with_the_link(db_session, sink, events_enabled):
+    events._dispatcher = _dispatcher(db_session, f"analytics:link.created={sink.url}")
+    add_links(db_session, [ShortUrl(code="EVTTX1", original_url="https://tx.example/")])
+    db_session.commit()
+
+    # in the outbox with the link, nothing queued: a crash now loses nothing
+    assert events._dispatcher._queue.qsize() == 0
+    row = db_session.query(OutboundEvent).one()
+    assert (row.event_type, row.payload["code"]) == (LINK_CREATED, "EVTTX1")
+
+    # a fresh process delivers it
+    events._dispatcher = _dispatcher(db_session, f"analytics:link.created={sink.url}")
+    events._dispatcher.flush()
+    assert [e["payload"]["code"] for e in sink.events()] == ["EVTTX1"]
+
+
+def test_unknown_overflow_policy_is_rejected():
+    with pytest.raises(ValueError):
+        Settings(EVENT_OVERFLOW_POLICY="drop_all")
+    with pytest.raises(ValueError):
+        EventDispatcher(None, {}, overflow="drop_all")
+
+
+def test_failed_batches_are_retried_with_backoff(db_session, sink):
+    dispatcher = _dispatcher(
+        db_session, f"analytics:link.clicked={sink.url}", max_attempts=3
+    )
+    dispatcher.emit(LINK_CLICKED, {"code": "RETRY1"})
+    sink.fail_next(1)
+    now = datetime.now(timezone.utc)
+
+    dispatcher.flush(now)
+    row = db_session.query(OutboundEvent).one()
+    assert (row.attempts, row.last_error) == (
+        1,
+        "HTTPError: HTTP Error 503: Service Unavailable",
+    )
+    # not due yet
+    dispatcher.flush(now)
+    assert sink.events() == []
+
+    dispatcher.flush(now + timedelta(minutes=1))
+    assert [e["payload"] for e in sink.events()] == [{"code": "RETRY1"}]
+    assert db_session.query(OutboundEvent).count() == 0
+
+    # gives up after max_attempts
+    dispatcher.emit(LINK_CLICKED, {"code": "RETRY2"})
+    sink.fail_next(3)
+    for hours in range(1, 4):
+        dispatcher.flush(now + timedelta(hours=hours))
+    assert db_session.query(OutboundEvent).count() == 0
+    assert len(sink.events()) == 1
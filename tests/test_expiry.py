@@ -0,0 +1,94 @@
+import math
+import random
+from contextlib import nullcontext
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import expiry, metrics
+from app.core.config import settings
+from app.expiry import TimingWheel
+from app.models import ShortUrl
+from app.redirect_cache import get_redirect_cache
+from tests.conftest import client, db_session
+from tests.test_redirect_cache import cache_path, shared_cache_enabled
+
+
+@pytest.fixture()
+def expiry_wheel_enabled():
+    original = settings.EXPIRY_WHEEL_ENABLED, settings.EXPIRY_DEACTIVATE
+    settings.EXPIRY_WHEEL_ENABLED = True
+    settings.EXPIRY_DEACTIVATE = True
+    expiry._scheduler = None
+    yield
+    expiry._scheduler = None
+    settings.EXPIRY_WHEEL_ENABLED, settings.EXPIRY_DEACTIVATE = original
+
+
+def test_timing_wheel_fires_each_timer_on_its_first_tick():
+    rng = random.Random(7)
+    # small wheels so timers cascade through every level and past the top
+    wheel = TimingWheel(tick=0.5, start=0.0, slots=4, levels=2)
+    now = 0.0
+    due = {}
+    for step in range(400):
+        for _ in range(rng.randint(0, 3)):
+            key = rng.randrange(60)
+            when = now + rng.uniform(-1, 40)
+            wheel.schedule(key, when)
+            # never before `when`, and not in a tick already processed
+            due[key] = max(math.ceil(when / 0.5), int(now // 0.5) + 1)
+        if rng.random() < 0.2 and due:
+            key = rng.choice(sorted(due))
+            wheel.cancel(key)
+            del due[key]
+
+        now += rng.uniform(0, 3)
+        fired = dict(wheel.advance(now))
+        expected = {key for key, tick in due.items() if tick <= int(now // 0.5)}
+        assert set(fired) == expected
+        assert all(when <= now for when in fired.values())
+        for key in expected:
+            del due[key]
+        assert len(wheel) == len(due)
+
+
+def test_expired_links_are_evicted_and_deactivated(
+    client: TestClient, db_session, shared_cache_enabled, expiry_wheel_enabled
+):
+    expires_at = datetime.now(timezone.utc) + timedelta(minutes=5)
+    db_session.add(
+        ShortUrl(
+            code="EXPWHL1",
+            original_url="https://expiring.example/",
+            expires_at=expires_at,
+            is_active=True,
+        )
+    )
+    db_session.commit()
+
+    assert client.get("/EXPWHL1", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get("EXPWHL1") is not None
+    scheduler = expiry.get_scheduler()
+    assert len(scheduler) == 1
+
+    session_factory = lambda: nullcontext(db_session)
+    assert scheduler.tick(session_factory) == []
+    assert get_redirect_cache().get("EXPWHL1") is not None
+
+    later = expires_at.timestamp() + 1
+    assert scheduler.tick(session_factory, now=later) == ["EXPWHL1"]
+    assert get_redirect_cache().get("EXPWHL1") is None
+    assert len(scheduler) == 0
+    assert metrics.snapshot()["gauges"]["expiry.pending_timers"] == 0
+    # not yet expired in the database's eyes: still active
+    short = db_session.query(ShortUrl).filter(ShortUrl.code == "EXPWHL1").one()
+    db_session.refresh(short)
+    assert short.is_active
+
+    short.expires_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db_session.commit()
+    assert expiry.deactivate_expired(db_session, ["EXPWHL1"]) == 1
+    db_session.refresh(short)
+    assert not short.is_active
@@ -0,0 +1,159 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import sessionmaker
+
+from app import group_commit
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.database import get_db, lazy_db
+from app.group_commit import GroupCommitWriter
+from app.main import app
+from app.models import ShortUrl
+from tests.conftest import SQLALCHEMY_DATABASE_URL, client, db_session, engine
+
+Session = sessionmaker(bind=engine)
+
+
+@pytest.fixture()
+def writer():
+    writer = GroupCommitWriter(Session, max_batch=50, max_delay=0.05)
+    yield writer
+    writer.stop()
+    with Session() as db:
+        db.execute(delete(ShortUrl).where(ShortUrl.code.like("GC%")))
+        db.commit()
+
+
+def _values(code: str) -> dict:
+    return {"code": code, "original_url": f"https://example.com/{code}"}
+
+
+def test_concurrent_submits_share_transactions(writer):
+    commits = []
+    original = writer._insert
+
+    def counting_insert(batch):
+        commits.append(len(batch))
+        original(batch)
+
+    writer._insert = counting_insert
+    results = {}
+
+    def submit(i):
+        results[i] = writer.submit(_values(f"GCC{i:03d}"))
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(short.code for short in results.values()) == [
+        f"GCC{i:03d}" for i in range(20)
+    ]
+    assert all(short.id for short in results.values())
+    assert sum(commits) == 20
+    assert len(commits) < 20
+
+    with Session() as db:
+        count = db.execute(
+            select(func.count()).where(ShortUrl.code.like("GCC%"))
+        ).scalar_one()
+    assert count == 20
+
+
+def test_collision_only_fails_its_own_request(writer):
+    writer.submit(_values("GCDUP1"))
+
+    outcomes = {}
+
+    def submit(code):
+        try:
+            outcomes[code] = writer.submit(_values(code)).code
+        except IntegrityError:
+            outcomes[code] = "collision"
+
+    codes = ["GCDUP1", "GCOK01", "GCOK02"]
+    threads = [threading.Thread(target=submit, args=(code,)) for code in codes]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert outcomes == {"GCDUP1": "collision", "GCOK01": "GCOK01", "GCOK02": "GCOK02"}
+
+
+def test_shorten_goes_through_the_writer(client: TestClient, writer, monkeypatch):
+    monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", True)
+    monkeypatch.setattr(group_commit, "_writer", writer)
+    monkeypatch.setattr(
+        "app.api.shortener.generate_code", lambda db: "GCAPI1", raising=True
+    )
+
+    resp = client.post(
+        f"{api_version_prefix()}/shorten", json={"url": "https://example.com/gc"}
+    )
+    assert resp.status_code == 200
+    assert resp.json()["code"] == "GCAPI1"
+
+    with Session() as db:
+        short = db.execute(select(ShortUrl).where(ShortUrl.code == "GCAPI1"))
+        assert short.scalar_one().original_url == "https://example.com/gc"
+
+
+def test_waiting_requests_do_not_starve_the_writer_of_connections(
+    client: TestClient, monkeypatch
+):
+    # two request threads and one writer share a pool of two connections
+    small_engine = create_engine(
+        SQLALCHEMY_DATABASE_URL,
+        connect_args={"check_same_thread": False},
+        pool_size=2,
+        max_overflow=0,
+        pool_timeout=1,
+    )
+    SmallSession = sessionmaker(bind=small_engine)
+    writer = GroupCommitWriter(SmallSession, max_batch=2, max_delay=0.5)
+    monkeypatch.setattr(settings, "GROUP_COMMIT_ENABLED", True)
+    monkeypatch.setattr(group_commit, "_writer", writer)
+    app.dependency_overrides[get_db] = lambda: (yield from lazy_db(SmallSession))
+
+    responses = []
+
+    def shorten(i):
+        responses.append(
+            client.post(
+                f"{api_version_prefix()}/shorten",
+                json={"url": f"https://example.com/pool{i}"},
+            )
+        )
+
+    threads = [threading.Thread(target=shorten, args=(i,)) for i in range(2)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    finally:
+        writer.stop()
+
+    assert [resp.status_code for resp in responses] == [200, 200]
+    with Session() as db:
+        db.execute(
+            delete(ShortUrl).where(
+                ShortUrl.code.in_([resp.json()["code"] for resp in responses])
+            )
+        )
+        db.commit()
+    small_engine.dispose()
+
+
+def test_submit_times_out_instead_of_hanging():
+    writer = GroupCommitWriter(Session, submit_timeout=0.05)
+    writer.start = lambda: None  # writer thread never runs
+    with pytest.raises(group_commit.GroupCommitTimeout):
+        writer.submit(_values("GCTIME"))
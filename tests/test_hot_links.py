@@ -0,0 +1,111 @@
+import random
+from collections import Counter
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.hot_links import SpaceSaving, report_hot_links, top_hot_links, tracker
+from app.models import HotLinkReport, ShortUrl
+from app.redirect_cache import get_redirect_cache
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+from tests.test_redirect_cache import cache_path, shared_cache_enabled
+
+
+@pytest.fixture()
+def hot_links_enabled():
+    original = (settings.HOT_LINKS_ENABLED, settings.ADMIN_USER_IDS)
+    settings.HOT_LINKS_ENABLED = True
+    settings.ADMIN_USER_IDS = ["admin-1"]
+    tracker.rotate()
+    yield
+    settings.HOT_LINKS_ENABLED, settings.ADMIN_USER_IDS = original
+
+
+def test_space_saving_is_exact_below_capacity():
+    summary = SpaceSaving(capacity=10)
+    for code in ["a", "b", "a", "c", "a", "b"]:
+        summary.add(code)
+    assert summary.top() == [("a", 3, 0), ("b", 2, 0), ("c", 1, 0)]
+
+
+def test_space_saving_finds_heavy_hitters_in_constant_space():
+    rng = random.Random(7)
+    stream = [f"hot{i}" for i in range(5) for _ in range(2000)]
+    stream += [f"cold{rng.randrange(50_000)}" for _ in range(20_000)]
+    rng.shuffle(stream)
+
+    summary = SpaceSaving(capacity=100)
+    for code in stream:
+        summary.add(code)
+
+    assert len(summary) == 100
+    truth = Counter(stream)
+    top = summary.top(5)
+    assert {code for code, _, _ in top} == {f"hot{i}" for i in range(5)}
+    for code, count, error in top:
+        assert count - error <= truth[code] <= count
+
+
+def test_reports_from_workers_are_merged(db_session):
+    now = datetime.now(timezone.utc)
+    db_session.add_all(
+        [
+            HotLinkReport(
+                worker_id="w1",
+                reported_at=now,
+                window_seconds=10,
+                total=150,
+                full=False,
+                entries=[["HOTAA1", 100, 0], ["HOTBB2", 50, 0]],
+            ),
+            HotLinkReport(
+                worker_id="w2",
+                reported_at=now,
+                window_seconds=10,
+                total=80,
+                full=True,
+                entries=[["HOTBB2", 70, 5], ["HOTCC3", 10, 2]],
+            ),
+        ]
+    )
+    db_session.commit()
+
+    top = top_hot_links(db_session, 2)
+    assert [item["code"] for item in top] == ["HOTBB2", "HOTAA1"]
+    assert top[0]["rate"] == pytest.approx(12.0)
+    assert top[0]["error"] == pytest.approx(0.5)
+    # missing from w2's full report: it may have had up to 10 hits there
+    assert top[1]["error"] == pytest.approx(1.0)
+
+
+def test_admin_hot_endpoint_and_cache_warming(
+    client: TestClient,
+    db_session,
+    restore_auth_settings,
+    hot_links_enabled,
+    shared_cache_enabled,
+):
+    _set_auth(True)
+    db_session.add(ShortUrl(code="HOTWM1", original_url="https://example.com/hot"))
+    db_session.commit()
+
+    for _ in range(3):
+        client.get("/HOTWM1", follow_redirects=False)
+    get_redirect_cache().clear()
+
+    report_hot_links(lambda: nullcontext(db_session))
+    assert get_redirect_cache().get("HOTWM1") is not None
+
+    url = f"{api_version_prefix()}/admin/hot"
+    user = {"Authorization": f"Bearer {_make_token(sub='user-1')}"}
+    assert client.get(url, headers=user).status_code == 403
+
+    admin = {"Authorization": f"Bearer {_make_token(sub='admin-1')}"}
+    resp = client.get(url, headers=admin)
+    assert resp.status_code == 200
+    assert resp.json()["items"][0]["code"] == "HOTWM1"
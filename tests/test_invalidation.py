@@ -0,0 +1,129 @@
+from contextlib import nullcontext
+from datetime import datetime, timezone
+
+import pytest
+
+from app import metrics
+from app.core.config import settings
+from app.invalidation import (
+    PollingTransport,
+    PostgresNotifyTransport,
+    _notify_payloads,
+    evict_local,
+    publish_invalidation,
+    register_evictor,
+)
+from app.models import LinkChange
+from tests.conftest import db_session
+
+evicted = []
+
+
+def _record_eviction(codes):
+    evicted.extend(codes)
+
+
+register_evictor(_record_eviction)
+
+
+@pytest.fixture(autouse=True)
+def invalidation_enabled():
+    original = settings.INVALIDATION_ENABLED
+    settings.INVALIDATION_ENABLED = True
+    evicted.clear()
+    yield
+    settings.INVALIDATION_ENABLED = original
+
+
+def test_polling_transport_evicts_published_codes(db_session):
+    transport = PollingTransport(lambda: nullcontext(db_session), interval=1.0)
+    transport.last_version = 0
+    transport.poll()
+    evicted.clear()
+
+    publish_invalidation(db_session, ["AAA111", "BBB222", "AAA111"])
+    db_session.commit()
+
+    assert transport.poll() == 2
+    assert evicted == ["AAA111", "BBB222"]
+
+    # nothing new since the last seen version
+    evicted.clear()
+    assert transport.poll() == 0
+    assert evicted == []
+
+    lag = metrics.snapshot()["observations"]["invalidation.lag_seconds"]
+    assert lag["count"] >= 2
+    assert lag["max"] < 60
+
+
+def _add_change(db_session, version, code):
+    db_session.add(
+        LinkChange(id=version, code=code, changed_at=datetime.now(timezone.utc))
+    )
+    db_session.commit()
+
+
+def test_polling_transport_picks_up_versions_committed_out_of_order(db_session):
+    transport = PollingTransport(lambda: nullcontext(db_session), interval=1.0)
+    transport.last_version = 0
+    transport.poll()
+    evicted.clear()
+    version = transport.last_version
+
+    # two writers: the higher version commits (and is read) first
+    _add_change(db_session, version + 2, "HIGH01")
+    assert transport.poll() == 1
+    _add_change(db_session, version + 1, "LOW001")
+
+    assert transport.poll() == 1
+    assert evicted == ["HIGH01", "LOW001"]
+    assert transport.poll() == 0
+
+
+def test_skipped_versions_are_given_up_after_the_timeout(db_session):
+    transport = PollingTransport(
+        lambda: nullcontext(db_session), interval=1.0, gap_timeout=-1.0
+    )
+    transport.last_version = 0
+    transport.poll()
+    evicted.clear()
+    version = transport.last_version
+
+    _add_change(db_session, version + 2, "HIGH02")
+    assert transport.poll() == 1
+    assert metrics.snapshot()["gauges"]["invalidation.open_gaps"] == 0
+
+    # committed too late to be seen
+    _add_change(db_session, version + 1, "LOW002")
+    assert transport.poll() == 0
+    assert evicted == ["HIGH02"]
+
+
+def test_publish_is_noop_when_disabled(db_session):
+    settings.INVALIDATION_ENABLED = False
+    transport = PollingTransport(lambda: nullcontext(db_session), interval=1.0)
+    transport.last_version = 0
+    transport.poll()
+
+    publish_invalidation(db_session, ["CCC333"])
+    db_session.commit()
+
+    assert transport.poll() == 0
+
+
+def test_evict_local_runs_registered_evictors():
+    evict_local(["DDD444"])
+    assert evicted == ["DDD444"]
+
+
+def test_notify_payloads_are_chunked_and_split_by_the_listener():
+    codes = [f"CODE{i:06d}" for i in range(2000)]
+    payloads = _notify_payloads(codes, 1_700_000_000.5)
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) < 8000 for payload in payloads)
+
+    listener = PostgresNotifyTransport("postgresql://unused", catch_up=None)
+    for payload in payloads:
+        listener._handle(payload)
+    assert evicted == codes
@@ -0,0 +1,137 @@
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec, rsa
+from fastapi import HTTPException
+from jwt.algorithms import ECAlgorithm, RSAAlgorithm
+
+from app.core.config import settings
+from app.jwks import JWKSKeySet, get_key_set, reset_key_set
+from app.security import decode_access_token
+from tests.test_auth_behavior import _set_auth, restore_auth_settings
+
+RSA_KEY = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+EC_KEY = ec.generate_private_key(ec.SECP256R1())
+
+
+def _jwk(private_key, kid: str) -> dict:
+    if isinstance(private_key, rsa.RSAPrivateKey):
+        data = RSAAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        data["alg"] = "RS256"
+    else:
+        data = ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+        data["alg"] = "ES256"
+    return {**data, "kid": kid, "use": "sig"}
+
+
+def _token(private_key, kid: str, algorithm: str, sub: str = "user-1") -> str:
+    now = datetime.now(timezone.utc)
+    payload = {
+        "sub": sub,
+        "iat": int(now.timestamp()),
+        "exp": int((now + timedelta(minutes=5)).timestamp()),
+        "iss": settings.JWT_ISSUER,
+        "aud": "shortener-service",
+    }
+    return jwt.encode(payload, private_key, algorithm=algorithm, headers={"kid": kid})
+
+
+class _JWKSServer:
+    """Serves a mutable JWKS document on localhost and counts fetches."""
+
+    def __init__(self, keys):
+        self.document = {"keys": keys}
+        self.hits = 0
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.hits += 1
+                body = json.dumps(server.document).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/.well-known/jwks.json"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture()
+def jwks_server():
+    server = _JWKSServer([_jwk(RSA_KEY, "rsa-1"), _jwk(EC_KEY, "ec-1")])
+    yield server
+    server.close()
+
+
+@pytest.fixture()
+def jwks_auth(jwks_server, restore_auth_settings):
+    original = (settings.JWT_JWKS_SOURCE, settings.JWT_JWKS_MIN_REFRESH_SECONDS)
+    _set_auth(True)
+    settings.JWT_JWKS_SOURCE = jwks_server.url
+    settings.JWT_JWKS_MIN_REFRESH_SECONDS = 60
+    reset_key_set()
+    yield jwks_server
+    settings.JWT_JWKS_SOURCE, settings.JWT_JWKS_MIN_REFRESH_SECONDS = original
+    reset_key_set()
+
+
+def test_rs256_and_es256_tokens_verify_without_refetching(jwks_auth):
+    for _ in range(3):
+        assert decode_access_token(_token(RSA_KEY, "rsa-1", "RS256"))["sub"] == "user-1"
+        assert decode_access_token(_token(EC_KEY, "ec-1", "ES256"))["sub"] == "user-1"
+    assert jwks_auth.hits == 1
+
+
+def test_shared_secret_tokens_are_rejected(jwks_auth):
+    token = jwt.encode(
+        {"sub": "user-1"},
+        settings.JWT_SECRET_KEY,
+        algorithm="HS256",
+        headers={"kid": "rsa-1"},
+    )
+    with pytest.raises(HTTPException) as exc:
+        decode_access_token(token)
+    assert exc.value.status_code == 401
+
+
+def test_unknown_kid_forces_one_rate_limited_refresh(jwks_auth):
+    get_key_set()
+    assert jwks_auth.hits == 1
+
+    rotated = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwks_auth.document["keys"].append(_jwk(rotated, "rsa-2"))
+    # the new kid is picked up by a forced refresh...
+    assert decode_access_token(_token(rotated, "rsa-2", "RS256"))["sub"] == "user-1"
+    assert jwks_auth.hits == 2
+
+    # ...but random kids can't trigger another fetch inside the window
+    for kid in ("nope-1", "nope-2", "nope-3"):
+        with pytest.raises(HTTPException):
+            decode_access_token(_token(rotated, kid, "RS256"))
+    assert jwks_auth.hits == 2
+
+
+def test_key_set_loads_from_a_file(tmp_path):
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [_jwk(EC_KEY, "ec-file")]}))
+
+    key_set = JWKSKeySet(str(path))
+    key_set.refresh()
+    assert key_set.get_signing_key("ec-file").key_id == "ec-file"
+    # a single key also serves tokens without a kid
+    assert key_set.get_signing_key(None).key_id == "ec-file"
@@ -0,0 +1,86 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.orm import sessionmaker
+
+from app import metrics
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.database import get_db, lazy_db
+from app.main import app
+from app.singleflight import redirect_lookups
+from tests.conftest import engine
+
+
+@pytest.fixture()
+def sessions_created():
+    """One entry per Session the lazy dependency opened."""
+    return []
+
+
+@pytest.fixture()
+def lazy_client(sessions_created):
+    """TestClient whose get_db is the real lazy dependency on the test engine."""
+    make_session = sessionmaker(bind=engine, autoflush=False)
+
+    def factory():
+        sessions_created.append(1)
+        return make_session()
+
+    def override_get_db():
+        yield from lazy_db(factory)
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    redirect_lookups.clear()
+
+
+@pytest.fixture()
+def pool_checkouts():
+    counter = {"n": 0}
+
+    def on_checkout(dbapi_connection, connection_record, connection_proxy):
+        counter["n"] += 1
+
+    event.listen(engine, "checkout", on_checkout)
+    yield counter
+    event.remove(engine, "checkout", on_checkout)
+
+
+@pytest.fixture()
+def rate_limited():
+    original = (settings.RATE_LIMIT_ENABLED, settings.RATE_LIMIT_REQUESTS)
+    settings.RATE_LIMIT_ENABLED = True
+    settings.RATE_LIMIT_REQUESTS = 0
+    yield
+    settings.RATE_LIMIT_ENABLED, settings.RATE_LIMIT_REQUESTS = original
+
+
+def test_rate_limited_shorten_uses_no_connection(
+    lazy_client, sessions_created, pool_checkouts, rate_limited
+):
+    resp = lazy_client.post(
+        f"{api_version_prefix()}/shorten", json={"url": "https://example.com"}
+    )
+    assert resp.status_code == 429
+    assert pool_checkouts["n"] == 0
+    assert sessions_created == []
+
+
+def test_remembered_404_uses_no_connection(
+    lazy_client, sessions_created, pool_checkouts
+):
+    before = metrics.snapshot()["counters"].get("db.requests_without_checkout", 0)
+
+    assert lazy_client.get("/LAZY01", follow_redirects=False).status_code == 404
+    assert pool_checkouts["n"] == 1
+
+    # answered from the negative cache: no Session, no connection
+    assert lazy_client.get("/LAZY01", follow_redirects=False).status_code == 404
+    assert pool_checkouts["n"] == 1
+    assert len(sessions_created) == 1
+
+    after = metrics.snapshot()["counters"]["db.requests_without_checkout"]
+    assert after - before == 1
+    assert metrics.snapshot()["observations"]["db.checkouts_per_request"]["count"]
@@ -0,0 +1,160 @@
+from contextlib import nullcontext
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, update
+
+from app.api.helpers import api_version_prefix
+from app.archive import archive_links, restore_link
+from app.click_counter import compact_clicks, increment
+from app.core.config import settings
+from app.models import OwnerStats, ShortUrl
+from app.owner_stats import CLIENT, USER, OwnerDeltas, get_owner_stats, reconcile
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+
+@pytest.fixture()
+def no_rate_limit():
+    original = settings.RATE_LIMIT_ENABLED
+    settings.RATE_LIMIT_ENABLED = False
+    yield
+    settings.RATE_LIMIT_ENABLED = original
+
+
+def _headers(sub: str, client_id: str = "stats-client") -> dict:
+    return {"Authorization": f"Bearer {_make_token(sub=sub, client_id=client_id)}"}
+
+
+def _summary(client: TestClient, headers: dict) -> dict:
+    resp = client.get(f"{api_version_prefix()}/me/summary", headers=headers)
+    assert resp.status_code == 200
+    return resp.json()
+
+
+def test_aggregates_follow_creates_and_status_changes(
+    client: TestClient, db_session, restore_auth_settings, no_rate_limit
+):
+    _set_auth(True)
+    owner = _headers("stats-user")
+    prefix = api_version_prefix()
+    codes = [
+        client.post(
+            f"{prefix}/shorten", json={"url": f"https://example.com/{i}"}, headers=owner
+        ).json()["code"]
+        for i in range(3)
+    ]
+
+    summary = _summary(client, owner)
+    assert summary == {
+        "owner_kind": "user",
+        "owner_id": "stats-user",
+        "links": 3,
+        "active_links": 3,
+        "clicks": 0,
+    }
+
+    client.patch(f"{prefix}/links/{codes[0]}", json={"is_active": False}, headers=owner)
+    client.delete(f"{prefix}/links/{codes[1]}", headers=owner)
+    # deleting an already inactive link is not counted twice
+    client.delete(f"{prefix}/links/{codes[0]}", headers=owner)
+    assert _summary(client, owner)["active_links"] == 1
+
+    for _ in range(2):
+        resp = client.patch(
+            f"{prefix}/links/batch",
+            json={"codes": codes, "is_active": True},
+            headers=owner,
+        )
+        assert resp.json()["updated"] == 3
+    assert _summary(client, owner)["active_links"] == 3
+
+    resp = client.get(f"{prefix}/me/urls", headers=owner)
+    assert resp.json()["total"] == 3
+
+    # service tokens (no sub) get their client's aggregate
+    service = _summary(client, _headers("", client_id="stats-client"))
+    assert service["owner_kind"] == "client"
+    assert service["links"] == 3
+
+
+def test_archive_restore_and_compaction_move_aggregates(db_session):
+    db_session.add(
+        ShortUrl(
+            code="OWNAR1",
+            original_url="https://example.com/a",
+            owner_client_id="own-client",
+            created_by_user_id="own-user",
+            is_active=False,
+            clicks=7,
+        )
+    )
+    db_session.commit()
+    reconcile(db_session)
+    assert get_owner_stats(db_session, USER, "own-user") == {
+        "links": 1,
+        "active_links": 0,
+        "clicks": 7,
+    }
+
+    archive_links(db_session)
+    assert get_owner_stats(db_session, USER, "own-user")["links"] == 0
+    assert get_owner_stats(db_session, CLIENT, "own-client")["clicks"] == 0
+
+    restore_link(db_session, "OWNAR1")
+    for _ in range(3):
+        increment(db_session, "OWNAR1")
+    db_session.commit()
+    compact_clicks(lambda: nullcontext(db_session))
+
+    assert get_owner_stats(db_session, USER, "own-user") == {
+        "links": 1,
+        "active_links": 0,
+        "clicks": 10,
+    }
+
+
+def test_reconcile_repairs_drift(db_session):
+    db_session.add(
+        ShortUrl(
+            code="OWNDR1",
+            original_url="https://example.com/d",
+            owner_client_id="drift-client",
+            is_active=True,
+        )
+    )
+    db_session.commit()
+    reconcile(db_session)
+
+    # changes that bypass the API leave the aggregate behind
+    db_session.execute(
+        update(ShortUrl).where(ShortUrl.code == "OWNDR1").values(clicks=42)
+    )
+    db_session.commit()
+    assert get_owner_stats(db_session, CLIENT, "drift-client")["clicks"] == 0
+
+    assert reconcile(db_session) >= 1
+    assert get_owner_stats(db_session, CLIENT, "drift-client") == {
+        "links": 1,
+        "active_links": 1,
+        "clicks": 42,
+    }
+    assert reconcile(db_session) == 0
+
+
+def test_deltas_spread_over_shards_and_sum_on_read(db_session):
+    for _ in range(20):
+        deltas = OwnerDeltas()
+        deltas.add(None, "shard-client", links=1, active=1)
+        deltas.apply(db_session)
+    db_session.commit()
+
+    rows = db_session.execute(
+        select(OwnerStats).where(OwnerStats.owner_id == "shard-client")
+    ).scalars()
+    assert len({row.shard for row in rows}) > 1
+    assert get_owner_stats(db_session, CLIENT, "shard-client") == {
+        "links": 20,
+        "active_links": 20,
+        "clicks": 0,
+    }
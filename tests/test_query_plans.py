@@ -0,0 +1,192 @@
+"""
+Query-plan regression tests: run the hot endpoints against a seeded database,
+capture the SQL they execute and fail if any statement plans a full table
+scan. SQLite always runs; Postgres runs when PLAN_TEST_POSTGRES_URL points at
+a scratch database (its tables are created, seeded and dropped).
+"""
+
+import os
+import re
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.api import helpers
+from app.api.helpers import api_version_prefix, generate_code
+from app.core.config import settings
+from app.database import Base, get_db
+from app.main import app
+from app.models import CodeLengthCount, ShortUrl
+from tests.data_generator import code_for, seed_database
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+PLAN_TEST_ROWS = int(os.getenv("PLAN_TEST_ROWS", "20000"))
+POSTGRES_URL = os.getenv("PLAN_TEST_POSTGRES_URL")
+
+# "SCAN t" or "SCAN t USING [COVERING] INDEX i": every row of t is read either way
+_SQLITE_SCAN = re.compile(r"SCAN (\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+_PG_SEQ_SCAN = re.compile(r"Seq Scan on (\w+)")
+
+# a few rows per code length by construction; read whole on purpose
+_BOUNDED_TABLES = {CodeLengthCount.__tablename__}
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        "sqlite",
+        pytest.param(
+            "postgresql",
+            marks=pytest.mark.skipif(
+                not POSTGRES_URL, reason="PLAN_TEST_POSTGRES_URL not set"
+            ),
+        ),
+    ],
+)
+def plan_engine(request, tmp_path_factory):
+    if request.param == "sqlite":
+        path = tmp_path_factory.mktemp("plans") / "plans.db"
+        engine = create_engine(
+            f"sqlite:///{path}", connect_args={"check_same_thread": False}
+        )
+    else:
+        engine = create_engine(POSTGRES_URL)
+
+    seed_database(engine, PLAN_TEST_ROWS)
+    yield engine
+
+    if request.param == "postgresql":
+        Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+
+@pytest.fixture()
+def plan_client(plan_engine):
+    Session = sessionmaker(bind=plan_engine, autoflush=False)
+
+    def override_get_db():
+        with Session() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@contextmanager
+def captured_sql(engine):
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "UPDATE"):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+
+def full_scans(engine, statements) -> list[str]:
+    """Tables each statement would read in full, as 'table: statement'."""
+    tables = set(Base.metadata.tables) - _BOUNDED_TABLES
+    found = []
+    with engine.connect() as conn:
+        for statement, parameters in statements:
+            if engine.dialect.name == "sqlite":
+                plan = conn.exec_driver_sql(
+                    f"EXPLAIN QUERY PLAN {statement}", parameters
+                ).all()
+                matches = [_SQLITE_SCAN.match(row[-1]) for row in plan]
+            else:
+                # with seq scans priced out, one still chosen means no usable index
+                conn.exec_driver_sql("SET enable_seqscan = off")
+                plan = conn.exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                matches = [_PG_SEQ_SCAN.search(line) for line in plan.scalars()]
+            found += [
+                f"{m.group(1)}: {statement}"
+                for m in matches
+                if m and m.group(1) in tables
+            ]
+    return found
+
+
+def _live_code(engine) -> str:
+    with engine.connect() as conn:
+        return conn.execute(
+            select(ShortUrl.code)
+            .where(ShortUrl.is_active.is_(True), ShortUrl.expires_at.is_(None))
+            .limit(1)
+        ).scalar_one()
+
+
+def test_detects_a_full_scan(plan_engine):
+    with captured_sql(plan_engine) as statements:
+        with plan_engine.connect() as conn:
+            conn.execute(text("SELECT id FROM shortener__short_urls WHERE clicks > 5"))
+    assert full_scans(plan_engine, statements)
+
+
+def test_detects_a_full_index_scan(plan_engine):
+    # walks the whole code index instead of seeking into it
+    with captured_sql(plan_engine) as statements:
+        with plan_engine.connect() as conn:
+            conn.execute(
+                text("SELECT count(*) FROM shortener__short_urls WHERE code LIKE '%a'")
+            )
+    assert full_scans(plan_engine, statements)
+
+
+def test_redirect_uses_indexes(plan_engine, plan_client):
+    code = _live_code(plan_engine)
+    with captured_sql(plan_engine) as statements:
+        resp = plan_client.get(f"/{code}", follow_redirects=False)
+    assert resp.status_code == 307
+    assert len(statements) >= 2
+    assert full_scans(plan_engine, statements) == []
+
+
+def test_get_stats_uses_indexes(plan_engine, plan_client):
+    with captured_sql(plan_engine) as statements:
+        plan_client.get(f"{api_version_prefix()}/stats/{code_for(123)}")
+    assert statements
+    assert full_scans(plan_engine, statements) == []
+
+
+def test_list_my_urls_uses_indexes(plan_engine, plan_client, restore_auth_settings):
+    _set_auth(True)
+    headers = {"Authorization": f"Bearer {_make_token(sub='user-1')}"}
+    with captured_sql(plan_engine) as statements:
+        resp = plan_client.get(f"{api_version_prefix()}/me/urls", headers=headers)
+    assert resp.status_code == 200
+    assert resp.json()["total"] > 0
+    assert full_scans(plan_engine, statements) == []
+
+
+def test_generate_code_uses_indexes(plan_engine):
+    Session = sessionmaker(bind=plan_engine)
+    with captured_sql(plan_engine) as statements:
+        # the background occupancy refresh as well as the per-code path
+        helpers.code_space.refresh(Session)
+        with Session() as db:
+            generate_code(db)
+    assert len(statements) >= 2
+    assert full_scans(plan_engine, statements) == []
+
+
+def test_host_lookups_use_indexes(
+    plan_engine, plan_client, restore_auth_settings, monkeypatch
+):
+    _set_auth(True)
+    monkeypatch.setattr(settings, "ADMIN_USER_IDS", ["admin-1"])
+    headers = {"Authorization": f"Bearer {_make_token(sub='admin-1')}"}
+    prefix = f"{api_version_prefix()}/admin/hosts/example7.com"
+    with captured_sql(plan_engine) as statements:
+        assert plan_client.get(f"{prefix}/count", headers=headers).json()["links"]
+        plan_client.get(f"{prefix}/links", headers=headers)
+    assert len(statements) == 2
+    assert full_scans(plan_engine, statements) == []
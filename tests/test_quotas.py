@@ -0,0 +1,98 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import quotas
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.quotas import Quota, QuotaTracker, parse_quotas
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+
+@pytest.fixture()
+def tenant_quotas():
+    original = settings.TENANT_QUOTAS_ENABLED, settings.TENANT_QUOTAS
+    settings.TENANT_QUOTAS_ENABLED = True
+    settings.TENANT_QUOTAS = "client:*=3/60:0,client:big-tenant=100/60:0"
+    quotas._tracker = None
+    yield
+    quotas._tracker = None
+    settings.TENANT_QUOTAS_ENABLED, settings.TENANT_QUOTAS = original
+
+
+def test_parse_quotas():
+    assert parse_quotas("user:*=60/60:1000, client:acme:eu=5/1") == {
+        ("user", "*"): Quota(60, 60, 1000),
+        ("client", "acme:eu"): Quota(5, 1, 0),
+    }
+
+
+def test_workers_share_usage_through_sync(db_session):
+    spec = {("client", "*"): Quota(requests=3, window_seconds=60, daily_links=4)}
+    worker_a, worker_b = QuotaTracker(spec), QuotaTracker(spec)
+    tenant = [("client", "noisy")]
+    now = 1_000_040.0  # 20s into a 60s window
+
+    assert worker_a.acquire(tenant, now)[0]
+    assert worker_a.acquire(tenant, now)[0]
+    assert worker_b.acquire(tenant, now)[0]
+    # neither has synced yet: each only knows its own count
+    assert worker_b.acquire(tenant, now)[0]
+
+    worker_a.sync(db_session, now)
+    worker_b.sync(db_session, now)
+    worker_a.sync(db_session, now)
+    admitted, state = worker_a.acquire(tenant, now)
+    assert not admitted
+    assert (state.limit, state.remaining, state.reset_seconds) == (3, 0, 40)
+    # other tenants are unaffected
+    assert worker_a.acquire([("client", "quiet")], now)[0]
+
+    # next rate window, but the daily cap (4) is used up
+    admitted, state = worker_a.acquire(tenant, now + 60)
+    assert not admitted and state.limit == 4
+
+
+def test_shorten_rejects_with_rate_limit_headers(
+    client: TestClient, db_session, restore_auth_settings, tenant_quotas
+):
+    _set_auth(True)
+    noisy = {"Authorization": f"Bearer {_make_token(sub='', client_id='noisy')}"}
+    big = {"Authorization": f"Bearer {_make_token(sub='', client_id='big-tenant')}"}
+    url = f"{api_version_prefix()}/shorten"
+
+    for remaining in (2, 1, 0):
+        resp = client.post(url, json={"url": "https://example.com/"}, headers=noisy)
+        assert resp.status_code == 200
+        assert resp.headers["RateLimit-Limit"] == "3"
+        assert resp.headers["RateLimit-Remaining"] == str(remaining)
+
+    resp = client.post(url, json={"url": "https://example.com/"}, headers=noisy)
+    assert resp.status_code == 429
+    assert resp.headers["RateLimit-Remaining"] == "0"
+    assert int(resp.headers["Retry-After"]) >= 1
+
+    resp = client.post(url, json={"url": "https://example.com/"}, headers=big)
+    assert resp.status_code == 200
+    assert resp.headers["RateLimit-Limit"] == "100"
+
+
+def test_users_on_one_client_have_separate_quotas(
+    client: TestClient, db_session, restore_auth_settings, tenant_quotas
+):
+    _set_auth(True)
+    settings.TENANT_QUOTAS = "user:*=2/60:0,client:*=3/60:0"
+    url = f"{api_version_prefix()}/shorten"
+
+    for sub in ("app-user-1", "app-user-2"):
+        headers = {
+            "Authorization": f"Bearer {_make_token(sub=sub, client_id='shared-app')}"
+        }
+        for _ in range(2):
+            resp = client.post(
+                url, json={"url": "https://example.com/"}, headers=headers
+            )
+            assert resp.status_code == 200
+            assert resp.headers["RateLimit-Limit"] == "2"
+        resp = client.post(url, json={"url": "https://example.com/"}, headers=headers)
+        assert resp.status_code == 429
@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api import redirect
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.redirect_cache import (
+    SharedRedirectCache,
+    get_redirect_cache,
+    reset_redirect_cache,
+)
+from tests.conftest import client, db_session
+
+
+@pytest.fixture()
+def cache_path(tmp_path):
+    return str(tmp_path / "redirects.cache")
+
+
+@pytest.fixture()
+def shared_cache_enabled(cache_path):
+    original = {
+        "AUTH_ENABLED": settings.AUTH_ENABLED,
+        "REDIRECT_CACHE_ENABLED": settings.REDIRECT_CACHE_ENABLED,
+        "REDIRECT_CACHE_PATH": settings.REDIRECT_CACHE_PATH,
+        "JWT_SECRET_KEY": settings.JWT_SECRET_KEY,
+    }
+    settings.AUTH_ENABLED = False
+    settings.REDIRECT_CACHE_ENABLED = True
+    settings.REDIRECT_CACHE_PATH = cache_path
+    reset_redirect_cache()
+    yield
+    reset_redirect_cache()
+    for key, value in original.items():
+        setattr(settings, key, value)
+
+
+def test_put_get_and_invalidate(cache_path):
+    cache = SharedRedirectCache(cache_path, slot_count=64, heap_size=4096)
+    expires_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+    cache.put("abc123", "https://example.com/a", expires_at)
+    cache.put("xyz789", "https://example.com/b", None)
+
+    assert cache.get("abc123") == ("https://example.com/a", expires_at)
+    assert cache.get("xyz789") == ("https://example.com/b", None)
+    assert cache.get("nope00") is None
+
+    cache.invalidate("abc123")
+    assert cache.get("abc123") is None
+    assert cache.get("xyz789") == ("https://example.com/b", None)
+    cache.close()
+
+
+def test_entries_are_visible_to_other_handles(cache_path):
+    writer = SharedRedirectCache(cache_path, slot_count=64, heap_size=4096)
+    reader = SharedRedirectCache(cache_path, slot_count=64, heap_size=4096)
+
+    writer.put("shared", "https://example.com/shared", None)
+    assert reader.get("shared") == ("https://example.com/shared", None)
+
+    writer.invalidate("shared")
+    assert reader.get("shared") is None
+    writer.close()
+    reader.close()
+
+
+def test_fill_racing_an_invalidation_is_dropped(cache_path):
+    filler = SharedRedirectCache(cache_path, slot_count=64, heap_size=4096)
+    other = SharedRedirectCache(cache_path, slot_count=64, heap_size=4096)
+
+    token = filler.fill_token("racing")
+    # a change commits and invalidates before anything was cached
+    other.invalidate("racing")
+    filler.put("racing", "https://example.com/old", None, token)
+    assert filler.get("racing") is None
+
+    filler.put("racing", "https://example.com/new", None, filler.fill_token("racing"))
+    assert filler.get("racing") == ("https://example.com/new", None)
+    filler.close()
+    other.close()
+
+
+def test_full_heap_resets_table(cache_path):
+    cache = SharedRedirectCache(cache_path, slot_count=64, heap_size=64)
+
+    cache.put("first1", "https://example.com/" + "a" * 30, None)
+    cache.put("second", "https://example.com/" + "b" * 30, None)
+
+    assert cache.get("first1") is None
+    assert cache.get("second") is not None
+    cache.close()
+
+
+def test_redirect_fills_cache(client: TestClient, shared_cache_enabled):
+    resp = client.post(
+        f"{api_version_prefix()}/shorten", json={"url": "https://example.com/hot"}
+    )
+    code = resp.json()["code"]
+
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get(code) is not None
+
+    # served from the cache, clicks still counted
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 307
+    stats = client.get(f"{api_version_prefix()}/stats/{code}").json()
+    assert stats["clicks"] == 2
+
+
+def test_delete_link_invalidates_cache(client: TestClient, shared_cache_enabled):
+    settings.AUTH_ENABLED = True
+    settings.JWT_SECRET_KEY = settings.JWT_SECRET_KEY or "test-secret"
+    now = datetime.now(timezone.utc)
+    token = jwt.encode(
+        {
+            "sub": "cache-owner",
+            "iat": int(now.timestamp()),
+            "exp": int((now + timedelta(minutes=5)).timestamp()),
+            "iss": settings.JWT_ISSUER,
+            "aud": "shortener-service",
+        },
+        settings.JWT_SECRET_KEY,
+        algorithm=settings.JWT_ALGORITHM,
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    resp = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": "https://example.com/owned"},
+        headers=headers,
+    )
+    code = resp.json()["code"]
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get(code) is not None
+
+    resp = client.delete(f"{api_version_prefix()}/links/{code}", headers=headers)
+    assert resp.status_code == 204
+
+    assert get_redirect_cache().get(code) is None
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 404
+
+
+def test_cached_expired_link_redirects_404(client: TestClient, shared_cache_enabled):
+    get_redirect_cache().put(
+        "CACHEX",
+        "https://example.com/expired",
+        datetime.now(timezone.utc) - timedelta(seconds=1),
+    )
+
+    resp = client.get("/CACHEX", follow_redirects=False)
+    assert resp.status_code == 404
+
+
+def test_redirect_does_not_cache_a_row_changed_during_the_read(
+    client: TestClient, shared_cache_enabled, monkeypatch
+):
+    resp = client.post(
+        f"{api_version_prefix()}/shorten", json={"url": "https://example.com/race"}
+    )
+    code = resp.json()["code"]
+    load = redirect.load_redirect_target
+
+    def load_then_change(db, code):
+        target = load(db, code)
+        # e.g. PATCH /links/{code} committing right after our read
+        get_redirect_cache().invalidate(code)
+        return target
+
+    monkeypatch.setattr(redirect, "load_redirect_target", load_then_change)
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get(code) is None
+
+    monkeypatch.setattr(redirect, "load_redirect_target", load)
+    assert client.get(f"/{code}", follow_redirects=False).status_code == 307
+    assert get_redirect_cache().get(code) is not None
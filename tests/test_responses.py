@@ -0,0 +1,34 @@
+import json
+from datetime import datetime, timezone
+
+from app.enums import SourceType
+from app.responses import FastJSONResponse, dumps
+from app.schemas import PrivateURLStats
+
+
+def test_dumps_matches_response_model_output():
+    payload = {
+        "code": "aB3k9X",
+        "original_url": "https://example.com/",
+        "clicks": 3,
+        "owner_client_id": "web",
+        "created_by_user_id": None,
+        "source_type": SourceType.SERVICE,
+        "created_at": datetime(2025, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "expires_at": None,
+        "is_active": True,
+        "extras": {"campaign": "spring"},
+        "unique_visitors": None,
+    }
+
+    fast = json.loads(dumps(payload))
+    validated = json.loads(PrivateURLStats(**payload).model_dump_json())
+    assert fast == validated
+
+
+def test_fast_json_response_renders_bytes():
+    resp = FastJSONResponse({"results": {"abc123": {"found": False, "stats": None}}})
+    assert resp.media_type == "application/json"
+    assert json.loads(resp.body) == {
+        "results": {"abc123": {"found": False, "stats": None}}
+    }
@@ -129,3 +129,16 @@ def test_shorten_persists_expires_at(client: TestClient, db_session):
     )
     assert row is not None
     assert row.expires_at is not None
+
+
+def test_stats_private_payload_includes_extras(client: TestClient):
+    resp = client.post(
+        f"{api_version_prefix()}/shorten",
+        json={"url": "https://example.com/extras", "extras": {"campaign": "spring"}},
+    )
+    assert resp.status_code == 200
+    code = resp.json()["code"]
+
+    stats_resp = client.get(f"{api_version_prefix()}/stats/{code}")
+    assert stats_resp.status_code == 200
+    assert stats_resp.json()["extras"] == {"campaign": "spring"}
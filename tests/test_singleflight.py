@@ -0,0 +1,99 @@
+import asyncio
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+from app.invalidation import evict_local
+from app.models import ShortUrl
+from app.singleflight import SingleFlight
+from tests.conftest import client, db_session
+
+
+def test_concurrent_threads_share_one_call():
+    flight = SingleFlight("test", negative_ttl=0)
+    calls = []
+    release = threading.Event()
+
+    def load():
+        calls.append(1)
+        release.wait(2)
+        return "https://example.com"
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(flight.do("k", load)))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == ["https://example.com"] * 8
+
+
+def test_concurrent_tasks_share_one_call():
+    flight = SingleFlight("test", negative_ttl=0)
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return 42
+
+    async def run():
+        return await asyncio.gather(*[flight.do_async("k", load) for _ in range(8)])
+
+    assert asyncio.run(run()) == [42] * 8
+    assert len(calls) == 1
+
+
+def test_errors_reach_every_waiter_and_are_not_cached():
+    flight = SingleFlight("test", negative_ttl=60)
+
+    async def boom():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("db down")
+
+    async def run():
+        return await asyncio.gather(
+            *[flight.do_async("k", boom) for _ in range(3)], return_exceptions=True
+        )
+
+    assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+    assert flight.do("k", lambda: "ok") == "ok"
+
+
+def test_negative_results_are_cached_until_forgotten():
+    flight = SingleFlight("test", negative_ttl=60)
+    calls = []
+
+    def missing():
+        calls.append(1)
+        return None
+
+    assert flight.do("k", missing) is None
+    assert flight.do("k", missing) is None
+    assert len(calls) == 1
+
+    flight.forget(["k"])
+    assert flight.do("k", lambda: "found") == "found"
+    assert flight.do("k", missing) is None
+    assert len(calls) == 2
+
+
+def test_redirect_404_is_remembered_until_the_code_is_created(
+    client: TestClient, db_session
+):
+    assert client.get("/NEGAT1", follow_redirects=False).status_code == 404
+
+    db_session.add(ShortUrl(code="NEGAT1", original_url="https://example.com/n"))
+    db_session.commit()
+    assert client.get("/NEGAT1", follow_redirects=False).status_code == 404
+
+    evict_local(["NEGAT1"])
+    assert client.get("/NEGAT1", follow_redirects=False).status_code == 307
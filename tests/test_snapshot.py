@@ -0,0 +1,154 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+
+from app import edge
+from app.core.config import settings
+from app.invalidation import publish_invalidation
+from app.models import LinkChange, ShortUrl
+from app.snapshot import (
+    _FULL,
+    EdgeSnapshots,
+    Snapshot,
+    build_delta,
+    build_full,
+    latest_paths,
+    write_snapshot,
+)
+from tests.conftest import db_session
+
+
+@pytest.fixture()
+def invalidation_enabled():
+    original = settings.INVALIDATION_ENABLED
+    settings.INVALIDATION_ENABLED = True
+    yield
+    settings.INVALIDATION_ENABLED = original
+
+
+@pytest.fixture()
+def edge_client(tmp_path, monkeypatch):
+    monkeypatch.setattr(edge, "snapshots", EdgeSnapshots(str(tmp_path)))
+    with TestClient(edge.app) as client:
+        yield client
+
+
+def test_snapshot_round_trip(tmp_path):
+    now = datetime.now(timezone.utc)
+    expires = now + timedelta(days=1)
+    entries = [(f"code{i:04d}", f"https://example.com/{i}", None) for i in range(500)]
+    entries += [
+        ("expiring", "https://example.com/e", expires),
+        ("removed1", None, None),
+    ]
+    path = str(tmp_path / "full-test.snap")
+    assert write_snapshot(path, entries, len(entries), _FULL, now, now, 10, 20) == 502
+
+    snap = Snapshot(path)
+    assert (snap.entry_count, snap.max_link_id, snap.last_change_id) == (502, 10, 20)
+    for i in range(500):
+        assert snap.lookup(f"code{i:04d}") == (True, (f"https://example.com/{i}", None))
+    found, (url, expires_at) = snap.lookup("expiring")
+    assert found and abs(expires_at - expires) < timedelta(milliseconds=1)
+    assert snap.lookup("removed1") == (True, None)
+    assert snap.lookup("missing1") == (False, None)
+
+
+def test_full_and_delta_builds_served_by_edge(
+    tmp_path, db_session, invalidation_enabled, edge_client
+):
+    past = datetime.now(timezone.utc) - timedelta(hours=1)
+    db_session.add_all(
+        [
+            ShortUrl(code="SNAPA1", original_url="https://a.example/", is_active=True),
+            ShortUrl(code="SNAPB1", original_url="https://b.example/", is_active=True),
+            ShortUrl(code="SNAPC1", original_url="https://c.example/", is_active=False),
+            ShortUrl(
+                code="SNAPD1",
+                original_url="https://d.example/",
+                is_active=True,
+                expires_at=past,
+            ),
+        ]
+    )
+    db_session.commit()
+
+    assert edge_client.get("/health").status_code == 503
+    build_full(db_session, str(tmp_path))
+    assert edge.snapshots.reload()
+    assert edge_client.get("/health").status_code == 200
+
+    resp = edge_client.get("/SNAPA1", follow_redirects=False)
+    assert resp.status_code == 307
+    assert resp.headers["location"] == "https://a.example/"
+    for code in ("SNAPC1", "SNAPD1", "NOPE01"):
+        assert edge_client.get(f"/{code}", follow_redirects=False).status_code == 404
+
+    # deactivate one link, create another: only the delta knows
+    short = db_session.query(ShortUrl).filter(ShortUrl.code == "SNAPB1").one()
+    short.is_active = False
+    publish_invalidation(db_session, ["SNAPB1"])
+    db_session.add(ShortUrl(code="SNAPE1", original_url="https://e.example/"))
+    db_session.commit()
+
+    delta_path = build_delta(db_session, str(tmp_path))
+    assert delta_path is not None
+    assert Snapshot(delta_path).entry_count == 2
+    assert edge.snapshots.reload()
+    assert not edge.snapshots.reload()
+
+    assert edge_client.get("/SNAPB1", follow_redirects=False).status_code == 404
+    assert edge_client.get("/SNAPE1", follow_redirects=False).status_code == 307
+    assert edge_client.get("/SNAPA1", follow_redirects=False).status_code == 307
+
+
+def test_entries_beyond_the_counted_capacity_are_rejected(tmp_path):
+    now = datetime.now(timezone.utc)
+    entries = ((f"code{i:04d}", "https://example.com/", None) for i in range(100))
+    path = tmp_path / "full-test.snap"
+    with pytest.raises(ValueError):
+        write_snapshot(str(path), entries, 10, _FULL, now, now, 0, 0)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_delta_picks_up_lower_ids_committed_after_the_full_build(
+    tmp_path, db_session, invalidation_enabled
+):
+    # ids handed out in order, but the lower ones commit after the full build
+    first = ShortUrl(code="LATEA1", original_url="https://a.example/")
+    db_session.add(first)
+    db_session.flush()
+    db_session.add(
+        ShortUrl(id=first.id + 2, code="LATEC1", original_url="https://c.example/")
+    )
+    publish_invalidation(db_session, ["LATEC1"])
+    db_session.flush()
+    change_id = db_session.query(func.max(LinkChange.id)).scalar()
+    db_session.query(LinkChange).filter(LinkChange.id == change_id).update(
+        {"id": change_id + 1}
+    )
+    db_session.commit()
+    build_full(db_session, str(tmp_path))
+
+    db_session.add(
+        ShortUrl(id=first.id + 1, code="LATEB1", original_url="https://b.example/")
+    )
+    first.original_url = "https://a2.example/"
+    db_session.add(
+        LinkChange(id=change_id, code="LATEA1", changed_at=datetime.now(timezone.utc))
+    )
+    db_session.commit()
+
+    delta = Snapshot(build_delta(db_session, str(tmp_path)))
+    assert delta.entry_count == 2
+    assert delta.lookup("LATEB1") == (True, ("https://b.example/", None))
+    assert delta.lookup("LATEA1") == (True, ("https://a2.example/", None))
+
+
+def test_delta_needs_a_complete_change_log(tmp_path, db_session):
+    assert build_delta(db_session, str(tmp_path)) is None  # no full build yet
+    build_full(db_session, str(tmp_path))
+    assert not settings.INVALIDATION_ENABLED
+    assert build_delta(db_session, str(tmp_path)) is None
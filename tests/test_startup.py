@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+from app.schema_version import ALEMBIC_INI, head_revisions
+
+
+def _run(args: list[str], **env: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *args],
+        env={**os.environ, "JWT_SECRET_KEY": "x", **env},
+        capture_output=True,
+        text=True,
+    )
+
+
+def test_auth_stack_is_not_imported_when_auth_is_disabled():
+    probe = (
+        "import sys, app.main\n"
+        "print(sorted(m for m in ('jwt', 'cryptography', 'alembic') if m in sys.modules))"
+    )
+    result = _run(["-c", probe], AUTH_ENABLED="false")
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]"
+
+
+def test_head_revisions_match_alembic():
+    script = ScriptDirectory.from_config(Config(str(ALEMBIC_INI)))
+    assert head_revisions() == set(script.get_heads())
+
+
+def test_schema_check_upgrades_only_when_behind(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'boot.db'}"
+
+    behind = _run(["-m", "app.schema_version"], DATABASE_URL=database_url)
+    assert behind.returncode == 1
+
+    upgraded = _run(
+        ["-m", "app.schema_version", "--upgrade"], DATABASE_URL=database_url
+    )
+    assert upgraded.returncode == 0, upgraded.stderr
+    assert "Running Alembic migrations" in upgraded.stdout
+
+    current = _run(["-m", "app.schema_version", "--upgrade"], DATABASE_URL=database_url)
+    assert current.returncode == 0
+    assert "skipping migrations" in current.stdout
+
+
+def test_models_match_migrations(tmp_path):
+    database_url = f"sqlite:///{tmp_path / 'check.db'}"
+    upgraded = _run(
+        ["-m", "app.schema_version", "--upgrade"], DATABASE_URL=database_url
+    )
+    assert upgraded.returncode == 0, upgraded.stderr
+
+    check = _run(["-m", "alembic", "check"], DATABASE_URL=database_url)
+    assert check.returncode == 0, check.stderr
@@ -0,0 +1,101 @@
+from contextlib import nullcontext
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.api.helpers import api_version_prefix
+from app.core.config import settings
+from app.models import ShortUrl
+from app.visitors import HyperLogLog, flush_visitors, recorder, unique_visitors
+from tests.conftest import client, db_session
+from tests.test_auth_behavior import _make_token, _set_auth, restore_auth_settings
+
+
+@pytest.fixture()
+def visitors_enabled():
+    original = settings.UNIQUE_VISITORS_ENABLED
+    settings.UNIQUE_VISITORS_ENABLED = True
+    recorder.drain()
+    yield
+    settings.UNIQUE_VISITORS_ENABLED = original
+    recorder.drain()
+
+
+def test_estimate_is_close_and_ignores_duplicates():
+    sketch = HyperLogLog()
+    for i in range(20_000):
+        sketch.add(f"visitor-{i % 10_000}")
+    assert abs(sketch.count() - 10_000) < 500
+
+    small = HyperLogLog()
+    for i in range(3):
+        small.add(f"visitor-{i}")
+    assert small.count() == 3
+
+
+def test_merge_is_a_union():
+    a, b = HyperLogLog(), HyperLogLog()
+    for i in range(5_000):
+        a.add(f"v{i}")
+        b.add(f"v{i + 2_500}")
+    a.merge(b)
+    assert abs(a.count() - 7_500) < 400
+    assert HyperLogLog(a.to_bytes()).count() == a.count()
+
+
+def test_flush_merges_day_sketches(db_session, visitors_enabled):
+    factory = lambda: nullcontext(db_session)  # noqa: E731
+    day = date(2026, 3, 1)
+
+    recorder.add("HLLDB1", "alice", day)
+    recorder.add("HLLDB1", "bob", day)
+    assert flush_visitors(factory) == 1
+
+    # a second flush for the same day merges instead of overwriting
+    recorder.add("HLLDB1", "bob", day)
+    recorder.add("HLLDB1", "carol", day)
+    recorder.add("HLLDB1", "dave", date(2026, 3, 2))
+    assert flush_visitors(factory) == 2
+    assert flush_visitors(factory) == 0
+
+    assert unique_visitors(db_session, "HLLDB1", day, day) == 3
+    assert unique_visitors(db_session, "HLLDB1", day, date(2026, 3, 2)) == 4
+
+
+def test_owner_stats_include_unique_visitors(
+    client: TestClient, db_session, restore_auth_settings, visitors_enabled
+):
+    _set_auth(True)
+    db_session.add(
+        ShortUrl(
+            code="HLLAPI",
+            original_url="https://example.com/hll",
+            created_by_user_id="owner-1",
+        )
+    )
+    db_session.commit()
+
+    for agent in ("a", "b", "a"):
+        resp = client.get(
+            "/HLLAPI", headers={"user-agent": agent}, follow_redirects=False
+        )
+        assert resp.status_code == 307
+    flush_visitors(lambda: nullcontext(db_session))
+
+    owner = {"Authorization": f"Bearer {_make_token(sub='owner-1')}"}
+    resp = client.get(f"{api_version_prefix()}/stats/HLLAPI", headers=owner)
+    assert resp.status_code == 200
+    assert resp.json()["clicks"] == 3
+    assert resp.json()["unique_visitors"] == 2
+
+    other = {"Authorization": f"Bearer {_make_token(sub='owner-2')}"}
+    resp = client.get(f"{api_version_prefix()}/stats/HLLAPI", headers=other)
+    assert "unique_visitors" not in resp.json()
+
+    resp = client.get(
+        f"{api_version_prefix()}/stats/HLLAPI",
+        params={"visitors_from": "2026-03-02", "visitors_to": "2026-03-01"},
+        headers=owner,
+    )
+    assert resp.status_code == 400